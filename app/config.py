@@ -14,11 +14,51 @@ class Config(BaseSettings):
     DB_SERVER_PORT: int = 8080
     DB_API_KEY: str = ""
     SCHEMA_CACHE_PATH: str = "./schema_cache"
+    SCHEMA_CACHE_JSON_EXPORT: bool = False  # zusätzlich schema.json, tables/*.json, views/*.json schreiben
     API_SERVER_HOST: str = "http://localhost"
     API_SERVER_PORT: int = 8081
     MCP_TRANSPORT: str = "streamable-http"  # stdio, streamable-http, sse
     MCP_HOST: str = "0.0.0.0"
     MCP_PORT: int = 8000
+    SCHEMA_REFRESH_ON_START: bool = True  # Schema beim Start im Hintergrund aktualisieren
+    QUERY_CACHE_TTL: float = 60.0  # Sekunden, 0 deaktiviert den Ergebnis-Cache
+    QUERY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    MAX_RESULT_ROWS: int = 50000  # harte Obergrenze für ein vollständig geladenes Ergebnis bzw. eine Seite
+    MAX_RESULT_BYTES: int = 64 * 1024 * 1024
+    QUERY_PAGE_SIZE: int = 500  # Standard-Seitengröße bei page_size/cursor
+    CURSOR_TTL: float = 300.0  # Sekunden bis ein nicht abgeholter Cursor geschlossen wird
+    CURSOR_MAX_OPEN: int = 8  # offene Cursor; sie nutzen mit SSE einen eigenen Verbindungspool
+    QUERY_ROW_CAP: int = 10000  # Zeilen je Abfrage ohne page_size; unbeschränkte SELECTs erhalten TOP, 0 deaktiviert
+    QUERY_COST_MODE: str = "truncate"  # truncate: abschneiden und truncated melden, refuse: mit Fehler ablehnen
+    QUERY_PREFLIGHT: str = "off"  # Schätzung vorab: off, stats (sys.partitions), count (COUNT_BIG)
+    QUERY_COST_BUDGET: int = 1000000  # geschätzte Zeilen, ab denen refuse vorab ablehnt
+    TABLE_STATS_TTL: float = 600.0  # Sekunden, die Zeilenzahlen aus sys.partitions gültig bleiben
+    QUERY_BATCH_MAX: int = 50  # Abfragen je execute_sql_batch bzw. POST /api/query/batch
+    QUERY_BATCH_CONCURRENCY: int = 4  # gleichzeitig laufende Abfragen eines Batches
+    WS_MAX_IN_FLIGHT: int = 8  # gleichzeitige Anfragen mit request_id je WebSocket-Verbindung
+    WS_CHUNK_ROWS: int = 500  # Zeilen je rows-Frame auf dem WebSocket
+    SSE_CHUNK_ROWS: int = 500  # Zeilen je rows-Ereignis auf /sse
+    SSE_PROGRESS_INTERVAL: float = 1.0  # Sekunden zwischen progress-Ereignissen
+    SSE_HEARTBEAT: float = 15.0  # Sekunden ohne Ereignis bis zu einem Heartbeat-Kommentar
+    SSE_BUFFER_EVENTS: int = 256  # Ereignisse je Abfrage, die für Last-Event-ID vorgehalten werden
+    SSE_RETENTION: float = 60.0  # Sekunden, die eine Abfrage ohne Client wartet bzw. nach dem Ende fortsetzbar bleibt
+    SSE_MAX_STREAMS: int = 8  # gleichzeitig laufende SSE-Abfragen; sie teilen sich den Pool der Cursor
+    SNAPSHOT_TTL: float = 900.0  # Sekunden ohne Zugriff, nach denen ein Snapshot verworfen wird
+    SNAPSHOT_MAX_BYTES: int = 256 * 1024 * 1024  # geschätzte Größe aller Snapshots zusammen
+    SNAPSHOT_QUERY_TIMEOUT: float = 10.0  # Sekunden je Abfrage auf Snapshots
+    PROMPT_SCHEMA_PREFILL: bool = True  # MCP-Prompts mit table_name/view_name um einen Schema-Auszug ergänzen
+    PROMPT_SCHEMA_MAX_COLUMNS: int = 60  # Spalten je Schema-Auszug, der Rest wird nur gezählt
+    PROXY_POOL_SIZE: int = 20  # gleichzeitige Verbindungen zum SQL-Proxy je Client
+    PROXY_CONNECT_TIMEOUT: float = 5.0
+    PROXY_READ_TIMEOUT: float = 120.0  # Sekunden ohne neue Daten vom Proxy
+    PROXY_RETRIES: int = 2  # Wiederholungen bei Verbindungsfehlern, Timeouts und 502/503/504
+    PROXY_RETRY_BACKOFF: float = 0.2
+    PROXY_RETRY_BACKOFF_MAX: float = 2.0
+    PROXY_BREAKER_THRESHOLD: int = 5  # Fehlschläge in Folge bis zum Circuit Breaker, 0 deaktiviert
+    PROXY_BREAKER_RESET: float = 30.0  # Sekunden, bis ein Probeaufruf durchgelassen wird
+    HTTP_PRECOMPRESS: bool = True  # Schema-, Tool- und Prompt-Antworten einmal gzip-/Brotli-komprimiert vorhalten
+    HTTP_COMPRESS_MIN_BYTES: int = 1024  # kleinere Antworten werden nicht komprimiert
+    METRICS_ENABLED: bool = True  # Laufzeit-Metriken erfassen und unter /metrics ausliefern
 
     @property
     def DB_SERVER_PORT_STR(self) -> str:
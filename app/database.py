@@ -1,12 +1,75 @@
-import json
+import asyncio
 import logging
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import requests
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Any, AsyncIterator, Callable, Dict, Generator, Iterator, List, Optional, Tuple
 from .config import config
+from .metrics import (
+    PHASE_LATENCY, PROXY_ERRORS, PROXY_IN_FLIGHT, RESULT_BYTES, RESULT_ROWS, register_manager_metrics,
+)
+from .join_graph import JoinGraph
+from .proxy_client import (
+    CircuitBreaker, RetryPolicy, acall_with_retry, build_async_client, build_session, call_with_retry,
+    requests_timeout,
+)
+from .query_cache import QueryCache, normalize_query
+from .query_guard import (
+    TABLE_ROWS_QUERY, GuardedQuery, QueryCostExceeded, TableStats, cached_plan, check_modes, count_query,
+)
+from .result_format import ColumnarResult, check_format
+from .single_flight import SingleFlight
+from .snapshot_store import SnapshotStore
+from .sql_lexer import cached_classify, is_read_only
+from .schema_catalog import DEFAULT_PAGE_SIZE, column_name, column_type
+from .schema_index import assemble_schema, get_schema_index
+from .streaming import CursorRegistry, ResultLimitExceeded, ResultStreamParser
+from .schema_store import SCHEMA_DB_FILE, SchemaStore, SchemaStoreSource, export_json_layout
 
 logger = logging.getLogger("mcp-proalpha")
 
+TABLES_QUERY = """
+    SELECT TABLE_NAME, TABLE_TYPE
+    FROM INFORMATION_SCHEMA.TABLES
+"""
+COLUMNS_QUERY = """
+    SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE, CHARACTER_MAXIMUM_LENGTH
+    FROM INFORMATION_SCHEMA.COLUMNS
+"""
+VIEWS_QUERY = """
+    SELECT TABLE_NAME
+    FROM INFORMATION_SCHEMA.VIEWS
+"""
+RELATIONSHIPS_QUERY = """
+    SELECT
+        fk.name AS FK_Name,
+        tp.name AS ParentTable,
+        tr.name AS ReferencedTable,
+        cp.name AS ParentColumn,
+        cr.name AS ReferencedColumn
+    FROM sys.foreign_keys fk
+    INNER JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
+    INNER JOIN sys.tables tp ON fkc.parent_object_id = tp.object_id
+    INNER JOIN sys.columns cp ON fkc.parent_object_id = cp.object_id AND fkc.parent_column_id = cp.column_id
+    INNER JOIN sys.tables tr ON fkc.referenced_object_id = tr.object_id
+    INNER JOIN sys.columns cr ON fkc.referenced_object_id = cr.object_id AND fkc.referenced_column_id = cr.column_id
+"""
+# Alle benutzerdefinierten Tabellen und Views mit Änderungszeitpunkt (ISO 8601, sortierbar)
+OBJECTS_QUERY = """
+    SELECT o.name AS OBJECT_NAME, RTRIM(o.type) AS OBJECT_TYPE,
+        CONVERT(varchar(33), o.modify_date, 126) AS MODIFY_DATE
+    FROM sys.objects o
+    WHERE o.type IN ('U', 'V') AND o.is_ms_shipped = 0
+"""
+REFRESH_CONCURRENCY = 5
+# Maximale Anzahl Namen pro IN-Liste beim inkrementellen Refresh
+IN_LIST_CHUNK = 500
+STREAM_CHUNK_SIZE = 64 * 1024
+
 class DatabaseManager:
     def __init__(self):
         self.db_host = config.DB_SERVER_HOST.rstrip("/")
@@ -15,182 +78,776 @@ class DatabaseManager:
 
         self.api_host = config.API_SERVER_HOST.rstrip("/")
         self.api_port = config.API_SERVER_PORT
-        self.api_url = f"{self.api_host}:{self.api_port}/api/"        
+        self.api_url = f"{self.api_host}:{self.api_port}/api/"
 
         self.api_key = config.DB_API_KEY
         self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        if self.api_key:
+            self.headers["Authorization"] = f"Bearer {self.api_key}"
         self.query_url = f"{self.db_url}/sql/query"
         self.health_url = f"{self.db_url}/q/health"
 
         self.session = None
-        self.schema_cache = {
-            "tables": {},
-            "views": {},
-            "relationships": []
-        }
+        self.retry_policy = RetryPolicy(config.PROXY_RETRIES, config.PROXY_RETRY_BACKOFF, config.PROXY_RETRY_BACKOFF_MAX)
+        self.breaker = CircuitBreaker(config.PROXY_BREAKER_THRESHOLD, config.PROXY_BREAKER_RESET)
+        # Ein gepoolter AsyncClient pro Event-Loop (MCP-Server und REST-API laufen in eigenen Loops)
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Lang offene Streams (Cursor) bekommen einen eigenen Pool, damit sie kurze Abfragen nicht aushungern
+        self._stream_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.query_cache = QueryCache(config.QUERY_CACHE_TTL, config.QUERY_CACHE_MAX_BYTES)
+        self.cursors = CursorRegistry(config.CURSOR_TTL, config.CURSOR_MAX_OPEN)
+        # Gleichzeitige identische Abfragen und Schema-Refreshs laufen nur einmal
+        self.flights = SingleFlight()
+        self.table_stats = TableStats(config.TABLE_STATS_TTL)
+        self.snapshots = SnapshotStore(config.SNAPSHOT_TTL, config.SNAPSHOT_MAX_BYTES, config.SNAPSHOT_QUERY_TIMEOUT)
         self.schema_cache_dir = Path(config.SCHEMA_CACHE_PATH)
         self.schema_cache_dir.mkdir(exist_ok=True)
+        # Das Schema wird erst beim ersten Zugriff aus dem Cache auf der Platte geladen
+        self.schema_store = SchemaStore(self.schema_cache_dir / SCHEMA_DB_FILE)
+        self.schema_index = get_schema_index(
+            SchemaStoreSource(self.schema_store, self.schema_cache_dir / "schema.json")
+        )
+        self._background_refresh: Optional[threading.Thread] = None
+        self._background_refresh_lock = threading.Lock()
+
+    def start_background_refresh(self) -> None:
+        """
+        Startet einmalig pro Instanz einen Schema-Refresh in einem Hintergrund-Thread.
+        Bis er fertig ist, wird aus dem vorhandenen Cache auf der Platte bedient.
+        """
+        with self._background_refresh_lock:
+            if self._background_refresh is not None:
+                return
+            self._background_refresh = threading.Thread(
+                target=self._run_background_refresh, name="schema-refresh", daemon=True
+            )
+            self._background_refresh.start()
+
+    def _run_background_refresh(self) -> None:
         try:
             self.refresh_schema_cache()
         except Exception as e:
             logger.error(f"Fehler beim Laden des Datenbankschemas: {e}")
-            logger.warning("Der Server wird mit einem leeren Schema gestartet. Überprüfen Sie Ihre API-Verbindung und führen Sie 'refresh_schema' aus.")
+            logger.warning("Der Server arbeitet mit dem vorhandenen Schema-Cache weiter. Überprüfen Sie Ihre API-Verbindung und führen Sie 'refresh_schema' aus.")
 
     def connect(self) -> bool:
         try:
-            self.session = requests.Session()
-            self.session.headers.update(self.headers)            
-            response = self.session.get(self.health_url, timeout=5)
-            response.raise_for_status()
+            self.session = build_session(self.headers)
+
+            def check():
+                response = self.session.get(self.health_url, timeout=requests_timeout())
+                response.raise_for_status()
+
+            call_with_retry(check, self.retry_policy, self.breaker)
             return True
         except Exception as e:
             logger.error(f"Fehler bei der API-Verbindung: {e}")
             return False
 
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
+    def _get_async_client(self, long_lived: bool = False) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        clients = self._stream_clients if long_lived else self._async_clients
+        client = clients.get(loop)
+        if client is None or client.is_closed:
+            client = build_async_client(self.headers, self._stream_pool_size() if long_lived else None)
+            clients[loop] = client
+        return client
+
+    @staticmethod
+    def _stream_pool_size() -> int:
+        # So groß wie die Zahl der Streams, die gleichzeitig offen sein dürfen (Cursor und SSE)
+        return config.CURSOR_MAX_OPEN + config.SSE_MAX_STREAMS
+
+    async def aclose(self) -> None:
+        """Schließt die AsyncClients der aktuellen Event-Loop."""
+        loop = asyncio.get_running_loop()
+        for clients in (self._async_clients, self._stream_clients):
+            client = clients.pop(loop, None)
+            if client is not None:
+                await client.aclose()
+
+    def _prepare_query(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        # Entscheide GET oder POST je nach Query
+        if "\n" in query or len(query) > 120:
+            logger.debug(f"SQL-Proxy-Request: POST {self.query_url} | query={query}")
+            return "POST", {"json": {"query": query}}
+        logger.debug(f"SQL-Proxy-Request: GET {self.query_url} | query={query}")
+        return "GET", {"params": {"query": query}}
+
+    def validate_query(self, query: str) -> str:
+        """Gibt die Abfrage ohne umgebenden Leerraum zurück; ValueError, wenn sie nicht nur liest."""
         query = query.strip()
-        if not self._is_read_only(query):
-            raise ValueError("Nur Read-Only-Abfragen sind erlaubt")
+        verdict = cached_classify(query)
+        if not verdict.read_only:
+            raise ValueError(f"Nur Read-Only-Abfragen sind erlaubt: {verdict.reason}")
+        return query
+
+    @staticmethod
+    def _limits(bounded: bool) -> Tuple[Optional[int], Optional[int]]:
+        if not bounded:
+            return None, None
+        return config.MAX_RESULT_ROWS, config.MAX_RESULT_BYTES
+
+    @staticmethod
+    def _count_row(rows: int, max_rows: Optional[int]) -> int:
+        rows += 1
+        if max_rows is not None and rows > max_rows:
+            raise ResultLimitExceeded(
+                f"Ergebnis überschreitet {max_rows} Zeilen; Abfrage einschränken oder page_size/cursor verwenden"
+            )
+        return rows
+
+    @staticmethod
+    def _check_bytes(parser: ResultStreamParser, max_bytes: Optional[int]) -> None:
+        if max_bytes is not None and parser.bytes_read > max_bytes:
+            raise ResultLimitExceeded(
+                f"Ergebnis überschreitet {max_bytes} Bytes; Abfrage einschränken oder page_size/cursor verwenden"
+            )
+
+    @staticmethod
+    def _observe_query(start: float, parser: ResultStreamParser, rows: int) -> None:
+        PHASE_LATENCY.observe(time.perf_counter() - start, phase="fetch")
+        PHASE_LATENCY.observe(parser.parse_seconds, phase="parse")
+        RESULT_ROWS.observe(rows)
+        RESULT_BYTES.observe(parser.bytes_read)
+
+    def stream_query(
+        self, query: str, max_rows: Optional[int] = None, max_bytes: Optional[int] = None,
+        stats: Optional[Dict[str, int]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Liefert die Ergebniszeilen, während sie vom Proxy eintreffen, ohne die
+        Antwort vollständig im Speicher zu halten. Beim Überschreiten von
+        `max_rows`/`max_bytes` wird die Verbindung abgebrochen.
+        """
+        query = self.validate_query(query)
+        method, kwargs = self._prepare_query(query)
         if not self.session:
             if not self.connect():
                 raise ConnectionError("Keine Verbindung zur API möglich")
+        parser = ResultStreamParser(config.MAX_RESULT_BYTES)
+        rows = 0
+
+        def open_response() -> requests.Response:
+            response = self.session.request(method, self.query_url, stream=True, timeout=requests_timeout(), **kwargs)
+            try:
+                response.raise_for_status()
+            except Exception:
+                response.close()
+                raise
+            return response
+
+        start = time.perf_counter()
+        PROXY_IN_FLIGHT.inc()
         try:
-            # Entscheide GET oder POST je nach Query
-            if "\n" in query or len(query) > 120:
-                logger.info(f"SQL-Proxy-Request: POST {self.query_url} | query={query}")
-                response = self.session.post(self.query_url, json={"query": query})
-            else:
-                logger.info(f"SQL-Proxy-Request: GET {self.query_url} | query={query}")
-                params = {"query": query}
-                response = self.session.get(self.query_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            if "error" in data:
-                raise ValueError(f"API-Fehler: {data['error']}")
-            if "results" in data:
-                return data["results"]
-            else:
-                logger.warning("Unerwartete API-Antwortstruktur, versuche direktes Parsen")
-                return data if isinstance(data, list) else []
+            # Wiederholt wird nur bis zum Eintreffen der Antwort, nie nach bereits gelieferten Zeilen
+            with call_with_retry(open_response, self.retry_policy, self.breaker) as response:
+                PHASE_LATENCY.observe(time.perf_counter() - start, phase="proxy_wait")
+                for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                    items = parser.feed(chunk)
+                    self._check_bytes(parser, max_bytes)
+                    for row in items:
+                        rows = self._count_row(rows, max_rows)
+                        yield row
+                for row in parser.close():
+                    rows = self._count_row(rows, max_rows)
+                    yield row
         except Exception as e:
             logger.error(f"Fehler bei der Ausführung der Abfrage über die API: {e}")
+            PROXY_ERRORS.inc(reason=type(e).__name__)
             raise
+        finally:
+            PROXY_IN_FLIGHT.dec()
+            self._observe_query(start, parser, rows)
+            if stats is not None:
+                stats["bytes"] = parser.bytes_read
+                stats["rows"] = rows
 
-    def _is_read_only(self, query: str) -> bool:
-        query = query.lower()
-        allowed_prefixes = ["select ", "with ", "declare ", "print "]
-        forbidden_keywords = [
-            "insert ", "update ", "delete ", "drop ", "create ", "alter ", 
-            "truncate ", "merge ", "exec ", "execute ", "sp_", "xp_"
-        ]
-        is_allowed = any(query.startswith(prefix) for prefix in allowed_prefixes)
-        contains_forbidden = any(keyword in query for keyword in forbidden_keywords)
-        return is_allowed and not contains_forbidden
+    async def stream_query_async(
+        self, query: str, max_rows: Optional[int] = None, max_bytes: Optional[int] = None,
+        stats: Optional[Dict[str, int]] = None, long_lived: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Wie stream_query über den AsyncClient. `long_lived` für Streams, die zwischen
+        zwei Lesevorgängen offen bleiben (Cursor); sie nutzen einen eigenen Pool.
+        """
+        query = self.validate_query(query)
+        method, kwargs = self._prepare_query(query)
+        client = self._get_async_client(long_lived)
+        parser = ResultStreamParser(config.MAX_RESULT_BYTES)
+        rows = 0
 
-    def get_database_schema(self) -> Dict[str, Any]:
-        cache_file = self.schema_cache_dir / "schema.json"
-        if cache_file.exists():
+        async def open_response() -> httpx.Response:
+            response = await client.send(client.build_request(method, self.query_url, **kwargs), stream=True)
             try:
-                with open(cache_file, "r") as f:
-                    schema = json.load(f)
-                logger.info("Schema erfolgreich aus Cache geladen")
-                return schema
-            except Exception as e:
-                logger.error(f"Fehler beim Laden des Schemas aus dem Cache: {e}")
-                return self.schema_cache
+                response.raise_for_status()
+            except Exception:
+                await response.aclose()
+                raise
+            return response
+
+        response = None
+        start = time.perf_counter()
+        PROXY_IN_FLIGHT.inc()
+        try:
+            response = await acall_with_retry(open_response, self.retry_policy, self.breaker)
+            PHASE_LATENCY.observe(time.perf_counter() - start, phase="proxy_wait")
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                items = parser.feed(chunk)
+                self._check_bytes(parser, max_bytes)
+                for row in items:
+                    rows = self._count_row(rows, max_rows)
+                    yield row
+            for row in parser.close():
+                rows = self._count_row(rows, max_rows)
+                yield row
+        except Exception as e:
+            logger.error(f"Fehler bei der Ausführung der Abfrage über die API: {e}")
+            PROXY_ERRORS.inc(reason=type(e).__name__)
+            raise
+        finally:
+            PROXY_IN_FLIGHT.dec()
+            self._observe_query(start, parser, rows)
+            if response is not None:
+                await response.aclose()
+            if stats is not None:
+                stats["bytes"] = parser.bytes_read
+                stats["rows"] = rows
+
+    def execute_query(self, query: str, use_cache: bool = True, bounded: bool = True) -> List[Dict[str, Any]]:
+        """
+        Führt eine Read-Only-Abfrage aus und gibt alle Zeilen zurück. Mit `bounded`
+        gelten MAX_RESULT_ROWS/MAX_RESULT_BYTES als harte Obergrenze.
+        """
+        return self.execute_query_result(query, use_cache, bounded).to_records()
+
+    async def execute_query_async(
+        self, query: str, use_cache: bool = True, bounded: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Wie execute_query, blockiert aber die Event-Loop nicht während des Proxy-Roundtrips."""
+        return (await self.execute_query_result_async(query, use_cache, bounded)).to_records()
+
+    def execute_query_result(self, query: str, use_cache: bool = True, bounded: bool = True) -> ColumnarResult:
+        """
+        Wie execute_query, liefert das Ergebnis aber spaltenorientiert (ohne Dict pro Zeile).
+        Läuft dieselbe Abfrage bereits, wird auf deren Ergebnis gewartet statt den Proxy
+        erneut anzufragen. Mit `bounded` greift zusätzlich die Kostenbremse (QUERY_ROW_CAP).
+        """
+        guarded = self._guard(self.validate_query(query), bounded)
+        cache_key = normalize_query(guarded.query)
+        if use_cache and self.query_cache.enabled:
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        return self.flights.do(
+            ("query", cache_key, bounded), lambda: self._fetch_result(guarded, cache_key, use_cache, bounded)
+        )
+
+    def _fetch_result(self, guarded: GuardedQuery, cache_key: str, use_cache: bool, bounded: bool) -> ColumnarResult:
+        estimated = self._preflight(guarded)
+        stats: Dict[str, int] = {}
+        result = ColumnarResult()
+        rows = self.stream_query(guarded.query, *self._limits(bounded), stats=stats)
+        try:
+            for row in rows:
+                if self._over_cap(guarded, result):
+                    break
+                result.append_record(row)
+        finally:
+            rows.close()
+        result.estimated_rows = estimated
+        if use_cache:
+            self.query_cache.put(cache_key, result, stats["bytes"])
+        return result
+
+    async def execute_query_result_async(
+        self, query: str, use_cache: bool = True, bounded: bool = True
+    ) -> ColumnarResult:
+        guarded = self._guard(self.validate_query(query), bounded)
+        cache_key = normalize_query(guarded.query)
+        if use_cache and self.query_cache.enabled:
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        return await self.flights.ado(
+            ("query", cache_key, bounded), lambda: self._fetch_result_async(guarded, cache_key, use_cache, bounded)
+        )
+
+    def cached_result(self, query: str) -> Optional[ColumnarResult]:
+        """Ergebnis von execute_query_result aus dem Abfrage-Cache, ohne den Proxy anzufragen; sonst None."""
+        if not self.query_cache.enabled:
+            return None
+        return self.query_cache.get(normalize_query(self._guard(self.validate_query(query), True).query))
+
+    async def execute_batch_async(
+        self, queries: List[str], use_cache: bool = True, fmt: str = "records", concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Führt mehrere Read-Only-Abfragen parallel aus (höchstens `concurrency`, begrenzt durch
+        QUERY_BATCH_CONCURRENCY) und liefert je Abfrage das Ergebnis oder den Fehler.
+        Vorab werden alle Abfragen geprüft; ist eine nicht Read-Only, läuft keine.
+        """
+        check_format(fmt)
+        if not queries:
+            raise ValueError("Keine Abfragen übergeben")
+        if len(queries) > config.QUERY_BATCH_MAX:
+            raise ValueError(f"Höchstens {config.QUERY_BATCH_MAX} Abfragen je Batch erlaubt")
+        rejected = [i for i, q in enumerate(queries) if not isinstance(q, str) or not is_read_only(q.strip())]
+        if rejected:
+            raise ValueError(f"Nur Read-Only-Abfragen sind erlaubt (Index {', '.join(map(str, rejected))})")
+        limit = max(1, min(concurrency or config.QUERY_BATCH_CONCURRENCY, config.QUERY_BATCH_CONCURRENCY))
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(index: int, query: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    result = await self.execute_query_result_async(query, use_cache=use_cache)
+                except Exception as e:
+                    logger.debug(f"Batch-Abfrage {index} fehlgeschlagen: {e}")
+                    return {"index": index, "error": str(e), "error_type": type(e).__name__}
+            return {"index": index, **result.to_envelope(fmt)}
+
+        results = await asyncio.gather(*(run(i, q) for i, q in enumerate(queries)))
+        failed = sum(1 for r in results if "error" in r)
+        return {"results": list(results), "succeeded": len(results) - failed, "failed": failed}
+
+    async def _fetch_result_async(
+        self, guarded: GuardedQuery, cache_key: str, use_cache: bool, bounded: bool
+    ) -> ColumnarResult:
+        estimated = await self._preflight_async(guarded)
+        stats: Dict[str, int] = {}
+        result = ColumnarResult()
+        rows = self.stream_query_async(guarded.query, *self._limits(bounded), stats=stats)
+        try:
+            async for row in rows:
+                if self._over_cap(guarded, result):
+                    break
+                result.append_record(row)
+        finally:
+            await rows.aclose()
+        result.estimated_rows = estimated
+        if use_cache:
+            self.query_cache.put(cache_key, result, stats["bytes"])
+        return result
+
+    @staticmethod
+    def _guard(query: str, bounded: bool) -> GuardedQuery:
+        if not bounded:
+            return GuardedQuery(query, query, None, False, ())
+        check_modes(config.QUERY_COST_MODE, config.QUERY_PREFLIGHT)
+        return cached_plan(query, config.QUERY_ROW_CAP or None)
+
+    @classmethod
+    def _over_cap(cls, guarded: GuardedQuery, result: ColumnarResult) -> bool:
+        """True, sobald eine Zeile über QUERY_ROW_CAP eintrifft; im Modus refuse ein Fehler."""
+        if not cls._cap_reached(guarded, len(result)):
+            return False
+        result.truncated = True
+        return True
+
+    @staticmethod
+    def _cap_reached(guarded: GuardedQuery, rows: int) -> bool:
+        if guarded.row_cap is None or rows < guarded.row_cap:
+            return False
+        if config.QUERY_COST_MODE == "refuse":
+            raise QueryCostExceeded(
+                f"Ergebnis überschreitet {guarded.row_cap} Zeilen (QUERY_ROW_CAP); "
+                "Abfrage einschränken oder page_size/cursor verwenden"
+            )
+        return True
+
+    async def stream_guarded_async(
+        self, query: str, info: Dict[str, Any], long_lived: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Zeilen einer Read-Only-Abfrage, sobald sie vom Proxy geparst sind, mit Kostenbremse
+        und Obergrenzen, aber ohne Ergebnis-Cache. `info` erhält `estimated_rows` und am
+        Ende `truncated`; `long_lived` wie bei stream_query_async.
+        """
+        guarded = self._guard(self.validate_query(query), True)
+        info["estimated_rows"] = await self._preflight_async(guarded)
+        info["truncated"] = False
+        count = 0
+        rows = self.stream_query_async(guarded.query, *self._limits(True), long_lived=long_lived)
+        try:
+            async for row in rows:
+                if self._cap_reached(guarded, count):
+                    info["truncated"] = True
+                    break
+                count += 1
+                yield row
+        finally:
+            await rows.aclose()
+
+    def _preflight(self, guarded: GuardedQuery) -> Optional[int]:
+        """Schätzt vorab die Zeilenzahl einer unbeschränkten Abfrage (QUERY_PREFLIGHT)."""
+        if not guarded.capped or config.QUERY_PREFLIGHT == "off":
+            return None
+        if config.QUERY_PREFLIGHT == "stats":
+            if not self.table_stats.fresh():
+                self.flights.do("table-stats", self._load_table_stats)
+            return self._check_budget(self.table_stats.estimate(guarded.tables))
+        counting = count_query(guarded.original)
+        if counting is None:
+            return None
+        try:
+            rows = list(self.stream_query(counting))
+        except Exception as e:
+            logger.warning(f"Vorab-Zählung fehlgeschlagen, Abfrage läuft ohne Schätzung: {e}")
+            return None
+        return self._check_budget(int(rows[0]["ROW_COUNT"]) if rows else None)
+
+    async def _preflight_async(self, guarded: GuardedQuery) -> Optional[int]:
+        if not guarded.capped or config.QUERY_PREFLIGHT == "off":
+            return None
+        if config.QUERY_PREFLIGHT == "stats":
+            if not self.table_stats.fresh():
+                await self.flights.ado("table-stats", self._load_table_stats_async)
+            return self._check_budget(self.table_stats.estimate(guarded.tables))
+        counting = count_query(guarded.original)
+        if counting is None:
+            return None
+        try:
+            rows = [row async for row in self.stream_query_async(counting)]
+        except Exception as e:
+            logger.warning(f"Vorab-Zählung fehlgeschlagen, Abfrage läuft ohne Schätzung: {e}")
+            return None
+        return self._check_budget(int(rows[0]["ROW_COUNT"]) if rows else None)
+
+    @staticmethod
+    def _check_budget(estimate: Optional[int]) -> Optional[int]:
+        if estimate is not None and estimate > config.QUERY_COST_BUDGET and config.QUERY_COST_MODE == "refuse":
+            raise QueryCostExceeded(
+                f"Geschätzt {estimate} Zeilen, erlaubt sind {config.QUERY_COST_BUDGET} (QUERY_COST_BUDGET); "
+                "Abfrage mit WHERE/TOP einschränken oder page_size/cursor verwenden"
+            )
+        return estimate
+
+    def _load_table_stats(self) -> None:
+        try:
+            self.table_stats.update(self.stream_query(TABLE_ROWS_QUERY))
+        except Exception as e:
+            # Bis zum Ablauf der TTL ohne Schätzung weiterarbeiten statt bei jeder Abfrage neu zu laden
+            logger.warning(f"Zeilenzahlen aus sys.partitions nicht verfügbar: {e}")
+            self.table_stats.update([])
+
+    async def _load_table_stats_async(self) -> None:
+        try:
+            self.table_stats.update([row async for row in self.stream_query_async(TABLE_ROWS_QUERY)])
+        except Exception as e:
+            logger.warning(f"Zeilenzahlen aus sys.partitions nicht verfügbar: {e}")
+            self.table_stats.update([])
+
+    async def fetch_page_async(
+        self,
+        query: Optional[str] = None,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fmt: str = "records",
+    ) -> Dict[str, Any]:
+        """
+        Seitenweise Abfrage: ohne `cursor` wird `query` gestartet und die erste Seite
+        geliefert, mit `cursor` die nächste Seite des offenen Ergebnisses. Die Antwort
+        enthält `next_cursor`, solange weitere Zeilen vorhanden sind.
+        """
+        check_format(fmt)
+        page_size = max(1, min(page_size or config.QUERY_PAGE_SIZE, config.MAX_RESULT_ROWS))
+        if cursor:
+            page, next_cursor = await self.cursors.fetch(cursor, page_size)
+        elif not query:
+            raise ValueError("Entweder 'query' oder 'cursor' angeben")
         else:
-            logger.warning("Kein Schema-Cache gefunden, Rückfall auf leeres Schema")
-            return self.schema_cache
+            # Gesamtes Ergebnis darf beliebig groß sein, je Seite bleibt der Speicher begrenzt
+            page, next_cursor = await self.cursors.start(self.stream_query_async(query, long_lived=True), page_size)
+        return page.to_envelope(fmt, next_cursor)
+
+    async def create_snapshot_async(self, query: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Führt die Abfrage einmal gegen den Proxy aus und legt das Ergebnis als Snapshot
+        ab; liefert `{handle, columns, row_count, truncated, bytes, expires_in}`.
+        """
+        result = await self.execute_query_result_async(query, use_cache=use_cache)
+        return await asyncio.to_thread(self.snapshots.create, query, result)
+
+    async def query_snapshot_async(self, query: str, fmt: str = "records") -> Dict[str, Any]:
+        """Lesende SQLite-Abfrage über Snapshots (Tabellenname = Handle), ohne den Proxy."""
+        check_format(fmt)
+        result = await asyncio.to_thread(self.snapshots.query, query, config.MAX_RESULT_ROWS)
+        return result.to_envelope(fmt)
+
+    def _is_read_only(self, query: str) -> bool:
+        return is_read_only(query)
+
+    @property
+    def schema_cache(self) -> Dict[str, Any]:
+        return self.schema_index.schema
+
+    def get_database_schema(self) -> Dict[str, Any]:
+        return self.schema_index.schema
+
+    def schema_version(self) -> int:
+        """Zähler, der sich mit jedem neuen Schema-Stand erhöht (für ETags und abgeleitete Caches)."""
+        return self.schema_index.current_version()
+
+    def get_schema_json(self) -> bytes:
+        """Vollständiges Schema als JSON, einmal je Schema-Stand serialisiert."""
+        return self.schema_index.catalog.full
+
+    def get_schema_page(
+        self, kind: str, projection: str = "names", prefix: str = "", cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> bytes:
+        """Eine Seite Tabellen oder Views als JSON `{items, total, next_cursor}` (siehe schema_catalog)."""
+        return self.schema_index.catalog.page(kind, projection, prefix, cursor, limit)
+
+    def get_table_schema(self, table_name: str) -> Optional[Dict[str, Any]]:
+        return self.schema_index.get_table(table_name)
 
-    def refresh_schema_cache(self) -> None:
+    def get_view_schema(self, view_name: str) -> Optional[Dict[str, Any]]:
+        return self.schema_index.get_view(view_name)
+
+    def get_relationships(self) -> List[Dict[str, Any]]:
+        return self.schema_index.get_relationships()
+
+    def describe_table(self, name: str, max_columns: int = 60) -> Optional[str]:
+        """
+        Kurzer Schema-Auszug einer Tabelle oder View aus dem Schema-Cache (Spalten mit
+        Typ, Fremdschlüssel-Nachbarn) für Prompts; None, wenn der Name unbekannt ist.
+        """
+        graph = self.schema_index.join_graph
+        resolved, kind = name, "Tabelle"
+        info = self.get_table_schema(name)
+        if info is None:
+            info, kind = self.get_view_schema(name), "View"
+        if info is None:
+            # Schreibweise wie im Schema (Groß-/Kleinschreibung egal), soweit die Tabelle Beziehungen hat
+            resolved, kind = graph.resolve(name) or name, "Tabelle"
+            info = self.get_table_schema(resolved)
+        if info is None:
+            return None
+        columns = [c for c in info.get("columns", []) if column_name(c)]
+        described = ", ".join(
+            " ".join(filter(None, (column_name(c), column_type(c)))) for c in columns[:max_columns]
+        )
+        if len(columns) > max_columns:
+            described += f", … (+{len(columns) - max_columns} weitere)"
+        lines = [f"{kind} {resolved}: {described}"]
+        neighbours = []
+        for edge in graph.adjacency.get(resolved, []):
+            pairs = ", ".join(f"{a} = {edge.target}.{b}" for a, b in edge.columns)
+            neighbours.append(f"{edge.target} ({pairs})")
+        if neighbours:
+            lines.append("Beziehungen: " + "; ".join(dict.fromkeys(neighbours)))
+        return "\n".join(lines)
+
+    def find_join_paths(self, source_table: str, target_table: str, max_paths: int = 3) -> Dict[str, Any]:
+        """Kürzeste Join-Pfade zwischen zwei Tabellen über die Fremdschlüssel, inkl. JOIN ... ON."""
+        graph = self.schema_index.join_graph
+        source = self._resolve_table(graph, source_table)
+        target = self._resolve_table(graph, target_table)
+        return {"from": source, "to": target, "paths": graph.shortest_paths(source, target, max_paths)}
+
+    def search_schema(
+        self, query: str, limit: int = 20, kind: Optional[str] = None, data_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Unscharfe Suche über Tabellen-, View- und Spaltennamen, beste Treffer zuerst."""
+        return self.schema_index.search_index.search(query, max(1, min(limit, 200)), kind, data_type)
+
+    def _resolve_table(self, graph: JoinGraph, table_name: str) -> str:
+        name = graph.resolve(table_name)
+        if name is not None:
+            return name
+        if self.get_table_schema(table_name) is None and self.get_view_schema(table_name) is None:
+            raise ValueError(f"Tabelle '{table_name}' nicht gefunden")
+        return table_name
+
+    def refresh_schema_cache(self, incremental: bool = False) -> Dict[str, Any]:
+        """
+        Erfasst das Schema neu. Die Metadaten-Abfragen laufen parallel; mit
+        `incremental=True` werden nur seit dem letzten Snapshot geänderte Objekte
+        (laut sys.objects.modify_date) neu abgefragt und geschrieben.
+
+        Es läuft immer nur ein Refresh; weitere Aufrufer (auch aus der anderen
+        Event-Loop oder dem Hintergrund-Thread) warten auf dessen Ergebnis. Schlägt
+        er fehl, wird der Fehler an alle Aufrufer weitergegeben; der bisherige
+        Schema-Cache bleibt dann unverändert.
+        """
+        return self.flights.do("schema-refresh", lambda: self._refresh_schema_cache(incremental))
+
+    def _refresh_schema_cache(self, incremental: bool) -> Dict[str, Any]:
+        with PHASE_LATENCY.time(phase="schema_refresh"):
+            return self._run_refresh(incremental)
+
+    def _run_refresh(self, incremental: bool) -> Dict[str, Any]:
         if not self.session:
             if not self.connect():
                 raise ConnectionError("Keine Verbindung zur API möglich")
+        steps = self._refresh_steps(incremental)
+        try:
+            queries = next(steps)
+            with ThreadPoolExecutor(max_workers=REFRESH_CONCURRENCY) as pool:
+                while True:
+                    results = list(pool.map(lambda q: self.execute_query(q, use_cache=False, bounded=False), queries))
+                    queries = steps.send(results)
+        except StopIteration as done:
+            write = done.value
+        except Exception as e:
+            logger.error(f"Fehler beim Erfassen und Schreiben des Schemas: {e}")
+            raise
         try:
-            # Tabellen abfragen
-            tables_query = """
-                SELECT TABLE_NAME, TABLE_TYPE 
-                FROM INFORMATION_SCHEMA.TABLES
-            """
-            tables = self.execute_query(tables_query)
-            # Spalten abfragen
-            columns_query = """
-                SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE, CHARACTER_MAXIMUM_LENGTH
-                FROM INFORMATION_SCHEMA.COLUMNS
-            """
-            columns = self.execute_query(columns_query)
-            # Views abfragen
-            views_query = """
-                SELECT TABLE_NAME
-                FROM INFORMATION_SCHEMA.VIEWS
-            """
-            views = self.execute_query(views_query)
-            # Beziehungen (Foreign Keys) abfragen
-            relationships_query = """
-                SELECT
-                    fk.name AS FK_Name,
-                    tp.name AS ParentTable,
-                    tr.name AS ReferencedTable,
-                    cp.name AS ParentColumn,
-                    cr.name AS ReferencedColumn
-                FROM sys.foreign_keys fk
-                INNER JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
-                INNER JOIN sys.tables tp ON fkc.parent_object_id = tp.object_id
-                INNER JOIN sys.columns cp ON fkc.parent_object_id = cp.object_id AND fkc.parent_column_id = cp.column_id
-                INNER JOIN sys.tables tr ON fkc.referenced_object_id = tr.object_id
-                INNER JOIN sys.columns cr ON fkc.referenced_object_id = cr.object_id AND fkc.referenced_column_id = cr.column_id
-            """
-            relationships = self.execute_query(relationships_query)
-
-            # Struktur für das Schema
-            tables_dict: dict[str, dict] = {}
-            views_dict: dict[str, dict] = {}
-            schema = {
-                "tables": tables_dict,
-                "views": views_dict,
-                "relationships": relationships
-            }
-            # Tabellen und Spalten zuordnen
-            for table in tables:
-                tname = table["TABLE_NAME"]
-                tables_dict[tname] = {
-                    "type": table["TABLE_TYPE"],
-                    "columns": [col for col in columns if col["TABLE_NAME"] == tname]
-                }
-            # Views zuordnen
-            for view in views:
-                vname = view["TABLE_NAME"]
-                views_dict[vname] = {
-                    "columns": [col for col in columns if col["TABLE_NAME"] == vname]
-                }
-            # Schreibe JSON-Dateien
-            cache_dir = self.schema_cache_dir
-            (cache_dir / "tables").mkdir(exist_ok=True)
-            (cache_dir / "views").mkdir(exist_ok=True)
-            # Gesamtschema
-            with open(cache_dir / "schema.json", "w") as f:
-                json.dump(schema, f, indent=2)
-            # Einzelne Tabellen
-            for tname, tdata in tables_dict.items():
-                with open(cache_dir / "tables" / f"{tname}.json", "w") as f:
-                    json.dump(tdata, f, indent=2)
-            # Einzelne Views
-            for vname, vdata in views_dict.items():
-                with open(cache_dir / "views" / f"{vname}.json", "w") as f:
-                    json.dump(vdata, f, indent=2)
-            # Beziehungen
-            with open(cache_dir / "relationships.json", "w") as f:
-                json.dump(relationships, f, indent=2)
-            self.schema_cache = schema
-            logger.info("Schema und Cache-Dateien wurden direkt aus der Datenbank aktualisiert")
+            return write()
         except Exception as e:
             logger.error(f"Fehler beim Erfassen und Schreiben des Schemas: {e}")
+            raise
+
+    async def refresh_schema_cache_async(self, incremental: bool = False) -> Dict[str, Any]:
+        """Wie refresh_schema_cache, fragt aber über den AsyncClient ab und schreibt in einem Worker-Thread."""
+        return await self.flights.ado("schema-refresh", lambda: self._refresh_schema_cache_async(incremental))
+
+    async def _refresh_schema_cache_async(self, incremental: bool) -> Dict[str, Any]:
+        with PHASE_LATENCY.time(phase="schema_refresh"):
+            return await self._run_refresh_async(incremental)
+
+    async def _run_refresh_async(self, incremental: bool) -> Dict[str, Any]:
+        steps = self._refresh_steps(incremental)
+        try:
+            queries = next(steps)
+            while True:
+                results = await asyncio.gather(
+                    *(self.execute_query_async(q, use_cache=False, bounded=False) for q in queries)
+                )
+                queries = steps.send(list(results))
+        except StopIteration as done:
+            write = done.value
+        except Exception as e:
+            logger.error(f"Fehler beim Erfassen und Schreiben des Schemas: {e}")
+            raise
+        try:
+            return await asyncio.to_thread(write)
+        except Exception as e:
+            logger.error(f"Fehler beim Erfassen und Schreiben des Schemas: {e}")
+            raise
+
+    def _refresh_steps(self, incremental: bool) -> Generator[List[str], List[list], Callable[[], Dict[str, Any]]]:
+        """
+        Ablauf eines Refreshs, unabhängig vom Transport: liefert pro Schritt eine Liste
+        von Abfragen, die parallel ausgeführt werden, und bekommt deren Ergebnisse
+        zurück. Am Ende steht eine Funktion, die den Cache schreibt.
+        """
+        snapshot = self.schema_store.load_snapshot() if incremental else None
+        current = self.get_database_schema()
+        if snapshot is None or not (current.get("tables") or current.get("views")):
+            tables, columns, views, relationships, objects = yield [
+                TABLES_QUERY, COLUMNS_QUERY, VIEWS_QUERY, RELATIONSHIPS_QUERY, OBJECTS_QUERY
+            ]
+            schema = assemble_schema(tables, columns, views, relationships)
+            return lambda: self._store_schema(schema, objects)
+
+        (objects,) = yield [OBJECTS_QUERY]
+        watermark = snapshot.get("watermark") or ""
+        known = set(snapshot.get("objects", []))
+        present = {row["OBJECT_NAME"] for row in objects}
+        changed = sorted(
+            row["OBJECT_NAME"] for row in objects
+            if row["OBJECT_NAME"] not in known or (row["MODIFY_DATE"] or "") > watermark
+        )
+        dropped = sorted(known - present)
+        if not changed and not dropped:
+            return lambda: {"mode": "incremental", "changed": 0, "dropped": 0}
 
-    def get_table_sample(self, table_name: str, limit: int = 10) -> List[Dict[str, Any]]:
-        if table_name not in self.schema_cache["tables"]:
+        chunks = [changed[i:i + IN_LIST_CHUNK] for i in range(0, len(changed), IN_LIST_CHUNK)]
+        queries = [RELATIONSHIPS_QUERY]
+        for chunk in chunks:
+            names = ", ".join("'" + name.replace("'", "''") + "'" for name in chunk)
+            queries += [
+                f"{TABLES_QUERY} WHERE TABLE_NAME IN ({names})",
+                f"{COLUMNS_QUERY} WHERE TABLE_NAME IN ({names})",
+                f"{VIEWS_QUERY} WHERE TABLE_NAME IN ({names})",
+            ]
+        results = yield queries
+        relationships = results[0]
+        tables, columns, views = [], [], []
+        for i in range(1, len(results), 3):
+            tables += results[i]
+            columns += results[i + 1]
+            views += results[i + 2]
+        delta = assemble_schema(tables, columns, views, relationships)
+
+        schema = {
+            "tables": dict(current.get("tables", {})),
+            "views": dict(current.get("views", {})),
+            "relationships": relationships,
+        }
+        for name in set(dropped) | set(changed):
+            schema["tables"].pop(name, None)
+            schema["views"].pop(name, None)
+        schema["tables"].update(delta["tables"])
+        schema["views"].update(delta["views"])
+        return lambda: self._store_schema(schema, objects, mode="incremental")
+
+    def _store_schema(self, schema: Dict[str, Any], objects: List[Dict[str, Any]], mode: str = "full") -> Dict[str, Any]:
+        """
+        Schreibt das Schema atomar in den SQLite-Store; unveränderte Objekte werden
+        anhand ihres Inhalts-Hashes übersprungen. Optional wird zusätzlich das
+        bisherige JSON-Layout exportiert.
+        """
+        # Snapshot für den nächsten inkrementellen Refresh
+        snapshot = {
+            "watermark": max((row["MODIFY_DATE"] or "" for row in objects), default=""),
+            "objects": sorted(row["OBJECT_NAME"] for row in objects),
+        }
+        result = self.schema_store.write(schema, snapshot)
+        if config.SCHEMA_CACHE_JSON_EXPORT:
+            export_json_layout(self.schema_cache_dir, schema, result["changed"], result["removed"])
+        self.schema_index.update(schema)
+        # Katalog, Join-Graph und Suchindex entstehen im Hintergrund, der Refresh wartet nicht darauf
+        threading.Thread(target=self.schema_index.prepare, name="schema-prepare", daemon=True).start()
+        # Gecachte Ergebnisse können sich auf das alte Schema beziehen
+        if result["changed"] or result["removed"] or result["relationships_changed"]:
+            self.query_cache.clear()
+        logger.info("Schema und Cache-Dateien wurden direkt aus der Datenbank aktualisiert")
+        return {
+            "mode": mode,
+            "changed": len({name for _, name in result["changed"]}),
+            "dropped": len({name for _, name in result["removed"]}),
+        }
+
+    def get_table_sample(self, table_name: str, limit: int = 10, use_cache: bool = True) -> List[Dict[str, Any]]:
+        return self.execute_query(self._table_sample_query(table_name, limit), use_cache=use_cache)
+
+    async def get_table_sample_async(
+        self, table_name: str, limit: int = 10, use_cache: bool = True, fmt: str = "records"
+    ) -> Any:
+        check_format(fmt)
+        result = await self.get_table_sample_result_async(table_name, limit, use_cache=use_cache)
+        return result.to_payload(fmt)
+
+    async def get_table_sample_result_async(
+        self, table_name: str, limit: int = 10, use_cache: bool = True
+    ) -> ColumnarResult:
+        return await self.execute_query_result_async(self._table_sample_query(table_name, limit), use_cache=use_cache)
+
+    def _table_sample_query(self, table_name: str, limit: int) -> str:
+        if self.get_table_schema(table_name) is None:
             raise ValueError(f"Tabelle '{table_name}' nicht gefunden")
-        query = f"SELECT TOP {limit} * FROM [{table_name}]"
-        return self.execute_query(query)
+        return f"SELECT TOP {limit} * FROM [{table_name}]"
+
+
+_manager: Optional[DatabaseManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_database_manager() -> DatabaseManager:
+    """Gibt den prozessweit geteilten DatabaseManager für MCP-Server und REST-API zurück."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DatabaseManager()
+            register_manager_metrics(_manager)
+        return _manager
@@ -1,149 +1,369 @@
-from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Request, WebSocket
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from .server import mcp
-from .database import DatabaseManager
-from .prompts import get_prompt_template, load_prompts
-from .tools import list_all_tools
+from .database import get_database_manager
+from .config import config
+from .streaming import ResultLimitExceeded
+from .result_format import check_format, encode_msgpack
+from .schema_catalog import DEFAULT_PAGE_SIZE
+from .proxy_client import ProxyUnavailable
+from .metrics import REGISTRY
+from .prompts import registry as prompt_registry
+from .http_cache import ResponseCache, dumps, respond
+from .tools import tool_entry
+from .ws_session import WebSocketSession
+from .sse_stream import QueryStream, StreamLimitExceeded, StreamRegistry, parse_event_id
+from contextlib import asynccontextmanager
+import hashlib
 import logging
-import asyncio
-import json
+from typing import Optional
 
 logger = logging.getLogger("mcp-proalpha-http")
-app = FastAPI(title="ProAlpha MCP REST API")
-db = DatabaseManager()
+db = get_database_manager()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Bei gemeinsamem Start mit dem MCP-Server läuft der Refresh bereits (einmal pro Prozess)
+    if config.SCHEMA_REFRESH_ON_START:
+        db.start_background_refresh()
+    yield
+    _sse_streams.cancel_all()
+
+app = FastAPI(title="ProAlpha MCP REST API", lifespan=lifespan)
+
+# Schema-, Tool- und Prompt-Antworten: einmal je Version serialisiert, mit ETag und ggf. komprimiert.
+# Einzelne Tabellen, Seiten und Suchanfragen liegen getrennt, damit viele verschiedene
+# Anfragen nicht das große Gesamtschema verdrängen.
+_compress_min = config.HTTP_COMPRESS_MIN_BYTES if config.HTTP_PRECOMPRESS else None
+_responses = ResponseCache(_compress_min)
+_lookups = ResponseCache(_compress_min)
+# Laufende SSE-Abfragen (/sse), fortsetzbar per Last-Event-ID
+_sse_streams = StreamRegistry(config.SSE_MAX_STREAMS, config.SSE_RETENTION)
+
+async def _tools_version():
+    """Tools des MCP-Servers und ein Hash über Namen und Beschreibungen als Version."""
+    tools = await mcp.get_tools()
+    digest = hashlib.blake2b(digest_size=16)
+    for name, tool in sorted(tools.items()):
+        digest.update(dumps([name, tool.description or ""]))
+    return tools, digest.hexdigest()
+
 @app.get("/api/tools")
-def get_tools():
+async def get_tools(request: Request):
     """
     Gibt eine Liste aller verfügbaren Tools mit Name, Beschreibung und Parametern zurück (analog zu list_tools im MCP-Server).
     """
-    return list_all_tools(mcp)
+    tools, version = await _tools_version()
+    return respond(request, _responses.get("tools", version, lambda: dumps([tool_entry(t) for t in tools.values()])))
 
 @app.get("/api/tools/{tool_name}")
-def get_tool(tool_name: str):
+async def get_tool(tool_name: str, request: Request):
     """
     Gibt die Details eines bestimmten Tools zurück, einschließlich Name, Beschreibung und Parametern.
     """
-    tools = list_all_tools(mcp)
-    for tool in tools:
-        if tool["name"] == tool_name:
-            return tool
-    raise HTTPException(status_code=404, detail="Tool not found")
+    tools, version = await _tools_version()
+    if tool_name not in tools:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    return respond(request, _lookups.get(("tool", tool_name), version, lambda: dumps(tool_entry(tools[tool_name]))))
 
 @app.get("/api/schema")
-def get_schema():
-    return db.get_database_schema()
+def get_schema(request: Request):
+    return respond(request, _responses.get("schema", db.schema_version(), db.get_schema_json))
+
+def _schema_page(request: Request, kind: str, projection: Optional[str], prefix: Optional[str],
+                 cursor: Optional[str], limit: Optional[int]):
+    key = (kind, projection or "names", prefix or "", cursor, limit or DEFAULT_PAGE_SIZE)
+    try:
+        cached = _lookups.get(key, db.schema_version(), lambda: db.get_schema_page(*key))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respond(request, cached)
 
 @app.get("/api/schema/tables")
-def get_tables():
-    schema = db.get_database_schema()
-    return list(schema.get("tables", {}).keys())
+def get_tables(
+    request: Request, projection: Optional[str] = None, prefix: Optional[str] = None,
+    cursor: Optional[str] = None, limit: Optional[int] = None,
+):
+    """
+    Ohne Parameter alle Tabellennamen als Liste; mit projection/prefix/cursor/limit
+    eine Seite {items, total, next_cursor} wie die MCP-Ressource schema://tables.
+    """
+    if projection or prefix or cursor or limit:
+        return _schema_page(request, "tables", projection, prefix, cursor, limit)
+    return respond(request, _responses.get(
+        "tables", db.schema_version(), lambda: dumps(list(db.get_database_schema().get("tables", {})))
+    ))
 
 @app.get("/api/schema/tables/{table_name}")
-def get_table_schema(table_name: str):
-    schema = db.get_database_schema()
-    table = schema.get("tables", {}).get(table_name)
+def get_table_schema(table_name: str, request: Request):
+    version = db.schema_version()
+    table = db.get_table_schema(table_name)
     if not table:
         raise HTTPException(status_code=404, detail="Table not found")
-    return table
+    return respond(request, _lookups.get(("table", table_name), version, lambda: dumps(table)))
 
 @app.get("/api/schema/views")
-def get_views():
-    schema = db.get_database_schema()
-    return list(schema.get("views", {}).keys())
+def get_views(
+    request: Request, projection: Optional[str] = None, prefix: Optional[str] = None,
+    cursor: Optional[str] = None, limit: Optional[int] = None,
+):
+    """Ohne Parameter alle View-Namen als Liste, sonst eine Seite wie bei /api/schema/tables."""
+    if projection or prefix or cursor or limit:
+        return _schema_page(request, "views", projection, prefix, cursor, limit)
+    return respond(request, _responses.get(
+        "views", db.schema_version(), lambda: dumps(list(db.get_database_schema().get("views", {})))
+    ))
 
 @app.get("/api/schema/views/{view_name}")
-def get_view_schema(view_name: str):
-    schema = db.get_database_schema()
-    view = schema.get("views", {}).get(view_name)
+def get_view_schema(view_name: str, request: Request):
+    version = db.schema_version()
+    view = db.get_view_schema(view_name)
     if not view:
         raise HTTPException(status_code=404, detail="View not found")
-    return view
+    return respond(request, _lookups.get(("view", view_name), version, lambda: dumps(view)))
 
 @app.get("/api/schema/relationships")
-def get_relationships():
-    schema = db.get_database_schema()
-    return schema.get("relationships", [])
+def get_relationships(request: Request):
+    return respond(request, _responses.get(
+        "relationships", db.schema_version(), lambda: dumps(db.get_relationships())
+    ))
+
+@app.get("/api/schema/search")
+def search_schema(
+    request: Request, q: str, limit: int = 20, kind: Optional[str] = None, data_type: Optional[str] = None
+):
+    """Unscharfe Suche über Tabellen-, View- und Spaltennamen (wie das MCP-Tool search_schema)."""
+    key = ("search", q, limit, kind, data_type)
+    try:
+        cached = _lookups.get(key, db.schema_version(), lambda: dumps(db.search_schema(q, limit, kind, data_type)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respond(request, cached)
+
+@app.get("/api/schema/join-path")
+def get_join_path(request: Request, from_table: str, to_table: str, max_paths: int = 3):
+    """Kürzeste Join-Pfade zwischen zwei Tabellen (wie das MCP-Tool find_join_path)."""
+    key = ("join-path", from_table, to_table, max_paths)
+    try:
+        cached = _lookups.get(
+            key, db.schema_version(), lambda: dumps(db.find_join_paths(from_table, to_table, max_paths))
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return respond(request, cached)
 
 @app.post("/api/query")
 async def post_query(request: Request):
     data = await request.json()
-    if not data or "query" not in data:
+    if not data or ("query" not in data and "cursor" not in data):
         raise HTTPException(status_code=400, detail="Missing 'query' in request body")
+    fmt = data.get("format", "records")
+    headers = None
     try:
-        results = db.execute_query(data["query"])
-        return results
+        check_format(fmt)
+        if data.get("page_size") or data.get("cursor"):
+            body = await db.fetch_page_async(
+                data.get("query"), page_size=data.get("page_size"), cursor=data.get("cursor"), fmt=fmt
+            )
+        else:
+            result = await db.execute_query_result_async(data["query"], use_cache=data.get("use_cache", True))
+            # Ohne Format bleibt die Antwort wie bisher eine Liste von Zeilen; abgeschnitten meldet der Header
+            body = result.to_records() if fmt == "records" else result.to_envelope(fmt)
+            headers = {"X-Result-Truncated": "true"} if result.truncated else None
+        if data.get("encoding") == "msgpack":
+            return Response(encode_msgpack(body), media_type="application/msgpack", headers=headers)
+        return JSONResponse(body, headers=headers)
+    except ResultLimitExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ProxyUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Fehler bei SQL-Abfrage: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/api/query/batch")
+async def post_query_batch(request: Request):
+    """
+    Mehrere Read-Only-Abfragen in einer Anfrage (wie das MCP-Tool execute_sql_batch):
+    `{"queries": ["SELECT ...", ...], "format": "records", "use_cache": true, "concurrency": 4}`.
+    Fehler einzelner Abfragen stehen im jeweiligen Ergebnis, die Antwort ist trotzdem 200.
+    """
+    data = await request.json()
+    if not data or not isinstance(data.get("queries"), list):
+        raise HTTPException(status_code=400, detail="Missing 'queries' list in request body")
+    try:
+        return await db.execute_batch_async(
+            data["queries"],
+            use_cache=data.get("use_cache", True),
+            fmt=data.get("format", "records"),
+            concurrency=data.get("concurrency"),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/snapshots")
+def list_snapshots():
+    """Gibt alle noch gültigen Snapshots mit Handle, Spalten, Zeilenzahl und Restlaufzeit zurück."""
+    return db.snapshots.entries()
+
+@app.post("/api/snapshots")
+async def post_snapshot(request: Request):
+    """
+    Legt das Ergebnis einer Read-Only-Abfrage als Snapshot ab (wie das MCP-Tool create_snapshot):
+    `{"query": "SELECT ...", "use_cache": true}`.
+    """
+    data = await request.json()
+    if not data or "query" not in data:
+        raise HTTPException(status_code=400, detail="Missing 'query' in request body")
+    try:
+        return await db.create_snapshot_async(data["query"], use_cache=data.get("use_cache", True))
+    except ResultLimitExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ProxyUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Fehler beim Anlegen des Snapshots: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/snapshots/query")
+async def post_snapshot_query(request: Request):
+    """
+    Lesende SQLite-Abfrage über Snapshots (wie das MCP-Tool query_snapshot):
+    `{"query": "SELECT ... FROM snap_...", "format": "records"}`.
+    """
+    data = await request.json()
+    if not data or "query" not in data:
+        raise HTTPException(status_code=400, detail="Missing 'query' in request body")
+    try:
+        return await db.query_snapshot_async(data["query"], fmt=data.get("format", "records"))
+    except TimeoutError as e:
+        raise HTTPException(status_code=408, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/api/snapshots/{handle}")
+def delete_snapshot(handle: str):
+    """Verwirft einen Snapshot vor Ablauf seiner TTL."""
+    try:
+        db.snapshots.drop(handle)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"dropped": handle}
+
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """
+    Gibt Trefferquote und Füllstand des Abfrage-Ergebnis-Caches zurück sowie die Zahl
+    der Aufrufe, die sich einer bereits laufenden identischen Abfrage angeschlossen haben.
+    """
+    return {**db.query_cache.stats(), "coalesced": db.flights.shared}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Laufzeit-Metriken im Prometheus-Textformat (Tool- und Phasenlatenzen, Ergebnisgrößen,
+    Cache-Trefferquote, laufende Anfragen).
+    """
+    if not config.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/schema/refresh")
-def refresh_schema():
-    db.refresh_schema_cache()
-    return {"status": "Schema cache refreshed"}
+async def refresh_schema(incremental: bool = False):
+    try:
+        summary = await db.refresh_schema_cache_async(incremental=incremental)
+    except ProxyUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Schema refresh failed: {e}")
+    return {"status": "Schema cache refreshed", **summary}
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
+    await WebSocketSession(websocket, db, config.WS_MAX_IN_FLIGHT, config.WS_CHUNK_ROWS).run()
+
+def _sse_response(stream: QueryStream, after: int) -> StreamingResponse:
+    async def events():
+        # Wartezeit vor dem automatischen Wiederverbinden (EventSource)
+        yield "retry: 2000\n\n"
+        async for text in stream.listen(after, config.SSE_HEARTBEAT):
+            yield text
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Stream-Id": stream.stream_id}
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+def _sse_start(query: str, fmt: str, chunk_rows: Optional[int]) -> StreamingResponse:
     try:
-        while True:
-            data = await websocket.receive_text()
-            try:
-                msg = json.loads(data)
-                # Beispiel: MCP-Tool-Request
-                if msg.get("id") == "execute_sql":
-                    query = msg["parameters"]["query"]
-                    result = db.execute_query(query)
-                    await websocket.send_text(json.dumps({"result": result}))
-                elif msg.get("id") == "get_table_sample":
-                    table = msg["parameters"]["table_name"]
-                    limit = msg["parameters"].get("limit", 10)
-                    result = db.get_table_sample(table, limit)
-                    await websocket.send_text(json.dumps({"result": result}))
-                else:
-                    await websocket.send_text(json.dumps({"error": "Unknown tool id"}))
-            except Exception as e:
-                await websocket.send_text(json.dumps({"error": str(e)}))
-    except WebSocketDisconnect:
-        pass
+        stream = _sse_streams.start(
+            db, query, fmt, chunk_rows or config.SSE_CHUNK_ROWS, config.SSE_BUFFER_EVENTS,
+            config.SSE_PROGRESS_INTERVAL,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StreamLimitExceeded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return _sse_response(stream, 0)
 
 @app.get("/sse")
-async def sse_endpoint():
-    async def event_generator():
-        # Beispiel: Sende ein MCP-Tool-Request-Resultat als Stream
-        yield f"data: {json.dumps({'result': 'SSE-Stream aktiv'})}\n\n"
-        await asyncio.sleep(1)
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+async def sse_endpoint(
+    request: Request, query: Optional[str] = None, stream_id: Optional[str] = None, format: str = "records",
+    chunk_rows: Optional[int] = None, last_event_id: Optional[str] = None,
+):
+    """
+    Startet eine Abfrage als Event-Stream (`?query=...`, für EventSource) oder setzt einen
+    laufenden fort (`?stream_id=...` bzw. Header `Last-Event-ID`). Ist die Abfrage beendet
+    und alles ausgeliefert, antwortet der Endpunkt mit 204, damit EventSource nicht erneut
+    verbindet.
+    """
+    resume = parse_event_id(request.headers.get("last-event-id") or last_event_id)
+    if resume is not None or stream_id:
+        wanted = stream_id or resume[0]
+        after = resume[1] if resume is not None and resume[0] == wanted else 0
+        stream = _sse_streams.get(wanted)
+        if stream is None:
+            if stream_id:
+                raise HTTPException(status_code=404, detail="Stream not found")
+            # Abgelaufen: nicht stillschweigend erneut abfragen
+            return Response(status_code=204)
+        if stream.exhausted(after):
+            return Response(status_code=204)
+        return _sse_response(stream, after)
+    if not query:
+        raise HTTPException(status_code=400, detail="Missing 'query' or 'stream_id'")
+    return _sse_start(query, format, chunk_rows)
 
 @app.post("/sse")
-async def sse_endpoint_post():
-    async def event_generator():
-        yield f"data: {json.dumps({'result': 'SSE-Stream aktiv'})}\n\n"
-        await asyncio.sleep(1)
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+async def sse_endpoint_post(request: Request):
+    """Wie GET /sse mit `{"query": "...", "format": "records", "chunk_rows": 500}` im Body."""
+    data = await request.json()
+    if not data or "query" not in data:
+        raise HTTPException(status_code=400, detail="Missing 'query' in request body")
+    return _sse_start(data["query"], data.get("format", "records"), data.get("chunk_rows"))
 
 @app.get("/api/prompts")
-def get_prompts():
+def get_prompts(request: Request):
     """
     Gibt eine Liste aller verfügbaren Prompts mit Name, Titel und Beschreibung zurück.
     """
-    prompts = load_prompts()
-    return [
-        {
-            "name": name,
-            "title": prompt.get("title", ""),
-            "description": prompt.get("description", "")
-        }
-        for name, prompt in prompts.items()
-    ]
+    def build():
+        return dumps([
+            {
+                "name": name,
+                "title": prompt.get("title", ""),
+                "description": prompt.get("description", "")
+            }
+            for name, prompt in prompt_registry.raw().items()
+        ])
+    return respond(request, _responses.get("prompts", prompt_registry.current_version(), build))
 
 @app.get("/api/prompts/{prompt_name}")
-def get_prompt(prompt_name: str):
+def get_prompt(prompt_name: str, request: Request):
     """
     Gibt das Template eines bestimmten Prompts zurück.
     """
+    def build():
+        return dumps({"name": prompt_name, "template": prompt_registry.get(prompt_name).template})
     try:
-        template = get_prompt_template(prompt_name)
-        return {"name": prompt_name, "template": template}
+        return respond(request, _lookups.get(("prompt", prompt_name), prompt_registry.current_version(), build))
     except KeyError:
         raise HTTPException(status_code=404, detail="Prompt not found")
-
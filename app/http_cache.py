@@ -0,0 +1,122 @@
+"""
+Vorberechnete HTTP-Antworten für selten veränderte Daten (Schema, Tools, Prompts).
+
+Ein Eintrag hält den fertigen JSON-Body, einen starken ETag (Hash des Bodys) und
+bei Bedarf gzip-/Brotli-komprimierte Fassungen; diese tragen als eigene
+Repräsentation den ETag mit Suffix (`"<hash>-gzip"`, `"<hash>-br"`). Er wird nur neu gebaut, wenn sich
+die Version der Quelle ändert (Schema-Stand, Dateisignatur); Anfragen mit
+passendem If-None-Match erhalten 304 ohne Body.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli  # optional: kleinere Antworten für Clients mit Accept-Encoding: br
+except ImportError:  # pragma: no cover - abhängig von der Installation
+    brotli = None
+
+_MAX_ENTRIES = 1024
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    gzip: Optional[bytes]
+    br: Optional[bytes]
+
+
+def dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def prepare(body: bytes, compress_min_bytes: Optional[int] = 1024) -> CachedBody:
+    """ETag und komprimierte Fassungen; unter `compress_min_bytes` (oder None) wird nicht komprimiert."""
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    if compress_min_bytes is None or len(body) < compress_min_bytes:
+        return CachedBody(body, etag, None, None)
+    # mtime=0: gleicher Body ergibt gleiche Bytes, unabhängig vom Zeitpunkt
+    compressed = gzip.compress(body, compresslevel=6, mtime=0)
+    br = brotli.compress(body, quality=5) if brotli is not None else None
+    return CachedBody(body, etag, compressed, br)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # Für If-None-Match gilt der schwache Vergleich (RFC 9110, 13.1.2)
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def coded_etag(etag: str, coding: Optional[str]) -> str:
+    """ETag der mit `coding` komprimierten Fassung; starke ETags gelten je Byte-Folge."""
+    return etag if coding is None else f'{etag[:-1]}-{coding}"'
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() != coding:
+            continue
+        q = params.strip().removeprefix("q=").strip()
+        try:
+            return not q or float(q) > 0
+        except ValueError:
+            return False
+    return False
+
+
+def respond(
+    request: Request, cached: CachedBody, media_type: str = "application/json",
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Antwort mit ETag der gewählten Fassung; 304 bei passendem If-None-Match, sonst ggf. vorkomprimiert."""
+    accept = request.headers.get("accept-encoding", "")
+    if cached.br is not None and _accepts(accept, "br"):
+        coding, body = "br", cached.br
+    elif cached.gzip is not None and _accepts(accept, "gzip"):
+        coding, body = "gzip", cached.gzip
+    else:
+        coding, body = None, cached.body
+    etag = coded_etag(cached.etag, coding)
+    out = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding", **(headers or {})}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=out)
+    if coding is not None:
+        out["Content-Encoding"] = coding
+    return Response(body, media_type=media_type, headers=out)
+
+
+class ResponseCache:
+    """Fertige Antworten je Schlüssel, gültig solange die übergebene Version gleich bleibt."""
+
+    def __init__(self, compress_min_bytes: Optional[int] = 1024, max_entries: int = _MAX_ENTRIES):
+        self.compress_min_bytes = compress_min_bytes
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[Hashable, CachedBody]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], bytes]) -> CachedBody:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        # Aufbau außerhalb der Sperre; parallele Anfragen bauen im schlimmsten Fall doppelt
+        cached = prepare(build(), self.compress_min_bytes)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (version, cached)
+        return cached
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,120 @@
+"""
+Fremdschlüssel-Graph für Join-Vorschläge.
+
+Aus der flachen `relationships`-Liste (eine Zeile je Spaltenpaar) entsteht einmal
+je Schema-Stand eine Adjazenzliste; kürzeste Join-Pfade zwischen zwei Tabellen
+werden per Breitensuche ermittelt und je Tabellenpaar zwischengespeichert.
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+MAX_HOPS = 6
+MAX_PATHS = 10
+_PATH_CACHE_SIZE = 4096
+
+
+class Edge(NamedTuple):
+    source: str
+    target: str
+    constraint: str
+    # (Spalte in source, Spalte in target) je Spaltenpaar des Fremdschlüssels
+    columns: Tuple[Tuple[str, str], ...]
+
+
+def _quote(name: str) -> str:
+    return "[" + name.replace("]", "]]") + "]"
+
+
+class JoinGraph:
+    """Ungerichteter Graph über Tabellen; jede Kante ist ein Fremdschlüssel (beide Richtungen)."""
+
+    def __init__(self, relationships: Iterable[Dict[str, Any]]):
+        grouped: Dict[Tuple[str, str, str], List[Tuple[str, str]]] = {}
+        for rel in relationships:
+            key = (rel["FK_Name"], rel["ParentTable"], rel["ReferencedTable"])
+            grouped.setdefault(key, []).append((rel["ParentColumn"], rel["ReferencedColumn"]))
+        self.names: Dict[str, str] = {}
+        self.adjacency: Dict[str, List[Edge]] = {}
+        for (constraint, parent, referenced), pairs in grouped.items():
+            self.names.setdefault(parent.lower(), parent)
+            self.names.setdefault(referenced.lower(), referenced)
+            if parent == referenced:
+                continue  # Selbstbezug verbindet keine zwei Tabellen
+            pairs_t = tuple(pairs)
+            self.adjacency.setdefault(parent, []).append(Edge(parent, referenced, constraint, pairs_t))
+            self.adjacency.setdefault(referenced, []).append(
+                Edge(referenced, parent, constraint, tuple((b, a) for a, b in pairs_t))
+            )
+        self._paths: Dict[Tuple[str, str, int, int], List[Dict[str, Any]]] = {}
+
+    def resolve(self, table: str) -> Optional[str]:
+        """Tabellenname in der Schreibweise des Schemas (Groß-/Kleinschreibung egal)."""
+        return self.names.get(table.lower())
+
+    def shortest_paths(
+        self, source: str, target: str, max_paths: int = 3, max_hops: int = MAX_HOPS
+    ) -> List[Dict[str, Any]]:
+        """Alle (höchstens `max_paths`) kürzesten Join-Pfade von `source` nach `target`."""
+        max_paths = max(1, min(max_paths, MAX_PATHS))
+        key = (source, target, max_paths, max_hops)
+        paths = self._paths.get(key)
+        if paths is None:
+            paths = [self._describe(edges) for edges in self._search(source, target, max_paths, max_hops)]
+            if len(self._paths) >= _PATH_CACHE_SIZE:
+                self._paths.clear()
+            self._paths[key] = paths
+        return paths
+
+    def _search(self, source: str, target: str, max_paths: int, max_hops: int) -> List[List[Edge]]:
+        if source == target or source not in self.adjacency or target not in self.adjacency:
+            return []
+        # Breitensuche; je Tabelle alle Kanten, über die sie auf kürzestem Weg erreicht wird
+        depth = {source: 0}
+        via: Dict[str, List[Edge]] = {}
+        frontier = deque([source])
+        while frontier:
+            table = frontier.popleft()
+            if depth[table] >= max_hops or (target in depth and depth[table] >= depth[target]):
+                continue
+            for edge in self.adjacency[table]:
+                seen = depth.get(edge.target)
+                if seen is None:
+                    depth[edge.target] = depth[table] + 1
+                    via[edge.target] = [edge]
+                    frontier.append(edge.target)
+                elif seen == depth[table] + 1:
+                    via[edge.target].append(edge)
+        if target not in depth:
+            return []
+        # Pfade rückwärts vom Ziel aufzählen
+        paths: List[List[Edge]] = []
+        stack: List[Tuple[str, List[Edge]]] = [(target, [])]
+        while stack and len(paths) < max_paths:
+            table, tail = stack.pop()
+            if table == source:
+                paths.append(tail)
+                continue
+            for edge in reversed(via[table]):
+                stack.append((edge.source, [edge] + tail))
+        return paths
+
+    @staticmethod
+    def _describe(edges: List[Edge]) -> Dict[str, Any]:
+        lines = [f"FROM {_quote(edges[0].source)}"]
+        joins = []
+        for edge in edges:
+            on = " AND ".join(
+                f"{_quote(edge.target)}.{_quote(b)} = {_quote(edge.source)}.{_quote(a)}" for a, b in edge.columns
+            )
+            lines.append(f"JOIN {_quote(edge.target)} ON {on}")
+            joins.append({
+                "from_table": edge.source,
+                "to_table": edge.target,
+                "constraint": edge.constraint,
+                "columns": [{"from": a, "to": b} for a, b in edge.columns],
+            })
+        return {
+            "tables": [edges[0].source] + [e.target for e in edges],
+            "joins": joins,
+            "sql": "\n".join(lines),
+        }
@@ -0,0 +1,266 @@
+"""
+Schlanke Laufzeit-Metriken im Prometheus-Textformat (ohne Zusatzpaket).
+
+Histogramme und Zähler werden an den heißen Stellen (Tools, Proxy-Roundtrip,
+Parsen, Schema-Laden, Serialisierung) direkt fortgeschrieben; Füllstände wie
+Cache-Treffer oder offene Cursor werden erst beim Abruf von /metrics über
+Callbacks gelesen. Mit METRICS_ENABLED=false kehren alle Aufrufe sofort zurück.
+"""
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from .config import config
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 50000, 100000)
+BYTE_BUCKETS = (1024, 16384, 131072, 1048576, 8388608, 67108864)
+
+
+def _label_text(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not config.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_label_text(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """Erhöht den Wert für die Dauer des Blocks (z.B. laufende Aufrufe)."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # je Labelkombination: Zähler pro Bucket (+Inf als letzter), Summe
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        if not config.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        if not config.METRICS_ENABLED:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Wert wird erst beim Abruf gelesen; `fn` liefert eine Zahl oder {Labelwert: Zahl}."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Any], kind: str = "gauge", labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        value = self.fn()
+        lines = self.header()
+        if isinstance(value, dict):
+            for label, v in sorted(value.items()):
+                key = label if isinstance(label, tuple) else (label,)
+                lines.append(f"{self.name}{_label_text(self.labelnames, key)} {_number(v)}")
+        else:
+            lines.append(f"{self.name} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        # Erneute Registrierung (z.B. neue DatabaseManager-Instanz) ersetzt Callbacks
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TOOL_LATENCY = REGISTRY.register(Histogram(
+    "proalpha_tool_duration_seconds", "Dauer der MCP-Tool-Aufrufe", ["tool"]))
+TOOL_ERRORS = REGISTRY.register(Counter(
+    "proalpha_tool_errors_total", "Fehlgeschlagene MCP-Tool-Aufrufe", ["tool"]))
+TOOLS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "proalpha_tool_calls_in_flight", "Laufende MCP-Tool-Aufrufe", ["tool"]))
+PHASE_LATENCY = REGISTRY.register(Histogram(
+    "proalpha_phase_duration_seconds",
+    "Dauer einzelner Phasen: proxy_wait (bis zur Antwort), fetch (gesamte Abfrage), parse, "
+    "schema_load, schema_refresh, serialize",
+    ["phase"]))
+PROXY_IN_FLIGHT = REGISTRY.register(Gauge(
+    "proalpha_proxy_requests_in_flight", "Offene Anfragen an den SQL-Proxy"))
+PROXY_ERRORS = REGISTRY.register(Counter(
+    "proalpha_proxy_errors_total", "Fehlgeschlagene Abfragen am SQL-Proxy", ["reason"]))
+RESULT_ROWS = REGISTRY.register(Histogram(
+    "proalpha_query_result_rows", "Zeilen je Proxy-Abfrage", buckets=ROW_BUCKETS))
+RESULT_BYTES = REGISTRY.register(Histogram(
+    "proalpha_query_result_bytes", "Antwortgröße je Proxy-Abfrage in Bytes", buckets=BYTE_BUCKETS))
+
+
+def instrument_tool(fn: Callable) -> Callable:
+    """Misst Dauer, Fehler und gleichzeitige Aufrufe eines MCP-Tools (Signatur bleibt erhalten)."""
+    tool = fn.__name__
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            if not config.METRICS_ENABLED:
+                return await fn(*args, **kwargs)
+            with TOOLS_IN_FLIGHT.track(tool=tool), TOOL_LATENCY.time(tool=tool):
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception:
+                    TOOL_ERRORS.inc(tool=tool)
+                    raise
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not config.METRICS_ENABLED:
+            return fn(*args, **kwargs)
+        with TOOLS_IN_FLIGHT.track(tool=tool), TOOL_LATENCY.time(tool=tool):
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                TOOL_ERRORS.inc(tool=tool)
+                raise
+    return wrapper
+
+
+def register_manager_metrics(db) -> None:
+    """Füllstände des geteilten DatabaseManagers, gelesen erst beim Abruf von /metrics."""
+    cache = db.query_cache
+    REGISTRY.register(CallbackMetric(
+        "proalpha_query_cache_requests_total", "Zugriffe auf den Ergebnis-Cache",
+        lambda: {"hit": cache.hits, "miss": cache.misses}, kind="counter", labelnames=["result"]))
+    REGISTRY.register(CallbackMetric(
+        "proalpha_query_cache_evictions_total", "Verdrängte Cache-Einträge", lambda: cache.evictions, kind="counter"))
+    REGISTRY.register(CallbackMetric(
+        "proalpha_query_cache_bytes", "Belegte Bytes im Ergebnis-Cache", lambda: cache.stats()["bytes"]))
+    REGISTRY.register(CallbackMetric(
+        "proalpha_query_cache_entries", "Einträge im Ergebnis-Cache", lambda: cache.stats()["entries"]))
+    REGISTRY.register(CallbackMetric(
+        "proalpha_coalesced_calls_total", "An laufende identische Aufrufe angehängte Aufrufe",
+        lambda: db.flights.shared, kind="counter"))
+    REGISTRY.register(CallbackMetric(
+        "proalpha_single_flight_in_flight", "Laufende zusammengefasste Aufrufe", db.flights.in_flight))
+    REGISTRY.register(CallbackMetric(
+        "proalpha_open_cursors", "Offene Ergebnis-Cursor", db.cursors.open_count))
+    REGISTRY.register(CallbackMetric(
+        "proalpha_proxy_circuit_open", "1, solange der Circuit Breaker offen ist",
+        lambda: int(db.breaker.state != "closed")))
+    REGISTRY.register(CallbackMetric(
+        "proalpha_snapshots", "Vorgehaltene Snapshots", lambda: len(db.snapshots)))
+    REGISTRY.register(CallbackMetric(
+        "proalpha_snapshot_bytes", "Geschätzte Größe aller Snapshots in Bytes", lambda: db.snapshots.bytes))
+    REGISTRY.register(CallbackMetric(
+        "proalpha_schema_version", "Anzahl geladener Schema-Stände", lambda: db.schema_index.version))
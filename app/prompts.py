@@ -1,18 +1,144 @@
+"""
+Prompt-Vorlagen aus mcp_prompts.json.
+
+Die Datei wird einmal gelesen und in eine residente Registry übernommen; erneut
+geparst wird sie nur, wenn sich ihre Signatur (mtime/Größe) ändert. Jede Vorlage
+wird dabei in Text- und Platzhalterteile (`{{table_name}}`) zerlegt, sodass das
+Rendern nur noch Teile aneinanderhängt. Die Vorlagen werden zusätzlich als
+MCP-Prompts registriert; Argumente wie `table_name` können dabei um einen kurzen
+Schema-Auszug aus dem Schema-Cache ergänzt werden.
+"""
 import os
 import json
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastmcp.prompts.prompt import Prompt, PromptArgument, PromptMessage
+from fastmcp.server.middleware import Middleware
+from mcp.types import TextContent
+from pydantic import PrivateAttr
+
+logger = logging.getLogger("mcp-proalpha")
 
 PROMPTS_FILE = os.path.join(os.path.dirname(__file__), "..", "mcp_prompts.json")
 
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+# Argumente, zu denen ein Schema-Auszug der genannten Tabelle bzw. View angehängt wird
+SCHEMA_ARGUMENTS = ("table_name", "view_name")
+
+
+class CompiledPrompt(NamedTuple):
+    name: str
+    title: str
+    description: str
+    template: str
+    # Abwechselnd Text und Platzhaltername: [text, name, text, name, ..., text]
+    parts: Tuple[str, ...]
+    arguments: Tuple[str, ...]
+
+    def render(self, values: Dict[str, Any]) -> str:
+        missing = [a for a in self.arguments if a not in values]
+        if missing:
+            raise ValueError(f"Fehlende Argumente für Prompt '{self.name}': {', '.join(missing)}")
+        out = list(self.parts)
+        for i in range(1, len(out), 2):
+            out[i] = str(values[out[i]])
+        return "".join(out)
+
+
+def compile_prompt(name: str, prompt: Dict[str, Any]) -> CompiledPrompt:
+    template = prompt.get("template", "")
+    parts = tuple(_PLACEHOLDER.split(template))
+    arguments = tuple(dict.fromkeys(parts[1::2]))
+    return CompiledPrompt(
+        name, prompt.get("title", ""), prompt.get("description", ""), template, parts, arguments
+    )
+
+
+def file_signature(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class PromptRegistry:
+    """Residente, kompilierte Vorlagen; `version` erhöht sich mit jedem neu gelesenen Stand."""
+
+    def __init__(self, path: str = PROMPTS_FILE):
+        self.path = path
+        self.version = 0
+        self._signature: Optional[tuple] = None
+        self._raw: Dict[str, Dict[str, Any]] = {}
+        self._prompts: Dict[str, CompiledPrompt] = {}
+        self._listeners: List[Callable[["PromptRegistry"], None]] = []
+        self._lock = threading.Lock()
+
+    def _ensure_current(self) -> None:
+        signature = file_signature(self.path)
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            try:
+                if signature is None:
+                    # Datei gelöscht: keine Vorlagen mehr veröffentlichen, registrierte werden deaktiviert
+                    logger.warning(f"Prompt-Datei {self.path} nicht mehr vorhanden, Prompts werden entfernt")
+                    raw = {}
+                else:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        raw = json.load(f).get("prompts", {})
+                prompts = {name: compile_prompt(name, prompt) for name, prompt in raw.items()}
+            except Exception as e:
+                logger.error(f"Fehler beim Laden der Prompts aus {self.path}: {e}")
+                # Bisherigen Stand behalten, defekte Datei nicht bei jedem Aufruf erneut parsen
+                self._signature = signature
+                return
+            self._raw, self._prompts = raw, prompts
+            self._signature = signature
+            self.version += 1
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                logger.error(f"Fehler beim Aktualisieren der MCP-Prompts: {e}")
+
+    def on_reload(self, listener: Callable[["PromptRegistry"], None]) -> None:
+        self._listeners.append(listener)
+
+    def current_version(self) -> int:
+        self._ensure_current()
+        return self.version
+
+    def raw(self) -> Dict[str, Dict[str, Any]]:
+        """Einträge wie in mcp_prompts.json (nicht verändern)."""
+        self._ensure_current()
+        return self._raw
+
+    def prompts(self) -> Dict[str, CompiledPrompt]:
+        self._ensure_current()
+        return self._prompts
+
+    def get(self, name: str) -> CompiledPrompt:
+        prompt = self.prompts().get(name)
+        if prompt is None:
+            raise KeyError(f"Prompt '{name}' not found in mcp_prompts.json")
+        return prompt
+
+
+registry = PromptRegistry()
+
+
 def load_prompts():
-    with open(PROMPTS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f).get("prompts", {})
+    return registry.raw()
 
 def get_prompt_template(prompt_name: str) -> str:
-    prompts = load_prompts()
-    prompt = prompts.get(prompt_name)
-    if prompt:
-        return prompt.get("template", "")
-    raise KeyError(f"Prompt '{prompt_name}' not found in mcp_prompts.json")
+    return registry.get(prompt_name).template
 
 def render_prompt(template: str, **kwargs) -> str:
     # Simple variable replacement using str.format
@@ -26,5 +152,87 @@ def load_prompt(prompt_name: str, prompts_dir: str = "prompts") -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
-# Placeholder for future prompt logic or loading
-# You can implement prompt loading or prompt-related utilities here if needed
+
+def render_with_schema(
+    prompt: CompiledPrompt, values: Dict[str, Any], describe: Optional[Callable[[str], Optional[str]]]
+) -> str:
+    """Rendert die Vorlage und hängt für table_name/view_name einen Schema-Auszug an."""
+    text = prompt.render(values)
+    if describe is None:
+        return text
+    excerpts = []
+    for argument in SCHEMA_ARGUMENTS:
+        if argument in prompt.arguments and values.get(argument):
+            excerpt = describe(str(values[argument]))
+            if excerpt:
+                excerpts.append(excerpt)
+    if not excerpts:
+        return text
+    return text + "\n\nSchema-Auszug:\n" + "\n".join(excerpts)
+
+
+class TemplatePrompt(Prompt):
+    """MCP-Prompt, der beim Rendern den aktuellen Stand der Vorlage aus der Registry nimmt."""
+
+    _registry: Any = PrivateAttr(default=None)
+    _describe: Any = PrivateAttr(default=None)
+
+    async def render(self, arguments: Optional[Dict[str, Any]] = None) -> List[PromptMessage]:
+        text = render_with_schema(self._registry.get(self.name), arguments or {}, self._describe)
+        return [PromptMessage(role="user", content=TextContent(type="text", text=text))]
+
+
+class PromptReloadMiddleware(Middleware):
+    """Prüft vor prompts/list und prompts/get, ob sich mcp_prompts.json geändert hat."""
+
+    def __init__(self, prompts: PromptRegistry):
+        self.prompts = prompts
+
+    async def on_list_prompts(self, context, call_next):
+        self.prompts.current_version()
+        return await call_next(context)
+
+    async def on_get_prompt(self, context, call_next):
+        self.prompts.current_version()
+        return await call_next(context)
+
+
+def register_mcp_prompts(
+    mcp, prompts: PromptRegistry, describe: Optional[Callable[[str], Optional[str]]] = None
+) -> None:
+    """
+    Registriert alle Vorlagen als MCP-Prompts und hält sie bei Änderungen der Datei
+    aktuell (neue werden ergänzt, entfernte deaktiviert); geprüft wird bei jedem
+    prompts/list und prompts/get. `describe(name)` liefert
+    den Schema-Auszug für table_name/view_name oder None.
+    """
+    registered: Dict[str, TemplatePrompt] = {}
+
+    def sync(current: PromptRegistry) -> None:
+        compiled = current.prompts()
+        for name, prompt in compiled.items():
+            arguments = [
+                PromptArgument(name=a, description=f"Wert für {{{{{a}}}}}", required=True) for a in prompt.arguments
+            ]
+            existing = registered.get(name)
+            if existing is None:
+                existing = registered[name] = TemplatePrompt(
+                    name=name, title=prompt.title or None, description=prompt.description, arguments=arguments
+                )
+                existing._registry = current
+                existing._describe = describe
+                mcp.add_prompt(existing)
+                continue
+            existing.title = prompt.title or None
+            existing.description = prompt.description
+            existing.arguments = arguments
+            if not existing.enabled:
+                existing.enable()
+        for name, existing in registered.items():
+            if name not in compiled and existing.enabled:
+                existing.disable()
+
+    prompts.on_reload(sync)
+    sync(prompts)
+    # Ohne diesen Hook sähe prompts/list eine geänderte Datei erst nach dem nächsten REST-Zugriff
+    mcp.add_middleware(PromptReloadMiddleware(prompts))
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import config
+
+logger = logging.getLogger("mcp-proalpha")
+
+T = TypeVar("T")
+
+# Antworten, bei denen der Proxy bzw. ein Gateway davor vorübergehend nicht kann
+RETRY_STATUS = frozenset({502, 503, 504})
+
+
+class ProxyUnavailable(ConnectionError):
+    """Der SQL-Proxy gilt als nicht erreichbar; Aufrufe schlagen sofort fehl."""
+
+
+def is_local(error: BaseException) -> bool:
+    """Fehler, die gar nicht beim Proxy ankamen (eigener Verbindungspool erschöpft)."""
+    return isinstance(error, httpx.PoolTimeout)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Verbindungsfehler, Timeouts und 502/503/504 dürfen bei Lesezugriffen wiederholt werden."""
+    if is_local(error):
+        return False
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, httpx.TransportError)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRY_STATUS
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUS
+    return False
+
+
+class RetryPolicy:
+    """Begrenzte Wiederholungen mit exponentiellem Backoff und vollem Jitter."""
+
+    def __init__(self, retries: int, backoff: float, backoff_max: float):
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Schlägt nach `threshold` aufeinanderfolgenden Fehlschlägen `reset_timeout`
+    Sekunden lang sofort fehl, statt jeden Aufruf in Timeouts laufen zu lassen.
+    Danach wird ein einzelner Probeaufruf durchgelassen (half-open): Erfolg
+    schließt den Breaker wieder, ein Fehler öffnet ihn erneut.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def before_call(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+                return
+            raise ProxyUnavailable(
+                f"SQL-Proxy nicht erreichbar, erneuter Versuch in {max(remaining, 0):.0f} s"
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logger.info("SQL-Proxy wieder erreichbar, Circuit Breaker geschlossen")
+            self.state = "closed"
+            self._failures = 0
+
+    def record_skipped(self) -> None:
+        """Aufruf hat den Proxy nicht erreicht: zählt weder als Erfolg noch als Fehlschlag."""
+        with self._lock:
+            if self.state == "half_open":
+                # Probeaufruf freigeben; der nächste Aufruf darf es erneut versuchen
+                self.state = "open"
+
+    def record_failure(self) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.threshold:
+                if self.state != "open":
+                    logger.warning(
+                        f"SQL-Proxy nach {self._failures} Fehlschlägen als nicht erreichbar markiert "
+                        f"({self.reset_timeout:.0f} s)"
+                    )
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+def _record(breaker: CircuitBreaker, error: Optional[BaseException]) -> bool:
+    """Verbucht das Ergebnis eines Versuchs und gibt zurück, ob wiederholt werden darf."""
+    if error is not None and is_local(error):
+        # Erschöpfter Pool sagt nichts über den Proxy; Wiederholen würde ihn nur weiter belasten
+        breaker.record_skipped()
+        return False
+    if error is None or not is_retryable(error):
+        # Auch ein 400 mit SQL-Fehler heißt: der Proxy antwortet
+        breaker.record_success()
+        return False
+    breaker.record_failure()
+    return True
+
+
+def call_with_retry(fn: Callable[[], T], policy: RetryPolicy, breaker: CircuitBreaker) -> T:
+    for attempt in range(policy.retries + 1):
+        breaker.before_call()
+        try:
+            result = fn()
+        except Exception as e:
+            if not _record(breaker, e) or attempt == policy.retries:
+                raise
+            delay = policy.delay(attempt)
+            logger.warning(f"SQL-Proxy-Request fehlgeschlagen ({e}), Wiederholung in {delay:.2f} s")
+            time.sleep(delay)
+        else:
+            _record(breaker, None)
+            return result
+    raise AssertionError("unreachable")
+
+
+async def acall_with_retry(fn: Callable[[], Awaitable[T]], policy: RetryPolicy, breaker: CircuitBreaker) -> T:
+    for attempt in range(policy.retries + 1):
+        breaker.before_call()
+        try:
+            result = await fn()
+        except Exception as e:
+            if not _record(breaker, e) or attempt == policy.retries:
+                raise
+            delay = policy.delay(attempt)
+            logger.warning(f"SQL-Proxy-Request fehlgeschlagen ({e}), Wiederholung in {delay:.2f} s")
+            await asyncio.sleep(delay)
+        else:
+            _record(breaker, None)
+            return result
+    raise AssertionError("unreachable")
+
+
+def build_session(headers: dict) -> requests.Session:
+    """requests-Session mit Verbindungspool nach PROXY_POOL_SIZE (Wiederholungen übernimmt call_with_retry)."""
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.PROXY_POOL_SIZE, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def build_async_client(headers: dict, pool_size: Optional[int] = None) -> httpx.AsyncClient:
+    """AsyncClient mit eigenem Verbindungspool (Standard: PROXY_POOL_SIZE Verbindungen)."""
+    pool_size = max(1, pool_size or config.PROXY_POOL_SIZE)
+    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+    return httpx.AsyncClient(headers=headers, timeout=httpx_timeout(), limits=limits)
+
+
+def requests_timeout() -> tuple:
+    return (config.PROXY_CONNECT_TIMEOUT, config.PROXY_READ_TIMEOUT)
+
+
+def httpx_timeout() -> httpx.Timeout:
+    # Lesetimeout gilt je Chunk: ein langsam, aber stetig streamender Proxy bricht nicht ab
+    return httpx.Timeout(
+        connect=config.PROXY_CONNECT_TIMEOUT,
+        read=config.PROXY_READ_TIMEOUT,
+        write=config.PROXY_READ_TIMEOUT,
+        pool=config.PROXY_READ_TIMEOUT,
+    )
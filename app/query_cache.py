@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .sql_lexer import normalize_sql
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalisiert SQL für den Cache-Schlüssel (siehe sql_lexer.normalize_sql): Leerraum
+    außerhalb von Literalen und Bezeichnern wird zusammengefasst, Kommentare entfallen,
+    ein abschließendes Semikolon wird entfernt.
+    """
+    return normalize_sql(query)
+
+
+class QueryCache:
+    """
+    Ergebnis-Cache für Read-Only-Abfragen mit TTL und LRU-Verdrängung.
+
+    Die Größe eines Eintrags wird über die Länge der Proxy-Antwort in Bytes
+    geschätzt; überschreitet die Summe `max_bytes`, werden die am längsten nicht
+    genutzten Einträge verdrängt. `ttl <= 0` deaktiviert den Cache.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, size, value = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        """Legt ein Ergebnis ab; gespeicherte Werte werden von Aufrufern nicht verändert."""
+        if not self.enabled or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
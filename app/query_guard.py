@@ -0,0 +1,159 @@
+"""
+Kostenbremse für Abfragen von Agenten.
+
+Unbeschränkte `SELECT ... FROM ...` bekommen ein `TOP (n + 1)`, damit der
+SQL Server nach n + 1 Zeilen aufhört; die zusätzliche Zeile zeigt an, dass das
+Ergebnis abgeschnitten wurde. Optional wird vorher geschätzt, wie viele Zeilen
+die Abfrage liefern würde: über die Zeilenzahlen aus `sys.partitions`
+(zwischengespeichert) oder per `COUNT_BIG(*)` über dieselbe Abfrage.
+"""
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .sql_lexer import Token, iter_tokens
+from .streaming import ResultLimitExceeded
+
+COST_MODES = ("truncate", "refuse")
+PREFLIGHT_MODES = ("off", "stats", "count")
+
+# Zeilen je Tabelle aus den Partitionsstatistiken (Heap oder gruppierter Index)
+TABLE_ROWS_QUERY = """
+    SELECT t.name AS TABLE_NAME, SUM(p.rows) AS ROW_COUNT
+    FROM sys.tables t
+    INNER JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1)
+    GROUP BY t.name
+"""
+
+# Auf oberster Ebene: mehrere Ergebnismengen oder eigene Begrenzung, dort wird kein TOP eingefügt
+_NO_TOP = frozenset({"UNION", "EXCEPT", "INTERSECT", "OFFSET", "FOR", "OPTION"})
+# Mit diesen Klauseln zählt COUNT_BIG(*) über FROM ... nicht dieselben Zeilen
+_NO_COUNT = frozenset({"DISTINCT", "TOP", "GROUP", "HAVING", "UNION", "EXCEPT", "INTERSECT", "OFFSET", "FOR", "OPTION"})
+
+
+class QueryCostExceeded(ResultLimitExceeded):
+    """Abfrage liegt über dem Kostenbudget (QUERY_COST_MODE=refuse)."""
+
+
+class GuardedQuery(NamedTuple):
+    original: str
+    query: str  # an den Proxy gesendete Abfrage, ggf. mit TOP (row_cap + 1)
+    row_cap: Optional[int]
+    capped: bool  # TOP wurde eingefügt
+    tables: Tuple[str, ...]  # in FROM/JOIN genannte Tabellen
+
+
+def check_modes(cost_mode: str, preflight: str) -> None:
+    if cost_mode not in COST_MODES:
+        raise ValueError(f"Unbekannter QUERY_COST_MODE '{cost_mode}', erlaubt: {', '.join(COST_MODES)}")
+    if preflight not in PREFLIGHT_MODES:
+        raise ValueError(f"Unbekannter QUERY_PREFLIGHT '{preflight}', erlaubt: {', '.join(PREFLIGHT_MODES)}")
+
+
+def _main_select(tokens: List[Token]) -> Optional[int]:
+    """Index des SELECT, das die Ergebnismenge liefert; None bei Batches oder anderen Statements."""
+    top_level = [i for i, t in enumerate(tokens) if t.depth == 0]
+    if not top_level:
+        return None
+    semicolons = [i for i in top_level if tokens[i].value == ";" and tokens[i].kind == "punct"]
+    if semicolons and semicolons[0] != len(tokens) - 1:
+        return None
+    first = tokens[top_level[0]]
+    if first.kind != "word" or first.value not in ("SELECT", "WITH"):
+        return None
+    for i in top_level:
+        if tokens[i].kind == "word" and tokens[i].value == "SELECT":
+            return i
+    return None
+
+
+def referenced_tables(tokens: List[Token]) -> Tuple[str, ...]:
+    """Namen nach FROM/JOIN (letzter Teil bei dbo.x); Unterabfragen und Funktionen zählen nicht."""
+    tables: List[str] = []
+    for i, token in enumerate(tokens[:-1]):
+        if token.kind != "word" or token.value not in ("FROM", "JOIN"):
+            continue
+        j = i + 1
+        name = None
+        while j < len(tokens) and tokens[j].kind in ("word", "name"):
+            name = tokens[j].value
+            if j + 1 < len(tokens) and tokens[j + 1].value == "." and tokens[j + 1].kind == "punct":
+                j += 2
+                continue
+            break
+        if name is not None and not (j + 1 < len(tokens) and tokens[j + 1].value == "("):
+            tables.append(name.lower())
+    return tuple(dict.fromkeys(tables))
+
+
+def plan(query: str, row_cap: Optional[int]) -> GuardedQuery:
+    """Fügt bei Bedarf `TOP (row_cap + 1)` in eine geprüfte Read-Only-Abfrage ein."""
+    tokens = list(iter_tokens(query))
+    tables = referenced_tables(tokens)
+    if not row_cap:
+        return GuardedQuery(query, query, None, False, tables)
+    index = _main_select(tokens)
+    if index is None:
+        return GuardedQuery(query, query, row_cap, False, tables)
+    rest = [t for t in tokens[index + 1:] if t.depth == 0 and t.kind == "word"]
+    if "FROM" not in {t.value for t in rest} or _NO_TOP & {t.value for t in rest}:
+        # Ohne FROM entsteht höchstens eine Zeile; UNION usw. bleiben unverändert
+        return GuardedQuery(query, query, row_cap, False, tables)
+    position = index + 1
+    if position < len(tokens) and tokens[position].kind == "word" and tokens[position].value in ("DISTINCT", "ALL"):
+        position += 1
+    if position < len(tokens) and tokens[position].kind == "word" and tokens[position].value == "TOP":
+        return GuardedQuery(query, query, row_cap, False, tables)
+    anchor = tokens[position - 1]
+    rewritten = f"{query[:anchor.end]} TOP ({row_cap + 1}){query[anchor.end:]}"
+    return GuardedQuery(query, rewritten, row_cap, True, tables)
+
+
+@lru_cache(maxsize=4096)
+def cached_plan(query: str, row_cap: Optional[int]) -> GuardedQuery:
+    """plan mit LRU-Cache: wiederholte Abfragen werden vor dem Cache-Lookup nicht erneut zerlegt."""
+    return plan(query, row_cap)
+
+
+def count_query(query: str) -> Optional[str]:
+    """
+    `SELECT COUNT_BIG(*) AS ROW_COUNT FROM ...` mit FROM/WHERE der Abfrage (ohne
+    ORDER BY); None, wenn sich die Zeilenzahl so nicht ermitteln lässt.
+    """
+    tokens = list(iter_tokens(query))
+    index = _main_select(tokens)
+    if index is None:
+        return None
+    top_level = [t for t in tokens[index + 1:] if t.depth == 0]
+    words = {t.value for t in top_level if t.kind == "word"}
+    if words & _NO_COUNT or "FROM" not in words:
+        return None
+    start = next(t.start for t in top_level if t.kind == "word" and t.value == "FROM")
+    end = len(query.rstrip().rstrip(";"))
+    for a, b in zip(top_level, top_level[1:]):
+        if a.kind == "word" and a.value == "ORDER" and b.value == "BY":
+            end = a.start
+            break
+    return f"{query[:tokens[index].start]}SELECT COUNT_BIG(*) AS ROW_COUNT {query[start:end].rstrip()}"
+
+
+class TableStats:
+    """Zeilenzahlen je Tabelle aus sys.partitions, gültig für `ttl` Sekunden."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._rows: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+
+    def fresh(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is not None and time.monotonic() - loaded_at < self.ttl
+
+    def update(self, rows: Iterable[dict]) -> None:
+        self._rows = {str(r["TABLE_NAME"]).lower(): int(r.get("ROW_COUNT") or 0) for r in rows}
+        self._loaded_at = time.monotonic()
+
+    def estimate(self, tables: Iterable[str]) -> Optional[int]:
+        """Größte beteiligte Tabelle als grobe Obergrenze; WHERE und Joins bleiben unberücksichtigt."""
+        known = [self._rows[t] for t in tables if t in self._rows]
+        return max(known) if known else None
@@ -0,0 +1,102 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from .metrics import PHASE_LATENCY
+
+try:
+    import msgpack  # optional: kompakte Binärkodierung für /api/query
+except ImportError:  # pragma: no cover - abhängig von der Installation
+    msgpack = None
+
+# records: Liste von Dicts (Standard); columnar: Spaltenkopf + Zeilen-Arrays;
+# columns: Spaltenkopf + ein Array pro Spalte (spaltenorientiert)
+RESULT_FORMATS = ("records", "columnar", "columns")
+
+
+def check_format(fmt: str) -> str:
+    if fmt not in RESULT_FORMATS:
+        raise ValueError(f"Unbekanntes Ergebnisformat '{fmt}', erlaubt: {', '.join(RESULT_FORMATS)}")
+    return fmt
+
+
+class ColumnarResult:
+    """
+    Abfrageergebnis als Spaltenkopf plus eine Liste pro Zeile.
+
+    Intern werden Ergebnisse so gehalten (Cache, Seiten), damit die Spaltennamen
+    nicht in jeder Zeile wiederholt werden; Dicts entstehen erst bei der Ausgabe
+    im Format "records".
+    """
+
+    __slots__ = ("columns", "rows", "truncated", "estimated_rows", "_keys")
+
+    def __init__(self, columns: Optional[List[str]] = None, rows: Optional[List[list]] = None):
+        self.columns: List[str] = columns or []
+        self.rows: List[list] = rows or []
+        # Von der Kostenbremse gesetzt: Ergebnis nach QUERY_ROW_CAP Zeilen abgeschnitten, Schätzung vorab
+        self.truncated = False
+        self.estimated_rows: Optional[int] = None
+        self._keys = set(self.columns)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "ColumnarResult":
+        result = cls()
+        for record in records:
+            result.append_record(record)
+        return result
+
+    def append_record(self, record: Dict[str, Any]) -> None:
+        columns = self.columns
+        if not isinstance(record, dict):
+            record = {"value": record}
+        if record.keys() != self._keys:
+            new = [key for key in record if key not in self._keys]
+            if new:
+                # Neue Spalte: bisherige Zeilen mit None auffüllen
+                for row in self.rows:
+                    row.extend([None] * len(new))
+                columns.extend(new)
+                self._keys.update(new)
+            self.rows.append([record.get(c) for c in columns])
+            return
+        self.rows.append([record[c] for c in columns])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def slice(self, start: int, stop: int) -> "ColumnarResult":
+        return ColumnarResult(self.columns, self.rows[start:stop])
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+    def to_payload(self, fmt: str = "records") -> Any:
+        """Liefert das Ergebnis im gewünschten Ausgabeformat."""
+        check_format(fmt)
+        with PHASE_LATENCY.time(phase="serialize"):
+            return self._payload(fmt)
+
+    def _payload(self, fmt: str) -> Any:
+        if fmt == "records":
+            return self.to_records()
+        if fmt == "columnar":
+            return {"columns": self.columns, "rows": self.rows}
+        data = [list(col) for col in zip(*self.rows)] if self.rows else [[] for _ in self.columns]
+        return {"columns": self.columns, "data": data}
+
+    def to_envelope(self, fmt: str = "records", next_cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Antwort der Tools: Nutzdaten plus row_count, truncated und next_cursor."""
+        payload = self.to_payload(fmt)
+        envelope = {"rows": payload} if fmt == "records" else dict(payload)
+        envelope["row_count"] = len(self.rows)
+        envelope["truncated"] = self.truncated
+        if self.estimated_rows is not None:
+            envelope["estimated_rows"] = self.estimated_rows
+        envelope["next_cursor"] = next_cursor
+        return envelope
+
+
+def encode_msgpack(payload: Any) -> bytes:
+    if msgpack is None:
+        raise ValueError("Binärkodierung nicht verfügbar: Paket 'msgpack' ist nicht installiert")
+    return msgpack.packb(payload, use_bin_type=True, default=str)
@@ -0,0 +1,117 @@
+"""
+Vorserialisierte, seitenweise Schema-Antworten.
+
+Für jeden Schema-Stand wird je Tabelle/View und Projektion einmal ein JSON-
+Fragment erzeugt; eine Seite entsteht durch Aneinanderhängen der Fragmente im
+gewählten Namensbereich, ohne pro Anfrage Dicts aufzubauen oder zu serialisieren.
+
+Projektionen:
+    names    nur der Name
+    summary  Name, Art, Spaltenzahl und Fremdschlüssel-Nachbarn
+    types    Name und Spalten als {name, type}
+    full     Name plus vollständiger Eintrag aus dem Schema
+"""
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+PROJECTIONS = ("names", "summary", "types", "full")
+SCHEMA_KINDS = ("tables", "views")
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_cursor(name: str) -> str:
+    return base64.urlsafe_b64encode(name.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Ungültiger Cursor")
+
+
+def column_name(column: Dict[str, Any]) -> Optional[str]:
+    """Spaltenname aus INFORMATION_SCHEMA (`COLUMN_NAME`) oder dem älteren Cache-Format (`name`)."""
+    return column.get("COLUMN_NAME") or column.get("name")
+
+
+def column_type(column: Dict[str, Any]) -> Optional[str]:
+    return column.get("DATA_TYPE") or column.get("type")
+
+
+def check_projection(projection: str) -> str:
+    if projection not in PROJECTIONS:
+        raise ValueError(f"Unbekannte Projektion '{projection}', erlaubt: {', '.join(PROJECTIONS)}")
+    return projection
+
+
+class _Listing:
+    """Namen einer Art (Tabellen oder Views) sortiert, mit Fragmenten je Projektion."""
+
+    def __init__(self, kind: str, entries: Dict[str, Dict[str, Any]], neighbours: Dict[str, Tuple[set, int]]):
+        self.names = sorted(entries, key=str.lower)
+        self.keys = [n.lower() for n in self.names]
+        single = kind[:-1]
+        self.fragments: Dict[str, List[bytes]] = {p: [] for p in PROJECTIONS}
+        for name in self.names:
+            info = entries[name]
+            columns = info.get("columns", [])
+            references, referenced_by = neighbours.get(name, (set(), 0))
+            self.fragments["names"].append(_dumps(name))
+            self.fragments["summary"].append(_dumps({
+                "name": name,
+                "kind": single,
+                "column_count": len(columns),
+                "references": sorted(references),
+                "referenced_by": referenced_by,
+            }))
+            self.fragments["types"].append(_dumps({
+                "name": name,
+                "columns": [{"name": column_name(c), "type": column_type(c)} for c in columns if column_name(c)],
+            }))
+            self.fragments["full"].append(_dumps({"name": name, **info}))
+
+    def page(self, projection: str, prefix: str, cursor: Optional[str], limit: int) -> bytes:
+        keys = self.keys
+        prefix = prefix.lower()
+        start = bisect_left(keys, prefix) if prefix else 0
+        end = bisect_left(keys, prefix + "\uffff") if prefix else len(keys)
+        first = max(start, bisect_right(keys, decode_cursor(cursor).lower())) if cursor else start
+        last = min(first + limit, end)
+        next_cursor = _dumps(encode_cursor(self.names[last - 1])) if last < end else b"null"
+        items = b",".join(self.fragments[projection][first:last])
+        return b'{"items":[' + items + b'],"total":' + str(end - start).encode() + b',"next_cursor":' + next_cursor + b"}"
+
+
+class SchemaCatalog:
+    def __init__(self, schema: Dict[str, Any]):
+        neighbours: Dict[str, Tuple[set, int]] = {}
+        for rel in schema.get("relationships", []):
+            parent, referenced = rel["ParentTable"], rel["ReferencedTable"]
+            refs, count = neighbours.get(parent, (set(), 0))
+            refs.add(referenced)
+            neighbours[parent] = (refs, count)
+            refs, count = neighbours.get(referenced, (set(), 0))
+            neighbours[referenced] = (refs, count + 1)
+        self.listings = {kind: _Listing(kind, schema.get(kind, {}), neighbours) for kind in SCHEMA_KINDS}
+        # Vollständiges Schema für resource://database_schema und GET /api/schema
+        self.full = _dumps(schema)
+
+    def page(
+        self, kind: str, projection: str = "names", prefix: str = "", cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> bytes:
+        """JSON `{items, total, next_cursor}` für eine Seite Tabellen oder Views."""
+        if kind not in SCHEMA_KINDS:
+            raise ValueError(f"Unbekannte Art '{kind}', erlaubt: {', '.join(SCHEMA_KINDS)}")
+        check_projection(projection)
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        return self.listings[kind].page(projection, prefix or "", cursor or None, limit)
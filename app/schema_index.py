@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from .join_graph import JoinGraph
+from .metrics import PHASE_LATENCY
+from .schema_catalog import SchemaCatalog
+from .schema_search import SchemaSearch
+
+logger = logging.getLogger("mcp-proalpha")
+
+
+def empty_schema() -> Dict[str, Any]:
+    return {"tables": {}, "views": {}, "relationships": []}
+
+
+def assemble_schema(
+    tables: List[Dict[str, Any]],
+    columns: List[Dict[str, Any]],
+    views: List[Dict[str, Any]],
+    relationships: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Baut das Schema aus den INFORMATION_SCHEMA-Zeilen in einem Gruppierungsdurchlauf
+    über alle Spalten auf (O(Tabellen + Spalten) statt O(Tabellen × Spalten)).
+
+    Die Spaltenzeilen werden nicht kopiert; häufig wiederkehrende Werte wie
+    TABLE_NAME, DATA_TYPE und IS_NULLABLE werden interniert, damit 150k Spalten
+    nicht 150k Kopien von "nvarchar" halten.
+    """
+    columns_by_table: Dict[str, List[Dict[str, Any]]] = {}
+    for col in columns:
+        tname = col["TABLE_NAME"] = sys.intern(col["TABLE_NAME"])
+        for key in ("DATA_TYPE", "IS_NULLABLE"):
+            value = col.get(key)
+            if isinstance(value, str):
+                col[key] = sys.intern(value)
+        group = columns_by_table.get(tname)
+        if group is None:
+            group = columns_by_table[tname] = []
+        group.append(col)
+
+    tables_dict: Dict[str, Dict[str, Any]] = {}
+    views_dict: Dict[str, Dict[str, Any]] = {}
+    # Tabellen und Spalten zuordnen
+    for table in tables:
+        tname = table["TABLE_NAME"]
+        tables_dict[tname] = {
+            "type": table["TABLE_TYPE"],
+            "columns": columns_by_table.get(tname, [])
+        }
+    # Views zuordnen
+    for view in views:
+        vname = view["TABLE_NAME"]
+        views_dict[vname] = {
+            "columns": columns_by_table.get(vname, [])
+        }
+    return {
+        "tables": tables_dict,
+        "views": views_dict,
+        "relationships": relationships
+    }
+
+
+def file_signature(path: Path) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class JsonSchemaSource:
+    """Liest das Schema aus einer schema.json-Datei."""
+
+    def __init__(self, cache_file: Union[str, Path]):
+        self.cache_file = Path(cache_file)
+        self.key: Hashable = self.cache_file.resolve()
+
+    def signature(self) -> Optional[tuple]:
+        return file_signature(self.cache_file)
+
+    def load(self) -> Dict[str, Any]:
+        with open(self.cache_file, "r") as f:
+            return json.load(f)
+
+
+class SchemaIndex:
+    """
+    Residenter, versionierter Index über das Datenbankschema.
+
+    Die Quelle (Cache-Datei) wird nur einmal geladen und erst dann erneut gelesen,
+    wenn sich ihre Signatur (mtime/Größe) ändert oder ein Refresh ein neues Schema
+    setzt. Tabellen und Views werden über die Dictionaries des Schemas in O(1) gefunden.
+    """
+
+    def __init__(self, source: Union[str, Path, Any]):
+        self.source = JsonSchemaSource(source) if isinstance(source, (str, Path)) else source
+        self.version = 0
+        self._schema: Dict[str, Any] = empty_schema()
+        self._signature: Optional[tuple] = None
+        # Aus dem Schema abgeleitete Strukturen (Katalog, Join-Graph, Suchindex) je Version
+        self._derived: Dict[str, Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def _ensure_current(self) -> None:
+        signature = self.source.signature()
+        if signature is None or signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            try:
+                with PHASE_LATENCY.time(phase="schema_load"):
+                    schema = self.source.load()
+            except Exception as e:
+                logger.error(f"Fehler beim Laden des Schemas aus dem Cache: {e}")
+                # Defekte Datei nicht bei jedem Aufruf erneut parsen
+                self._signature = signature
+                return
+            self._schema = schema
+            self._signature = signature
+            self.version += 1
+            logger.info("Schema erfolgreich aus Cache geladen")
+
+    @property
+    def schema(self) -> Dict[str, Any]:
+        self._ensure_current()
+        return self._schema
+
+    def current_version(self) -> int:
+        """Version des aktuellen Schema-Stands; eine geänderte Quelle wird vorher geladen."""
+        self._ensure_current()
+        return self.version
+
+    def update(self, schema: Dict[str, Any]) -> None:
+        """Setzt ein frisch erfasstes Schema, ohne die gerade geschriebene Datei erneut zu parsen."""
+        with self._lock:
+            self._schema = schema
+            self._signature = self.source.signature()
+            self.version += 1
+
+    def _derive(self, name: str, build: Callable[[Dict[str, Any]], Any]) -> Any:
+        self._ensure_current()
+        with self._lock:
+            schema, version = self._schema, self.version
+        cached = self._derived.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        # Nur ein Aufbau gleichzeitig; wer währenddessen anfragt, wartet auf dessen Ergebnis
+        with self._build_lock:
+            cached = self._derived.get(name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            value = build(schema)
+            self._derived[name] = (version, value)
+            return value
+
+    @property
+    def join_graph(self) -> JoinGraph:
+        """Fremdschlüssel-Graph zum aktuellen Schema-Stand."""
+        return self._derive("join_graph", lambda schema: JoinGraph(schema.get("relationships", [])))
+
+    @property
+    def search_index(self) -> SchemaSearch:
+        """Invertierter Index über Tabellen-, View- und Spaltennamen zum aktuellen Schema-Stand."""
+        return self._derive("search", SchemaSearch)
+
+    @property
+    def catalog(self) -> SchemaCatalog:
+        """Vorserialisierte Seiten und Projektionen für Schema-Ressourcen und -Routen."""
+        return self._derive("catalog", SchemaCatalog)
+
+    def prepare(self) -> None:
+        """Baut die abgeleiteten Strukturen vorab auf (nach einem Refresh im Hintergrund)."""
+        try:
+            self.catalog
+            self.join_graph
+            self.search_index
+        except Exception as e:
+            logger.error(f"Fehler beim Aufbau der Schema-Indizes: {e}")
+
+    def get_table(self, table_name: str) -> Optional[Dict[str, Any]]:
+        return self.schema.get("tables", {}).get(table_name)
+
+    def get_view(self, view_name: str) -> Optional[Dict[str, Any]]:
+        return self.schema.get("views", {}).get(view_name)
+
+    def get_relationships(self) -> List[Dict[str, Any]]:
+        return self.schema.get("relationships", [])
+
+
+_indexes: Dict[Hashable, SchemaIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_schema_index(source: Union[str, Path, Any]) -> SchemaIndex:
+    """Gibt den prozessweit geteilten Index für eine Schema-Quelle zurück."""
+    if isinstance(source, (str, Path)):
+        source = JsonSchemaSource(source)
+    with _indexes_lock:
+        index = _indexes.get(source.key)
+        if index is None:
+            index = _indexes[source.key] = SchemaIndex(source)
+        return index
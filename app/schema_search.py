@@ -0,0 +1,162 @@
+"""
+Unscharfe Suche über Tabellen-, View- und Spaltennamen.
+
+Je Schema-Stand wird einmal ein invertierter Index aufgebaut: Trigramme je
+Namensbestandteil (`s_kunden` → `s`, `kunden`, wie pg_trgm mit Auffüllung) und
+eine sortierte Liste aller Bestandteile für Präfixtreffer. Eine Anfrage zählt
+nur die Trefferlisten der seltensten Trigramme bis zu einem festen Budget und
+prüft die besten Kandidaten danach genau, damit häufige Trigramme (`nr`, `id`)
+die Antwortzeit nicht bestimmen.
+"""
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .schema_catalog import column_name, column_type
+
+SEARCH_KINDS = ("table", "view", "column")
+# Obergrenze gezählter Einträge aus Trefferlisten je Anfrage
+_POSTINGS_BUDGET = 4000
+# Kandidaten, deren Ähnlichkeit nach dem Zählen genau berechnet wird
+_VERIFY = 64
+_PREFIX_LIMIT = 200
+_MIN_SIMILARITY = 0.2
+_SPLIT = re.compile(r"[^0-9a-zäöüß]+")
+
+# (Art, Tabelle/View, Spalte, Datentyp)
+Entry = Tuple[str, str, Optional[str], Optional[str]]
+
+
+def _tokens(name: str) -> List[str]:
+    return [t for t in _SPLIT.split(name.lower()) if t]
+
+
+def _padded(name: str) -> str:
+    # Jeder Bestandteil mit zwei Leerzeichen davor und einem danach; über Grenzen
+    # hinweg entstehen nur Trigramme, die es auch innerhalb gibt ("  k") oder nie geben kann
+    return "".join(f"  {token} " for token in _tokens(name))
+
+
+def trigrams(name: str) -> Set[str]:
+    grams: Set[str] = set()
+    for token in _tokens(name):
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SchemaSearch:
+    def __init__(self, schema: Dict[str, Any]):
+        ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.entries: List[List[Entry]] = []
+
+        def add(name: str, entry: Entry) -> None:
+            key = name.lower()
+            name_id = ids.get(key)
+            if name_id is None:
+                name_id = ids[key] = len(self.names)
+                self.names.append(key)
+                self.entries.append([])
+            self.entries[name_id].append(entry)
+
+        for kind, group in (("table", "tables"), ("view", "views")):
+            for owner, info in schema.get(group, {}).items():
+                add(owner, (kind, owner, None, None))
+                for col in info.get("columns", []):
+                    name = column_name(col)
+                    if name:
+                        add(name, ("column", owner, name, column_type(col)))
+
+        postings: Dict[str, List[int]] = {}
+        prefixes: List[Tuple[str, int]] = []
+        self.gram_counts = array("H")
+        self.padded = [_padded(name) for name in self.names]
+        for name_id, name in enumerate(self.names):
+            grams = trigrams(name)
+            self.gram_counts.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                postings.setdefault(gram, []).append(name_id)
+            prefixes.append((name, name_id))
+            for token in _tokens(name):
+                if token != name:
+                    prefixes.append((token, name_id))
+        self.postings: Dict[str, array] = {g: array("I", ids_) for g, ids_ in postings.items()}
+        prefixes.sort()
+        self.prefix_keys = [p for p, _ in prefixes]
+        self.prefix_ids = array("I", (i for _, i in prefixes))
+
+    def search(
+        self, query: str, limit: int = 20, kind: Optional[str] = None, data_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Treffer absteigend nach Ähnlichkeit; `kind` und `data_type` filtern die Einträge."""
+        if kind is not None and kind not in SEARCH_KINDS:
+            raise ValueError(f"Unbekannte Art '{kind}', erlaubt: {', '.join(SEARCH_KINDS)}")
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        scores = self._trigram_scores(needle)
+        self._prefix_scores(needle, scores)
+        data_type = data_type.lower() if data_type else None
+        matches: List[Dict[str, Any]] = []
+        ranked = sorted(scores.items(), key=itemgetter(1), reverse=True)[:max(limit, 1) * 4]
+        for name_id, score in ranked:
+            for entry_kind, owner, column, dtype in self.entries[name_id]:
+                if kind is not None and entry_kind != kind:
+                    continue
+                if data_type is not None and (dtype or "").lower() != data_type:
+                    continue
+                match = {"kind": entry_kind, "table": owner, "score": round(score, 3)}
+                if column is not None:
+                    match["column"] = column
+                    match["data_type"] = dtype
+                matches.append(match)
+        # Bei gleicher Punktzahl Tabellen vor Views vor Spalten
+        order = {k: i for i, k in enumerate(SEARCH_KINDS)}
+        matches.sort(key=lambda m: (-m["score"], order[m["kind"]], m["table"], m.get("column") or ""))
+        return matches[:limit]
+
+    def _trigram_scores(self, needle: str) -> Dict[int, float]:
+        grams = trigrams(needle)
+        if not grams:
+            return {}
+        counts: Counter = Counter()
+        used = 0
+        for gram in sorted(grams, key=lambda g: len(self.postings.get(g, ()))):
+            ids = self.postings.get(gram)
+            if not ids:
+                continue
+            if used + len(ids) > _POSTINGS_BUDGET:
+                # Zu häufig für eine Unterscheidung; solche Anfragen deckt die Präfixsuche ab
+                break
+            counts.update(ids)
+            used += len(ids)
+        scores: Dict[int, float] = {}
+        for name_id, _ in counts.most_common(_VERIFY):
+            padded = self.padded[name_id]
+            shared = sum(gram in padded for gram in grams)
+            similarity = shared / (len(grams) + self.gram_counts[name_id] - shared)
+            if similarity >= _MIN_SIMILARITY:
+                scores[name_id] = similarity
+        return scores
+
+    def _prefix_scores(self, needle: str, scores: Dict[int, float]) -> None:
+        keys = self.prefix_keys
+        start = bisect_left(keys, needle)
+        for pos in range(start, min(start + _PREFIX_LIMIT, len(keys))):
+            key = keys[pos]
+            if not key.startswith(needle):
+                break
+            name_id = self.prefix_ids[pos]
+            name = self.names[name_id]
+            if name == needle:
+                score = 3.0
+            elif name.startswith(needle):
+                score = 2.0 + len(needle) / len(name)
+            else:
+                score = 1.0 + len(needle) / len(name)
+            if score > scores.get(name_id, 0.0):
+                scores[name_id] = score
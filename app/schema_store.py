@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .schema_index import JsonSchemaSource, empty_schema, file_signature
+
+SCHEMA_DB_FILE = "schema.db"
+
+# Objektarten im Store und ihr Schlüssel im Schema-Dictionary
+_KINDS = {"table": "tables", "view": "views"}
+
+
+def _encode(value: Any) -> Tuple[bytes, str]:
+    raw = json.dumps(value, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return zlib.compress(raw, 1), hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _decode(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+class SchemaStore:
+    """
+    Kompakter Schema-Cache in einer einzelnen SQLite-Datei.
+
+    Jede Tabelle und View ist eine Zeile mit komprimiertem JSON und Inhalts-Hash.
+    Ein Schreibvorgang läuft in einer Transaktion: Leser sehen entweder den alten
+    oder den neuen Stand, nie einen halb geschriebenen. Zeilen mit unverändertem
+    Hash werden nicht angefasst.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            " kind TEXT NOT NULL, name TEXT NOT NULL, hash TEXT NOT NULL, data BLOB NOT NULL,"
+            " PRIMARY KEY (kind, name)) WITHOUT ROWID"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, hash TEXT, data BLOB)")
+        return conn
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def write(self, schema: Dict[str, Any], snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Schreibt das Schema und gibt die tatsächlich geänderten bzw. entfernten
+        Objekte als Listen von (Art, Name) zurück.
+        """
+        changed: List[Tuple[str, str]] = []
+        removed: List[Tuple[str, str]] = []
+        meta_changed = False
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = {(k, n): h for k, n, h in conn.execute("SELECT kind, name, hash FROM objects")}
+            for kind, key in _KINDS.items():
+                for name, data in schema.get(key, {}).items():
+                    blob, digest = _encode(data)
+                    if existing.pop((kind, name), None) != digest:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO objects (kind, name, hash, data) VALUES (?, ?, ?, ?)",
+                            (kind, name, digest, blob),
+                        )
+                        changed.append((kind, name))
+            for kind, name in existing:
+                conn.execute("DELETE FROM objects WHERE kind = ? AND name = ?", (kind, name))
+                removed.append((kind, name))
+            meta = {"relationships": schema.get("relationships", [])}
+            if snapshot is not None:
+                meta["snapshot"] = snapshot
+            old_meta = dict(conn.execute("SELECT key, hash FROM meta"))
+            for key, value in meta.items():
+                blob, digest = _encode(value)
+                if old_meta.get(key) != digest:
+                    conn.execute("INSERT OR REPLACE INTO meta (key, hash, data) VALUES (?, ?, ?)", (key, digest, blob))
+                    meta_changed = meta_changed or key == "relationships"
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return {"changed": changed, "removed": removed, "relationships_changed": meta_changed}
+
+    def load(self) -> Dict[str, Any]:
+        schema = empty_schema()
+        conn = self._connect()
+        try:
+            for kind, name, blob in conn.execute("SELECT kind, name, data FROM objects ORDER BY kind, name"):
+                schema[_KINDS[kind]][name] = _decode(blob)
+            row = conn.execute("SELECT data FROM meta WHERE key = 'relationships'").fetchone()
+            if row:
+                schema["relationships"] = _decode(row[0])
+        finally:
+            conn.close()
+        return schema
+
+    def load_snapshot(self) -> Optional[Dict[str, Any]]:
+        if not self.exists():
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT data FROM meta WHERE key = 'snapshot'").fetchone()
+        finally:
+            conn.close()
+        return _decode(row[0]) if row else None
+
+
+class SchemaStoreSource:
+    """
+    Quelle für den SchemaIndex: liest aus der SQLite-Datei und fällt auf eine
+    vorhandene schema.json zurück, solange noch kein Store geschrieben wurde.
+    """
+
+    def __init__(self, store: SchemaStore, fallback_json: Path):
+        self.store = store
+        self.fallback = JsonSchemaSource(fallback_json)
+        self.key = ("sqlite", store.path.resolve())
+
+    def signature(self) -> Optional[tuple]:
+        if self.store.exists():
+            return ("sqlite",) + (file_signature(self.store.path) or ())
+        signature = self.fallback.signature()
+        return ("json",) + signature if signature else None
+
+    def load(self) -> Dict[str, Any]:
+        if self.store.exists():
+            return self.store.load()
+        return self.fallback.load()
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def export_json_layout(
+    cache_dir: Path,
+    schema: Dict[str, Any],
+    changed: List[Tuple[str, str]],
+    removed: List[Tuple[str, str]],
+) -> None:
+    """
+    Schreibt das bisherige JSON-Layout (schema.json, relationships.json,
+    tables/*.json, views/*.json). Nur geänderte oder fehlende Objektdateien werden
+    geschrieben, jede Datei atomar über eine temporäre Datei und os.replace.
+    """
+    for kind, key in _KINDS.items():
+        folder = cache_dir / key
+        folder.mkdir(exist_ok=True)
+        dirty = {name for k, name in changed if k == kind}
+        for name, data in schema[key].items():
+            path = folder / f"{name}.json"
+            if name in dirty or not path.exists():
+                _write_atomic(path, json.dumps(data, indent=2))
+        for k, name in removed:
+            if k == kind:
+                (folder / f"{name}.json").unlink(missing_ok=True)
+    _write_atomic(cache_dir / "relationships.json", json.dumps(schema["relationships"], indent=2))
+    _write_atomic(cache_dir / "schema.json", json.dumps(schema, indent=2))
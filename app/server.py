@@ -1,64 +1,179 @@
 from .logging_config import setup_logging
-from .database import DatabaseManager
+from .database import get_database_manager
 from fastmcp import FastMCP, Context
 import logging
+from typing import Any, Optional
 from .config import config
 from .tools import list_all_tools
+from .metrics import instrument_tool
+from .prompts import registry as prompt_registry, register_mcp_prompts
 
 
 setup_logging()
 logger = logging.getLogger("mcp-proalpha")
 
-db = DatabaseManager()
+db = get_database_manager()
 mcp: FastMCP = FastMCP("ProAlpha MCP Server")
 
-@mcp.resource("resource://database_schema")
-def resource_database_schema() -> dict:
-    """Vollständiges Schema der ProAlpha-Datenbank."""
-    return db.get_database_schema()
+@mcp.resource("resource://database_schema", mime_type="application/json")
+def resource_database_schema() -> str:
+    """Vollständiges Schema der ProAlpha-Datenbank (bei großen Datenbanken besser schema://tables nutzen)."""
+    return db.get_schema_json().decode("utf-8")
+
+@mcp.resource("schema://tables{?projection,prefix,cursor,limit}", mime_type="application/json")
+def resource_schema_tables(projection: str = "names", prefix: str = "", cursor: str = "", limit: int = 100) -> str:
+    """
+    Tabellen seitenweise als {items, total, next_cursor}. projection: names, summary
+    (Spaltenzahl und Fremdschlüssel-Nachbarn), types (Spalten mit Typ) oder full;
+    prefix filtert auf den Namensanfang, cursor=next_cursor liefert die nächste Seite.
+    """
+    return db.get_schema_page("tables", projection, prefix, cursor, limit).decode("utf-8")
+
+@mcp.resource("schema://views{?projection,prefix,cursor,limit}", mime_type="application/json")
+def resource_schema_views(projection: str = "names", prefix: str = "", cursor: str = "", limit: int = 100) -> str:
+    """Views seitenweise, Parameter wie bei schema://tables."""
+    return db.get_schema_page("views", projection, prefix, cursor, limit).decode("utf-8")
 
 @mcp.resource("resource://relationships")
 def resource_relationships() -> list:
     """Beziehungen zwischen den Tabellen der Datenbank."""
-    return db.get_database_schema().get("relationships", [])
+    return db.get_relationships()
 
 @mcp.resource("table://{table_name}")
 def resource_table_schema(table_name: str) -> dict:
     """Schema einer bestimmten Tabelle."""
-    return db.get_database_schema().get("tables", {}).get(table_name, {})
+    return db.get_table_schema(table_name) or {}
 
 @mcp.resource("view://{view_name}")
 def resource_view_schema(view_name: str) -> dict:
     """Schema einer bestimmten View."""
-    return db.get_database_schema().get("views", {}).get(view_name, {})
+    return db.get_view_schema(view_name) or {}
 
 @mcp.tool()
-async def execute_sql(query: str, ctx: Context) -> list:
-    """Führt eine Read-Only-SQL-Abfrage aus."""
+@instrument_tool
+async def execute_sql(
+    ctx: Context,
+    query: str = "",
+    use_cache: bool = True,
+    page_size: Optional[int] = None,
+    cursor: Optional[str] = None,
+    format: str = "records",
+) -> dict:
+    """
+    Führt eine Read-Only-SQL-Abfrage aus und gibt {rows, row_count, next_cursor} zurück.
+    Mit page_size wird seitenweise geliefert; die nächste Seite holt man mit cursor=next_cursor
+    (query kann dann leer bleiben). Mit use_cache=False wird der Ergebnis-Cache umgangen.
+    format="columnar" liefert {columns, rows: [[...]]}, format="columns" {columns, data: [Spalte, ...]}.
+    Ohne page_size werden höchstens QUERY_ROW_CAP Zeilen geliefert; truncated=true zeigt an,
+    dass weitere Zeilen abgeschnitten wurden (estimated_rows enthält ggf. eine Schätzung).
+    """
+    if page_size or cursor:
+        await ctx.info(f"Fetching page: {query or cursor}")
+        return await db.fetch_page_async(query, page_size=page_size, cursor=cursor, fmt=format)
     await ctx.info(f"Executing query: {query}")
-    return db.execute_query(query)
+    result = await db.execute_query_result_async(query, use_cache=use_cache)
+    return result.to_envelope(format)
+
+@mcp.tool()
+@instrument_tool
+async def execute_sql_batch(
+    ctx: Context,
+    queries: list[str],
+    use_cache: bool = True,
+    format: str = "records",
+    concurrency: Optional[int] = None,
+) -> dict:
+    """
+    Führt mehrere Read-Only-SQL-Abfragen in einem Aufruf parallel aus (z.B. zum Erkunden
+    mehrerer Tabellen). Liefert {results: [{index, rows, row_count, truncated} oder
+    {index, error}], succeeded, failed} in der Reihenfolge von queries. Ist eine Abfrage
+    nicht Read-Only, wird keine ausgeführt. concurrency begrenzt die gleichzeitigen Abfragen
+    (höchstens QUERY_BATCH_CONCURRENCY).
+    """
+    await ctx.info(f"Executing batch of {len(queries)} queries")
+    return await db.execute_batch_async(queries, use_cache=use_cache, fmt=format, concurrency=concurrency)
+
+@mcp.tool()
+@instrument_tool
+async def create_snapshot(ctx: Context, query: str, use_cache: bool = True) -> dict:
+    """
+    Führt eine Read-Only-SQL-Abfrage einmal aus und legt das Ergebnis lokal als Snapshot ab.
+    Liefert {handle, columns, row_count, truncated, bytes, expires_in}. Folgefragen zu denselben
+    Daten (Aggregationen, Filter) mit query_snapshot stellen statt die Datenbank erneut abzufragen.
+    Der Snapshot verfällt nach SNAPSHOT_TTL Sekunden ohne Zugriff.
+    """
+    await ctx.info(f"Creating snapshot: {query}")
+    return await db.create_snapshot_async(query, use_cache=use_cache)
+
+@mcp.tool()
+@instrument_tool
+async def query_snapshot(query: str, format: str = "records") -> dict:
+    """
+    Führt eine lesende SQLite-Abfrage über Snapshots aus, ohne die ProAlpha-Datenbank zu belasten.
+    Der Handle ist der Tabellenname, z.B. SELECT Kunde, SUM(Betrag) FROM snap_1a2b3c4d GROUP BY Kunde;
+    mehrere Snapshots lassen sich joinen. SQLite-Syntax (LIMIT statt TOP). Ergebnis wie bei execute_sql.
+    """
+    return await db.query_snapshot_async(query, fmt=format)
 
 @mcp.tool()
-def get_table_sample(table_name: str, limit: int = 10) -> list:
-    """Gibt eine Stichprobe der Daten einer Tabelle zurück."""
-    return db.get_table_sample(table_name, limit)
+@instrument_tool
+def drop_snapshot(handle: str) -> str:
+    """Verwirft einen Snapshot vor Ablauf seiner TTL."""
+    db.snapshots.drop(handle)
+    return f"Snapshot {handle} verworfen."
 
 @mcp.tool()
-async def refresh_schema(ctx: Context) -> str:
-    """Aktualisiert den Schema-Cache."""
-    db.refresh_schema_cache()
+@instrument_tool
+async def get_table_sample(table_name: str, limit: int = 10, use_cache: bool = True, format: str = "records") -> Any:
+    """Gibt eine Stichprobe der Daten einer Tabelle zurück (format wie bei execute_sql)."""
+    return await db.get_table_sample_async(table_name, limit, use_cache=use_cache, fmt=format)
+
+@mcp.tool()
+@instrument_tool
+def search_schema(query: str, limit: int = 20, kind: Optional[str] = None, data_type: Optional[str] = None) -> list:
+    """
+    Sucht Tabellen, Views und Spalten nach (Teil-)Namen, auch bei Tippfehlern (z.B. "kunde" findet s_kunden).
+    kind filtert auf "table", "view" oder "column", data_type auf einen Spaltentyp (z.B. "datetime").
+    Liefert [{kind, table, column?, data_type?, score}] absteigend nach score.
+    """
+    return db.search_schema(query, limit, kind, data_type)
+
+@mcp.tool()
+@instrument_tool
+def find_join_path(source_table: str, target_table: str, max_paths: int = 3) -> dict:
+    """
+    Kürzeste Join-Pfade zwischen zwei Tabellen über die Fremdschlüssel. Jeder Pfad enthält
+    die beteiligten Tabellen, die Join-Spalten je Schritt und fertiges SQL (FROM ... JOIN ... ON ...).
+    """
+    return db.find_join_paths(source_table, target_table, max_paths)
+
+@mcp.tool()
+@instrument_tool
+async def refresh_schema(ctx: Context, incremental: bool = False) -> str:
+    """Aktualisiert den Schema-Cache. Mit incremental=True nur seit dem letzten Refresh geänderte Tabellen und Views."""
+    # Fehler beim Refresh werden als Tool-Fehler gemeldet, nicht als Erfolg
+    await db.refresh_schema_cache_async(incremental=incremental)
     await ctx.info("Schema cache refreshed.")
     return "Schema cache refreshed."
 
 @mcp.tool()
+@instrument_tool
 def list_tools() -> list:
     """Gibt eine Liste aller verfügbaren Tools mit Beschreibung und Parametern zurück."""
     return list_all_tools(mcp)
 
+register_mcp_prompts(
+    mcp,
+    prompt_registry,
+    (lambda name: db.describe_table(name, config.PROMPT_SCHEMA_MAX_COLUMNS)) if config.PROMPT_SCHEMA_PREFILL else None,
+)
+
 def run():
     transport = (getattr(config, "MCP_TRANSPORT", None) or "streamable-http").lower()
     mcp_host = config.MCP_HOST
     mcp_port = int(config.MCP_PORT)
+    if config.SCHEMA_REFRESH_ON_START:
+        db.start_background_refresh()
     if transport == "stdio":
         mcp.run(transport="stdio")
     elif transport == "streamable-http":
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _LeaderCancelled(Exception):
+    """Der ausführende Aufruf wurde abgebrochen; Wartende versuchen es selbst erneut."""
+
+
+class SingleFlight:
+    """
+    Fasst gleichzeitige Aufrufe mit demselben Schlüssel zu einer Ausführung zusammen.
+
+    Der erste Aufrufer führt die Funktion aus, alle weiteren warten auf sein
+    Ergebnis bzw. seine Exception. Der Zustand liegt in einem
+    concurrent.futures.Future, damit sich Threads (Hintergrund-Refresh) und die
+    Event-Loops von MCP-Server und REST-API denselben Aufruf teilen können.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        # Anzahl der Aufrufe, die sich einem laufenden angeschlossen haben
+        self.shared = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            return future, True
+
+    def _finish(self, key: Hashable) -> None:
+        # Vor dem Setzen des Ergebnisses austragen: spätere Aufrufer starten neu
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return future.result()
+                except _LeaderCancelled:
+                    continue
+            try:
+                result = fn()
+            except BaseException as e:
+                self._finish(key)
+                future.set_exception(e)
+                raise
+            self._finish(key)
+            future.set_result(result)
+            return result
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    # shield: Abbruch eines Wartenden darf den gemeinsamen Aufruf nicht abbrechen
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except _LeaderCancelled:
+                    continue
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                self._finish(key)
+                future.set_exception(_LeaderCancelled())
+                raise
+            except BaseException as e:
+                self._finish(key)
+                future.set_exception(e)
+                raise
+            self._finish(key)
+            future.set_result(result)
+            return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,207 @@
+"""
+Snapshots: lokal vorgehaltene Abfrageergebnisse für Folgeanalysen.
+
+Ein Ergebnis vom SQL-Proxy wird in eine In-Memory-SQLite-Datenbank geschrieben
+(eine Tabelle je Snapshot, benannt nach dem Handle). Weitere Auswertungen
+(Aggregationen, Filter, Joins zwischen Snapshots) laufen dann lokal statt erneut
+gegen die ProAlpha-Datenbank. Snapshots verfallen SNAPSHOT_TTL Sekunden nach dem
+letzten Zugriff; überschreitet die geschätzte Größe aller Snapshots
+SNAPSHOT_MAX_BYTES, werden die am längsten ungenutzten verdrängt.
+
+Abfragen auf Snapshots dürfen nur lesen (SQLite-Authorizer) und werden nach
+SNAPSHOT_QUERY_TIMEOUT Sekunden abgebrochen.
+"""
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple
+
+from .result_format import ColumnarResult
+
+# Aktionen, die eine Snapshot-Abfrage ausführen darf; alles andere lehnt der Authorizer ab
+_READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+# Anzahl SQLite-VM-Schritte zwischen zwei Prüfungen des Timeouts
+_PROGRESS_STEPS = 10000
+_ROW_OVERHEAD = 16
+
+
+class SnapshotNotFound(KeyError):
+    """Snapshot unbekannt oder bereits verfallen."""
+
+
+class _Snapshot(NamedTuple):
+    handle: str
+    query: str
+    columns: List[str]
+    row_count: int
+    truncated: bool
+    size: int
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _column_names(columns: List[str]) -> List[str]:
+    """Spaltennamen für SQLite; dort gleiche Namen ohne Rücksicht auf Groß-/Kleinschreibung erhalten ein Suffix."""
+    seen = set()
+    out = []
+    for column in columns:
+        name = str(column) or "column"
+        candidate, n = name, 1
+        while candidate.lower() in seen:
+            n += 1
+            candidate = f"{name}_{n}"
+        seen.add(candidate.lower())
+        out.append(candidate)
+    return out
+
+
+def _value(value: Any) -> Any:
+    if value is None or isinstance(value, (str, float)):
+        return value
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        # SQLite speichert höchstens 64 Bit
+        return value if -(2 ** 63) <= value < 2 ** 63 else str(value)
+    return json.dumps(value, default=str)
+
+
+def _size(row: List[Any]) -> int:
+    return _ROW_OVERHEAD + sum(len(v) if isinstance(v, str) else 8 for v in row)
+
+
+class SnapshotStore:
+    def __init__(self, ttl: float, max_bytes: int, query_timeout: float = 10.0):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.query_timeout = query_timeout
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+        # Handle -> Snapshot, zuletzt genutzte am Ende; Ablaufzeit je Handle
+        self._snapshots: "OrderedDict[str, _Snapshot]" = OrderedDict()
+        self._expires: Dict[str, float] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def create(self, query: str, result: ColumnarResult) -> Dict[str, Any]:
+        """Legt das Ergebnis als neuen Snapshot ab und gibt dessen Beschreibung (mit `handle`) zurück."""
+        if not result.columns:
+            raise ValueError("Abfrage lieferte keine Spalten; leere Ergebnisse können nicht als Snapshot abgelegt werden")
+        handle = "snap_" + secrets.token_hex(4)
+        columns = _column_names(result.columns)
+        rows = [[_value(v) for v in row] for row in result.rows]
+        size = sum(_size(row) for row in rows)
+        if size > self.max_bytes:
+            raise ValueError(
+                f"Ergebnis zu groß für einen Snapshot (~{size} Bytes, SNAPSHOT_MAX_BYTES={self.max_bytes}); "
+                "Abfrage einschränken"
+            )
+        table = _quote(handle)
+        with self._lock:
+            self._purge()
+            while self._snapshots and self._bytes + size > self.max_bytes:
+                self._drop(next(iter(self._snapshots)))
+                self.evictions += 1
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(f"CREATE TABLE {table} ({', '.join(_quote(c) for c in columns)})")
+                self._conn.executemany(
+                    f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))})", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            snapshot = _Snapshot(handle, query, columns, len(rows), result.truncated, size)
+            self._snapshots[handle] = snapshot
+            self._expires[handle] = time.monotonic() + self.ttl
+            self._bytes += size
+        return self._describe(snapshot)
+
+    def query(self, sql: str, max_rows: int) -> ColumnarResult:
+        """
+        Führt eine lesende SQLite-Abfrage über die Snapshots aus (Tabellenname = Handle).
+        Mehr als `max_rows` Zeilen werden abgeschnitten (`truncated`).
+        """
+        with self._lock:
+            self._purge()
+            # Verwendete Snapshots gelten als genutzt (Handles sind klein geschrieben)
+            lowered = sql.lower()
+            for handle in [h for h in self._snapshots if h in lowered]:
+                self._touch(handle)
+            deadline = time.monotonic() + self.query_timeout
+            self._conn.set_authorizer(lambda action, *_: sqlite3.SQLITE_OK if action in _READ_ACTIONS else sqlite3.SQLITE_DENY)
+            self._conn.set_progress_handler(lambda: time.monotonic() > deadline, _PROGRESS_STEPS)
+            try:
+                cursor = self._conn.execute(sql)
+                if cursor.description is None:
+                    raise ValueError("Snapshot-Abfrage liefert kein Ergebnis")
+                rows = cursor.fetchmany(max_rows + 1)
+            except sqlite3.OperationalError as e:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Snapshot-Abfrage nach {self.query_timeout} Sekunden abgebrochen") from e
+                raise ValueError(f"Fehler in Snapshot-Abfrage: {e}") from e
+            except (sqlite3.DatabaseError, sqlite3.Warning) as e:
+                # u.a. mehrere Anweisungen in einem Aufruf oder vom Authorizer abgelehnte Schreibzugriffe
+                raise ValueError(f"Fehler in Snapshot-Abfrage: {e}") from e
+            finally:
+                self._conn.set_authorizer(None)
+                self._conn.set_progress_handler(None, 0)
+        result = ColumnarResult([d[0] for d in cursor.description], [list(r) for r in rows[:max_rows]])
+        result.truncated = len(rows) > max_rows
+        return result
+
+    def drop(self, handle: str) -> None:
+        with self._lock:
+            self._purge()
+            if handle not in self._snapshots:
+                raise SnapshotNotFound(handle)
+            self._drop(handle)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._purge()
+            return [self._describe(s) for s in self._snapshots.values()]
+
+    def clear(self) -> None:
+        with self._lock:
+            for handle in list(self._snapshots):
+                self._drop(handle)
+
+    def _describe(self, snapshot: _Snapshot) -> Dict[str, Any]:
+        return {
+            "handle": snapshot.handle,
+            "query": snapshot.query,
+            "columns": snapshot.columns,
+            "row_count": snapshot.row_count,
+            "truncated": snapshot.truncated,
+            "bytes": snapshot.size,
+            "expires_in": round(max(0.0, self._expires.get(snapshot.handle, 0.0) - time.monotonic()), 1),
+        }
+
+    def _touch(self, handle: str) -> None:
+        self._snapshots.move_to_end(handle)
+        self._expires[handle] = time.monotonic() + self.ttl
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        for handle in [h for h, expires in self._expires.items() if expires < now]:
+            self._drop(handle)
+
+    def _drop(self, handle: str) -> None:
+        snapshot = self._snapshots.pop(handle)
+        self._expires.pop(handle, None)
+        self._bytes -= snapshot.size
+        self._conn.execute(f"DROP TABLE IF EXISTS {_quote(handle)}")
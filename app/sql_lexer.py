@@ -0,0 +1,285 @@
+"""
+Read-Only-Prüfung für T-SQL auf Basis eines einfachen Tokenizers.
+
+Kommentare (`--`, verschachtelte `/* */`), String-Literale (`'...'`, `N'...'`) und
+Bezeichner in `[...]` oder `"..."` werden als Ganzes übersprungen; geprüft werden
+nur echte Schlüsselwörter. Dadurch sind `FROM sp_artikel` oder ein Literal
+`'update '` erlaubt, ein `DELETE` nach einem Kommentar oder in einem zweiten
+Statement des Batches aber nicht.
+"""
+import re
+from functools import lru_cache
+from typing import Iterator, List, NamedTuple, Optional
+
+# Bausteine, die als Ganzes übersprungen werden; ein N vor einem Literal gehört
+# nur dann dazu, wenn es nicht Teil eines Namens ist. Jede Alternative beginnt mit
+# einem festen Zeichen, damit re Stellen ohne Treffer schnell überspringt.
+_LINE_COMMENT = r"--[^\n]*"
+_STRING = r"'(?:[^']|'')*'|[Nn](?<![\w@#$][Nn])'(?:[^']|'')*'"
+_BRACKET = r"\[(?:[^\]]|\]\])*\]"
+_QUOTED = r'"(?:[^"]|"")*"'
+_WORD = r"[A-Za-z_@#][\w@#$]*"
+
+# Interessante Token; alles andere (Leerraum, Operatoren, Zahlen) überspringt finditer
+_TOKEN = re.compile(
+    rf"""
+      (?P<line_comment>{_LINE_COMMENT})
+    | (?P<block_comment>/\*)
+    | (?P<string>{_STRING})
+    | (?P<bracket>{_BRACKET})
+    | (?P<quoted>{_QUOTED})
+    | (?P<unterminated>['"\[])
+    | (?P<semicolon>;)
+    | (?P<word>{_WORD})
+    """,
+    re.X | re.S,
+)
+_BLOCK = re.compile(r"/\*|\*/")
+# Schneller Weg: Kommentare, Literale und Bezeichner in einem re.sub ausblenden und
+# die Wörter mit findall einsammeln. Blockkommentare mit einem weiteren '/*' darin
+# passen nicht und bleiben stehen; dann übernimmt die Token-Schleife.
+_MASK = re.compile(
+    "|".join([_LINE_COMMENT, r"/\*(?:[^*/]|\*(?!/)|/(?!\*))*\*/", _STRING, _BRACKET, _QUOTED]), re.S
+)
+_WORDS = re.compile(rf"{_WORD}|;")
+# Für iter_tokens: zusätzlich Klammern, Punkte und Kommas mit Position
+_STRUCTURE = re.compile(
+    rf"""
+      (?P<line_comment>{_LINE_COMMENT})
+    | (?P<block_comment>/\*)
+    | (?P<string>{_STRING})
+    | (?P<name>{_BRACKET}|{_QUOTED})
+    | (?P<word>{_WORD})
+    | (?P<punct>[().,;])
+    """,
+    re.X | re.S,
+)
+
+# Erlaubter Beginn des ersten Statements; ein Batch, der mit einem Namen beginnt,
+# würde in T-SQL als Prozeduraufruf ausgeführt
+FIRST_STATEMENTS = frozenset({"SELECT", "WITH", "DECLARE", "PRINT", "SET"})
+# Weitere Statements eines Batches dürfen zusätzlich Ablaufsteuerung und Cursor enthalten
+STATEMENTS = FIRST_STATEMENTS | {
+    "IF", "ELSE", "BEGIN", "END", "WHILE", "BREAK", "CONTINUE", "RETURN",
+    "OPEN", "FETCH", "CLOSE", "DEALLOCATE",
+}
+# Verboten an jeder Stelle, nicht nur am Statement-Anfang: T-SQL braucht zwischen
+# Statements kein ';' (`SELECT 1 CHECKPOINT` sind zwei Statements)
+FORBIDDEN = frozenset({
+    "INSERT", "UPDATE", "DELETE", "DROP", "CREATE", "ALTER", "TRUNCATE", "MERGE",
+    "EXEC", "EXECUTE", "GRANT", "REVOKE", "DENY", "BULK", "BACKUP", "RESTORE", "DBCC",
+    "SHUTDOWN", "KILL", "RECONFIGURE", "WAITFOR", "USE", "UPDATETEXT", "WRITETEXT",
+    "OPENROWSET", "OPENQUERY", "OPENDATASOURCE",
+    "DISABLE", "ENABLE", "CHECKPOINT", "SETUSER", "REVERT", "IDENTITY_INSERT",
+    # Service Broker: RECEIVE, SEND, MOVE/GET/BEGIN/END CONVERSATION, BEGIN DIALOG
+    "RECEIVE", "SEND", "MOVE", "CONVERSATION", "DIALOG",
+})
+
+
+# Schnellprüfung auf Bytes: nur Buchstaben, '_', '@' und '#' bilden Wörter, alles andere
+# (auch Ziffern, '$' und Nicht-ASCII) trennt. Das zerlegt höchstens feiner als T-SQL,
+# ein Schlüsselwort kann so nicht in einem längeren Wort verschwinden. Die Tabelle
+# wandelt zugleich in Großbuchstaben.
+_WORD_BYTES = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_@#")
+_SEPARATE = bytes(ord(chr(c).upper()) if c in _WORD_BYTES else 32 for c in range(256))
+_FIRST_WORD = re.compile(_WORD)
+# Leerraum und Kommentare vor dem ersten Wort; verschachtelte Blockkommentare überlässt
+# die Schnellprüfung dem Tokenizer
+_LEADING = re.compile(r"(?:\s+|--[^\n]*|/\*(?:(?!/\*)[\s\S])*?\*/)*")
+_QUICK_FORBIDDEN = frozenset(w.encode() for w in FORBIDDEN | {"INTO"})
+
+
+class Verdict(NamedTuple):
+    read_only: bool
+    reason: Optional[str]
+    statements: int
+
+
+class Token(NamedTuple):
+    kind: str  # word (value in Großbuchstaben), name (ohne Klammern/Anführungszeichen), string, punct
+    value: str
+    start: int
+    end: int
+    depth: int  # Klammertiefe; 0 = oberste Ebene des Statements
+
+
+class _Unterminated(ValueError):
+    pass
+
+
+def _words(query: str) -> List[str]:
+    """Schlüsselwörter und Namen in Großbuchstaben; ';' trennt Statements."""
+    text = _MASK.sub(" ", query)
+    if "/*" in text:
+        return _scan(query)
+    if "'" in text or '"' in text or "[" in text:
+        raise _Unterminated("Nicht abgeschlossenes Literal oder Bezeichner")
+    return list(map(str.upper, _WORDS.findall(text)))
+
+
+def _scan(query: str) -> List[str]:
+    words: List[str] = []
+    pos = 0
+    length = len(query)
+    while pos < length:
+        restart = None
+        for match in _TOKEN.finditer(query, pos):
+            kind = match.lastgroup
+            if kind == "word":
+                words.append(match.group().upper())
+            elif kind == "semicolon":
+                words.append(";")
+            elif kind == "unterminated":
+                raise _Unterminated("Nicht abgeschlossenes Literal oder Bezeichner")
+            elif kind == "block_comment":
+                restart = _skip_block_comment(query, match.end())
+                break
+        if restart is None:
+            break
+        pos = restart
+    return words
+
+
+def _skip_block_comment(query: str, pos: int) -> int:
+    # T-SQL-Blockkommentare dürfen verschachtelt sein
+    depth = 1
+    for match in _BLOCK.finditer(query, pos):
+        depth += 1 if match.group() == "/*" else -1
+        if depth == 0:
+            return match.end()
+    raise _Unterminated("Nicht abgeschlossener Kommentar")
+
+
+def iter_tokens(query: str) -> Iterator[Token]:
+    """
+    Token mit Position und Klammertiefe, z.B. um eine Abfrage umzuschreiben.
+    Erwartet eine bereits mit classify geprüfte Abfrage; Kommentare entfallen.
+    """
+    depth = 0
+    pos = 0
+    length = len(query)
+    while pos < length:
+        restart = None
+        for match in _STRUCTURE.finditer(query, pos):
+            kind = match.lastgroup
+            text = match.group()
+            if kind == "line_comment":
+                continue
+            if kind == "block_comment":
+                restart = _skip_block_comment(query, match.end())
+                break
+            if kind == "word":
+                text = text.upper()
+            elif kind == "name":
+                text = text[1:-1].replace(text[-1] * 2, text[-1])
+            elif text == ")":
+                depth = max(depth - 1, 0)
+            yield Token(kind, text, match.start(), match.end(), depth)
+            if text == "(" and kind == "punct":
+                depth += 1
+        if restart is None:
+            break
+        pos = restart
+
+
+_VERBATIM = re.compile(rf"(?P<line_comment>{_LINE_COMMENT})|(?P<block_comment>/\*)|{_STRING}|{_BRACKET}|{_QUOTED}", re.S)
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Kanonische Form für Cache-Schlüssel: Leerraum wird zusammengefasst und Kommentare
+    entfallen, Literale und Bezeichner in `[...]`/`"..."` bleiben unverändert. Ein
+    Zeilenkommentar endet dabei am Zeilenende, sodass nachfolgender Text erhalten bleibt.
+    """
+    parts: List[str] = []
+
+    def space(text: str) -> None:
+        text = _SPACE.sub(" ", text)
+        if text.startswith(" ") and parts and parts[-1].endswith(" "):
+            text = text[1:]
+        if text:
+            parts.append(text)
+
+    pos = 0
+    length = len(query)
+    while pos < length:
+        match = _VERBATIM.search(query, pos)
+        if match is None:
+            space(query[pos:])
+            break
+        space(query[pos:match.start()])
+        kind = match.lastgroup
+        if kind == "line_comment":
+            space(" ")
+            pos = match.end()
+        elif kind == "block_comment":
+            space(" ")
+            try:
+                pos = _skip_block_comment(query, match.end())
+            except _Unterminated:
+                break
+        else:
+            parts.append(match.group())
+            pos = match.end()
+    return "".join(parts).strip().rstrip(";").rstrip()
+
+
+def _quick_read_only(query: str) -> bool:
+    """
+    Häufigster Fall ohne Tokenizer: ein einzelnes Statement, in dem kein verbotenes
+    Wort vorkommt, auch nicht in Literalen oder Kommentaren. False heißt nur
+    "genauer prüfen".
+    """
+    if ";" in query:
+        return False
+    if query.count("'") % 2 or query.count('"') % 2 or query.count("/*") != query.count("*/"):
+        return False
+    first = _FIRST_WORD.match(query, _LEADING.match(query).end())
+    if first is None or first.group().upper() not in FIRST_STATEMENTS:
+        return False
+    return _QUICK_FORBIDDEN.isdisjoint(query.encode("utf-8").translate(_SEPARATE).split())
+
+
+def classify(query: str) -> Verdict:
+    if _quick_read_only(query):
+        return Verdict(True, None, 1)
+    try:
+        words = _words(query)
+    except _Unterminated as e:
+        return Verdict(False, str(e), 0)
+    statements = 0
+    expect_start = True
+    previous = ""
+    for word in words:
+        if word == ";":
+            expect_start = True
+            previous = word
+            continue
+        if expect_start:
+            allowed = FIRST_STATEMENTS if statements == 0 else STATEMENTS
+            if word not in allowed:
+                return Verdict(False, f"Statement beginnt mit '{word}'", statements)
+            statements += 1
+            expect_start = False
+        if word in FORBIDDEN:
+            return Verdict(False, f"Schlüsselwort '{word}' ist nicht erlaubt", statements)
+        if previous == "INTO" and not word.startswith("@"):
+            # SELECT ... INTO legt eine Tabelle an; FETCH ... INTO @var ist erlaubt
+            return Verdict(False, "SELECT ... INTO ist nicht erlaubt", statements)
+        previous = word
+    if previous == "INTO":
+        return Verdict(False, "SELECT ... INTO ist nicht erlaubt", statements)
+    if statements == 0:
+        return Verdict(False, "Leere Abfrage", 0)
+    return Verdict(True, None, statements)
+
+
+@lru_cache(maxsize=4096)
+def cached_classify(query: str) -> Verdict:
+    """classify mit LRU-Cache: wiederholte Abfragen (Agenten, Refresh) werden nicht erneut zerlegt."""
+    return classify(query)
+
+
+def is_read_only(query: str) -> bool:
+    return cached_classify(query).read_only
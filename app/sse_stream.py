@@ -0,0 +1,218 @@
+"""
+Abfragen als Server-Sent Events für /sse.
+
+Jede Abfrage läuft als eigener Task und schreibt ihre Ereignisse in einen
+begrenzten Puffer; verbundene Clients lesen daraus. Ereignisse:
+
+    start     {stream_id, query}
+    rows      {seq, rows} bzw. {seq, columns, rows} – sobald SSE_CHUNK_ROWS Zeilen
+              vom Proxy geparst sind oder SSE_PROGRESS_INTERVAL verstrichen ist
+    progress  {row_count, elapsed}
+    done      {row_count, elapsed, truncated, estimated_rows?}
+    error     {error, error_type}
+
+Die Ereignis-Id hat die Form `<stream_id>:<n>`. Nach einem Verbindungsabbruch
+setzt ein Client mit `Last-Event-ID` beim nächsten Ereignis fort, solange es noch
+im Puffer liegt. Ist der Puffer voll und noch nicht abgeholt, wartet die Abfrage
+(und damit der Proxy-Stream) auf den Client; nach SSE_RETENTION Sekunden ohne
+Client wird sie abgebrochen. Während keine Ereignisse anfallen, hält ein
+Kommentar alle SSE_HEARTBEAT Sekunden die Verbindung offen.
+"""
+import asyncio
+import json
+import logging
+import secrets
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, NamedTuple, Optional, Tuple
+
+from .result_format import ColumnarResult, check_format
+
+logger = logging.getLogger("mcp-proalpha-http")
+
+SSE_FORMATS = ("records", "columnar")
+
+
+class StreamLimitExceeded(Exception):
+    """Zu viele gleichzeitig laufende SSE-Abfragen."""
+
+
+class _Abandoned(Exception):
+    pass
+
+
+class Event(NamedTuple):
+    id: int
+    name: str
+    data: str
+
+
+def parse_event_id(value: Optional[str]) -> Optional[Tuple[str, int]]:
+    """`<stream_id>:<n>` aus Last-Event-ID; None bei fehlender oder fremder Id."""
+    if not value:
+        return None
+    stream_id, _, number = value.strip().rpartition(":")
+    if not stream_id or not number.isdigit():
+        return None
+    return stream_id, int(number)
+
+
+class QueryStream:
+    def __init__(
+        self, stream_id: str, query: str, fmt: str, chunk_rows: int, buffer_events: int,
+        progress_interval: float, idle_timeout: float,
+    ):
+        self.stream_id = stream_id
+        self.query = query
+        self.fmt = fmt
+        self.chunk_rows = max(1, chunk_rows)
+        self.progress_interval = progress_interval
+        self.idle_timeout = idle_timeout
+        self.events: Deque[Event] = deque(maxlen=max(2, buffer_events))
+        self.finished = False
+        # Höchste Id, die ein Client abgeholt hat; ältere Ereignisse dürfen verdrängt werden
+        self.acked = 0
+        self._next_id = 1
+        self._cond = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+    def format(self, event: Event) -> str:
+        return f"id: {self.stream_id}:{event.id}\nevent: {event.name}\ndata: {event.data}\n\n"
+
+    async def _publish(self, name: str, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload, default=str)
+        async with self._cond:
+            while len(self.events) == self.events.maxlen and self.events[0].id > self.acked:
+                try:
+                    await asyncio.wait_for(self._cond.wait(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    raise _Abandoned()
+            self.events.append(Event(self._next_id, name, data))
+            self._next_id += 1
+            self._cond.notify_all()
+
+    async def produce(self, db) -> None:
+        start = time.monotonic()
+        info: Dict[str, Any] = {}
+        count = 0
+        seq = 0
+        chunk = ColumnarResult()
+        last_progress = start
+
+        async def flush() -> None:
+            nonlocal chunk, seq
+            payload = chunk.to_payload(self.fmt)
+            await self._publish("rows", {"seq": seq, "rows": payload} if self.fmt == "records" else {"seq": seq, **payload})
+            seq += 1
+            chunk = ColumnarResult()
+
+        try:
+            await self._publish("start", {"stream_id": self.stream_id, "query": self.query})
+            async for row in db.stream_guarded_async(self.query, info, long_lived=True):
+                chunk.append_record(row)
+                count += 1
+                if len(chunk) >= self.chunk_rows:
+                    await flush()
+                now = time.monotonic()
+                if now - last_progress >= self.progress_interval:
+                    # Langsam eintreffende Zeilen nicht bis zum vollen Abschnitt zurückhalten
+                    if len(chunk):
+                        await flush()
+                    await self._publish("progress", {"row_count": count, "elapsed": round(now - start, 3)})
+                    last_progress = now
+            if len(chunk):
+                await flush()
+            done = {"row_count": count, "elapsed": round(time.monotonic() - start, 3), "truncated": info["truncated"]}
+            if info.get("estimated_rows") is not None:
+                done["estimated_rows"] = info["estimated_rows"]
+            await self._publish("done", done)
+        except _Abandoned:
+            logger.info(f"SSE-Abfrage {self.stream_id} ohne Client abgebrochen")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            try:
+                await self._publish("error", {"error": str(e), "error_type": type(e).__name__})
+            except _Abandoned:
+                pass
+        finally:
+            async with self._cond:
+                self.finished = True
+                self._cond.notify_all()
+
+    async def listen(self, after: int, heartbeat: float) -> AsyncIterator[str]:
+        """SSE-Text ab dem Ereignis nach `after`; Kommentare als Heartbeat, solange nichts anfällt."""
+        position = after
+        while True:
+            async with self._cond:
+                oldest = self.events[0].id if self.events else self._next_id
+                expired = position + 1 < oldest
+                pending = [e for e in self.events if e.id > position]
+                if not expired and not pending:
+                    if self.finished:
+                        return
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), heartbeat)
+                        continue
+                    except asyncio.TimeoutError:
+                        pending = None
+            if expired:
+                gap = {"error": f"Ereignisse vor {self.stream_id}:{oldest} sind nicht mehr verfügbar",
+                       "error_type": "EventsExpired"}
+                yield f"event: error\ndata: {json.dumps(gap)}\n\n"
+                return
+            if pending is None:
+                yield ": heartbeat\n\n"
+                continue
+            for event in pending:
+                # yield kehrt erst zurück, wenn der Server das Ereignis abgegeben hat
+                yield self.format(event)
+                position = event.id
+            async with self._cond:
+                self.acked = max(self.acked, position)
+                self._cond.notify_all()
+
+    def exhausted(self, after: int) -> bool:
+        """Abfrage beendet und alle Ereignisse nach `after` bereits ausgeliefert."""
+        return self.finished and (not self.events or self.events[-1].id <= after)
+
+
+class StreamRegistry:
+    """Laufende und kürzlich beendete SSE-Abfragen einer Event-Loop."""
+
+    def __init__(self, max_streams: int, retention: float):
+        self.max_streams = max_streams
+        self.retention = retention
+        self._streams: Dict[str, QueryStream] = {}
+
+    def get(self, stream_id: str) -> Optional[QueryStream]:
+        return self._streams.get(stream_id)
+
+    def start(
+        self, db, query: str, fmt: str = "records", chunk_rows: int = 500, buffer_events: int = 256,
+        progress_interval: float = 1.0,
+    ) -> QueryStream:
+        if fmt not in SSE_FORMATS:
+            check_format(fmt)
+            raise ValueError(f"Format '{fmt}' wird für SSE nicht unterstützt, erlaubt: {', '.join(SSE_FORMATS)}")
+        # Prüfung vorab, damit ein Fehler als 400 statt als Ereignis ankommt
+        db.validate_query(query)
+        running = sum(1 for s in self._streams.values() if not s.finished)
+        if running >= self.max_streams:
+            raise StreamLimitExceeded(f"Zu viele laufende SSE-Abfragen (höchstens {self.max_streams})")
+        stream = QueryStream(
+            secrets.token_urlsafe(9), query, fmt, chunk_rows, buffer_events, progress_interval, self.retention
+        )
+        self._streams[stream.stream_id] = stream
+        stream.task = asyncio.ensure_future(stream.produce(db))
+        stream.task.add_done_callback(lambda _: self._expire_later(stream.stream_id))
+        return stream
+
+    def _expire_later(self, stream_id: str) -> None:
+        # Beendete Abfragen bleiben für ein Fortsetzen per Last-Event-ID noch erhalten
+        asyncio.get_running_loop().call_later(self.retention, self._streams.pop, stream_id, None)
+
+    def cancel_all(self) -> None:
+        for stream in self._streams.values():
+            if stream.task is not None:
+                stream.task.cancel()
@@ -0,0 +1,247 @@
+import asyncio
+import codecs
+import json
+import logging
+import re
+import secrets
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .result_format import ColumnarResult
+
+logger = logging.getLogger("mcp-proalpha")
+
+# Kanonische Proxy-Antwort: {"results": [...]} oder direkt eine Liste
+_RESULTS_START = re.compile(r'\s*(?:\{\s*"results"\s*:\s*)?\[')
+# So viele Zeichen reichen, um die Form der Antwort zu erkennen
+_SNIFF_CHARS = 64
+_WHITESPACE = " \t\r\n"
+
+
+class ResultLimitExceeded(ValueError):
+    """Das Ergebnis überschreitet die konfigurierte Zeilen- oder Byte-Obergrenze."""
+
+
+def parse_results(data: Any) -> List[Dict[str, Any]]:
+    """Wertet eine vollständig geparste Proxy-Antwort aus."""
+    if "error" in data:
+        raise ValueError(f"API-Fehler: {data['error']}")
+    if "results" in data:
+        return data["results"]
+    logger.warning("Unerwartete API-Antwortstruktur, versuche direktes Parsen")
+    return data if isinstance(data, list) else []
+
+
+class ResultStreamParser:
+    """
+    Zerlegt eine Proxy-Antwort inkrementell in einzelne Ergebniszeilen.
+
+    Bei der üblichen Form `{"results": [...]}` wird jede Zeile geliefert, sobald sie
+    vollständig empfangen ist, und der Puffer danach gekürzt; der Speicherbedarf
+    hängt damit nur von der größten Zeile ab. Andere Antworten (z.B. `{"error": ...}`)
+    werden am Ende vollständig geparst.
+    """
+
+    def __init__(self, max_item_bytes: int):
+        self.max_item_bytes = max_item_bytes
+        self.bytes_read = 0
+        # Reine Parse-Zeit (ohne Warten auf den Proxy) für die Metriken
+        self.parse_seconds = 0.0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._state = "sniff"  # sniff -> items -> done | fallback
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        start = time.perf_counter()
+        self.bytes_read += len(chunk)
+        self._buf += self._decoder.decode(chunk)
+        try:
+            return self._drain(final=False)
+        finally:
+            self.parse_seconds += time.perf_counter() - start
+
+    def close(self) -> List[Any]:
+        start = time.perf_counter()
+        try:
+            self._buf += self._decoder.decode(b"", final=True)
+            items = self._drain(final=True)
+            if self._state == "fallback":
+                return parse_results(json.loads(self._buf))
+            if self._state == "items":
+                raise ValueError("Unvollständige Antwort des SQL-Proxys")
+            return items
+        finally:
+            self.parse_seconds += time.perf_counter() - start
+
+    def _drain(self, final: bool) -> List[Any]:
+        if self._state == "sniff":
+            if len(self._buf) < _SNIFF_CHARS and not final:
+                return []
+            match = _RESULTS_START.match(self._buf)
+            if match:
+                self._buf = self._buf[match.end():]
+                self._state = "items"
+            else:
+                self._state = "fallback"
+        if self._state == "fallback":
+            if len(self._buf) > self.max_item_bytes:
+                raise ResultLimitExceeded(f"Antwort des SQL-Proxys überschreitet {self.max_item_bytes} Bytes")
+            return []
+        if self._state != "items":
+            return []
+
+        items = []
+        buf = self._buf
+        pos = 0
+        while True:
+            while pos < len(buf) and (buf[pos] in _WHITESPACE or buf[pos] == ","):
+                pos += 1
+            if pos >= len(buf):
+                break
+            if buf[pos] == "]":
+                self._state = "done"
+                pos = len(buf)
+                break
+            try:
+                item, end = self._json.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Zeile noch unvollständig
+                break
+            if end == len(buf) and not isinstance(item, (dict, list, str)) and not final:
+                # Zahl/Literal am Pufferende kann noch weitergehen
+                break
+            items.append(item)
+            pos = end
+        self._buf = buf[pos:]
+        if len(self._buf) > self.max_item_bytes:
+            raise ResultLimitExceeded(f"Ergebniszeile überschreitet {self.max_item_bytes} Bytes")
+        return items
+
+
+class _Cursor:
+    __slots__ = ("rows", "pending", "loop", "expires")
+
+    def __init__(self, rows: AsyncIterator[Dict[str, Any]], pending: List[Dict[str, Any]], loop, expires: float):
+        self.rows = rows
+        self.pending = pending
+        self.loop = loop
+        self.expires = expires
+
+
+class CursorRegistry:
+    """
+    Offene Ergebnis-Streams für die seitenweise Abfrage mit Fortsetzungs-Token.
+
+    Ein Cursor hält den Proxy-Stream offen und liest nur so viele Zeilen wie die
+    nächste Seite braucht. Nicht abgeholte Cursor verfallen nach `ttl` Sekunden und
+    werden dann von einem Timer in ihrer Event-Loop geschlossen; es sind höchstens
+    `max_open` gleichzeitig offen. Vor dem Start eines neuen Cursors werden bei Bedarf
+    die ältesten geschlossen, damit der neue eine freie Verbindung bekommt.
+    """
+
+    def __init__(self, ttl: float, max_open: int):
+        self.ttl = ttl
+        self.max_open = max_open
+        self._cursors: Dict[str, _Cursor] = {}
+        self._lock = threading.Lock()
+
+    async def start(self, rows: AsyncIterator[Dict[str, Any]], page_size: int) -> Tuple[ColumnarResult, Optional[str]]:
+        await self._make_room()
+        return await self._page(_Cursor(rows, [], asyncio.get_running_loop(), 0.0), page_size, None)
+
+    async def fetch(self, token: str, page_size: int) -> Tuple[ColumnarResult, Optional[str]]:
+        with self._lock:
+            cursor = self._cursors.pop(token, None)
+        if cursor is None or cursor.expires < time.monotonic():
+            if cursor is not None:
+                self._close(cursor)
+            raise ValueError("Unbekannter oder abgelaufener Cursor")
+        if cursor.loop is not asyncio.get_running_loop():
+            with self._lock:
+                self._cursors[token] = cursor
+            raise ValueError("Cursor gehört zu einer anderen Verbindung (MCP bzw. REST)")
+        return await self._page(cursor, page_size, token)
+
+    async def _page(
+        self, cursor: _Cursor, page_size: int, token: Optional[str]
+    ) -> Tuple[ColumnarResult, Optional[str]]:
+        page = ColumnarResult()
+        for row in cursor.pending[:page_size]:
+            page.append_record(row)
+        cursor.pending = cursor.pending[page_size:]
+        try:
+            # Eine Zeile mehr lesen, um zu wissen, ob es eine weitere Seite gibt
+            while len(page) + len(cursor.pending) <= page_size:
+                row = await cursor.rows.__anext__()
+                if len(page) < page_size:
+                    page.append_record(row)
+                else:
+                    cursor.pending.append(row)
+        except StopAsyncIteration:
+            pass
+        except BaseException:
+            await cursor.rows.aclose()
+            raise
+        next_token = None
+        if cursor.pending:
+            next_token = token or secrets.token_urlsafe(16)
+            cursor.expires = time.monotonic() + self.ttl
+            self._register(next_token, cursor)
+        else:
+            await cursor.rows.aclose()
+        return page, next_token
+
+    def _register(self, token: str, cursor: _Cursor) -> None:
+        closing = self._evict(self.max_open - 1)
+        with self._lock:
+            self._cursors[token] = cursor
+        for old in closing:
+            self._close(old)
+        # Verfallene Cursor auch dann schließen, wenn keine weitere Anfrage kommt
+        cursor.loop.call_later(self.ttl + 0.05, self.sweep)
+
+    def _evict(self, keep: int) -> List[_Cursor]:
+        """Entfernt verfallene und darüber hinaus die ältesten Cursor, bis höchstens `keep` offen sind."""
+        now = time.monotonic()
+        with self._lock:
+            stale = [t for t, c in self._cursors.items() if c.expires < now]
+            while len(self._cursors) - len(stale) > max(keep, 0):
+                oldest = min(
+                    (t for t in self._cursors if t not in stale), key=lambda t: self._cursors[t].expires
+                )
+                stale.append(oldest)
+            return [self._cursors.pop(t) for t in stale]
+
+    async def _make_room(self) -> None:
+        loop = asyncio.get_running_loop()
+        for old in self._evict(self.max_open - 1):
+            if old.loop is loop:
+                # Abwarten, damit die Verbindung wieder im Pool ist, bevor der neue Stream sie braucht
+                await old.rows.aclose()
+            else:
+                self._close(old)
+
+    def sweep(self) -> None:
+        """Schließt alle verfallenen Cursor."""
+        for old in self._evict(self.max_open):
+            self._close(old)
+
+    @staticmethod
+    def _close(cursor: _Cursor) -> None:
+        """Schließt den Stream in seiner eigenen Event-Loop (gibt die Proxy-Verbindung frei)."""
+        if cursor.loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is cursor.loop:
+            cursor.loop.create_task(cursor.rows.aclose())
+        else:
+            asyncio.run_coroutine_threadsafe(cursor.rows.aclose(), cursor.loop)
+
+    def open_count(self) -> int:
+        with self._lock:
+            return len(self._cursors)
@@ -1,14 +1,15 @@
 # Placeholder for future tool logic or custom MCP tools
 # You can implement additional MCP tools here if needed
 
+def tool_entry(tool) -> dict:
+    """Name, Beschreibung und Parameter eines Tools."""
+    return {
+        "name": getattr(tool, "name", None) or getattr(tool, "__name__", None),
+        "description": getattr(tool, "description", ""),
+        "parameters": getattr(tool, "parameters", None),
+    }
+
+
 def list_all_tools(mcp_instance) -> list:
     """Gibt eine Liste aller verfügbaren Tools mit Beschreibung und Parametern zurück."""
-    result = []
-    for tool in getattr(mcp_instance._tool_manager, "_tools", {}).values():
-        entry = {
-            "name": getattr(tool, "name", None) or getattr(tool, "__name__", None),
-            "description": getattr(tool, "description", ""),
-            "parameters": getattr(tool, "parameters", None),
-        }
-        result.append(entry)
-    return result
+    return [tool_entry(tool) for tool in getattr(mcp_instance._tool_manager, "_tools", {}).values()]
@@ -0,0 +1,205 @@
+"""
+Gemultiplextes Protokoll für den WebSocket-Endpunkt /ws.
+
+Nachrichten mit `request_id` laufen als eigene Tasks parallel (höchstens
+WS_MAX_IN_FLIGHT je Verbindung); jede Antwort trägt die `request_id` der Anfrage.
+Ergebnisse von execute_sql und get_table_sample kommen als Folge von Frames;
+execute_sql ohne Cache-Treffer wird dabei direkt vom Proxy weitergereicht:
+
+    {"request_id": "a", "type": "start", "columns": [...]}
+    {"request_id": "a", "type": "rows", "seq": 0, "rows": [...]}      (je WS_CHUNK_ROWS Zeilen)
+    {"request_id": "a", "type": "done", "row_count": 1234, "truncated": false}
+
+`rows` folgt `parameters.format`: Dicts (records), Zeilen-Arrays (columnar) oder
+je Spalte ein Array mit den Werten des Abschnitts (columns).
+
+Fehler kommen als `{"request_id", "type": "error", "error"}`. `{"id": "cancel",
+"request_id": "a"}` bricht eine laufende Anfrage ab (Antwort `type: cancelled`),
+ein Verbindungsabbruch bricht alle ab; die Proxy-Anfrage wird dabei geschlossen.
+
+Nachrichten ohne `request_id` werden wie bisher der Reihe nach beantwortet
+(`{"result": ...}` bzw. `{"error": ...}`).
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from .result_format import ColumnarResult, check_format
+
+logger = logging.getLogger("mcp-proalpha-http")
+
+TOOLS = ("execute_sql", "get_table_sample")
+
+
+class WebSocketSession:
+    def __init__(self, websocket: WebSocket, db, max_in_flight: int, chunk_rows: int):
+        self.websocket = websocket
+        self.db = db
+        self.max_in_flight = max(1, max_in_flight)
+        self.chunk_rows = max(1, chunk_rows)
+        self.tasks: Dict[str, asyncio.Task] = {}
+        # Frames verschiedener Anfragen dürfen sich nur an Frame-Grenzen abwechseln
+        self._send_lock = asyncio.Lock()
+        # Anfragen ohne request_id werden in Eingangsreihenfolge beantwortet
+        self._legacy_lock = asyncio.Lock()
+
+    async def run(self) -> None:
+        try:
+            while True:
+                data = await self.websocket.receive_text()
+                try:
+                    msg = json.loads(data)
+                    if not isinstance(msg, dict):
+                        raise ValueError("Nachricht muss ein JSON-Objekt sein")
+                except ValueError as e:
+                    await self.send({"error": str(e)})
+                    continue
+                self.dispatch(msg)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in list(self.tasks.values()):
+                task.cancel()
+            if self.tasks:
+                await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
+    def dispatch(self, msg: Dict[str, Any]) -> None:
+        request_id = msg.get("request_id")
+        if request_id is None:
+            self._spawn(None, self._legacy(msg))
+            return
+        request_id = str(request_id)
+        if msg.get("id") == "cancel":
+            task = self.tasks.get(request_id)
+            if task is not None:
+                task.cancel()
+            return
+        if request_id in self.tasks:
+            self._spawn(None, self._error(request_id, "request_id wird bereits verwendet"))
+        elif sum(1 for key in self.tasks if not key.startswith("\0")) >= self.max_in_flight:
+            self._spawn(None, self._error(request_id, f"Zu viele laufende Anfragen (höchstens {self.max_in_flight})"))
+        else:
+            self._spawn(request_id, self._handle(request_id, msg))
+
+    def _spawn(self, request_id: Optional[str], coro) -> None:
+        # Interne Tasks (Legacy, Fehlerantworten) erhalten einen Schlüssel, den kein Client senden kann
+        key = request_id if request_id is not None else f"\0{id(coro)}"
+        task = asyncio.ensure_future(coro)
+        self.tasks[key] = task
+        task.add_done_callback(lambda _: self.tasks.pop(key, None))
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        text = json.dumps(message, default=str)
+        async with self._send_lock:
+            # Wartet, bis der Frame abgegeben ist; ein langsamer Client bremst so den Versand
+            await self.websocket.send_text(text)
+
+    async def _error(self, request_id: str, error: str) -> None:
+        await self.send({"request_id": request_id, "type": "error", "error": error})
+
+    async def _legacy(self, msg: Dict[str, Any]) -> None:
+        async with self._legacy_lock:
+            try:
+                tool = msg.get("id")
+                if tool not in TOOLS:
+                    await self.send({"error": "Unknown tool id"})
+                    return
+                fmt = check_format(msg["parameters"].get("format", "records"))
+                result = await self._run_tool(tool, msg["parameters"])
+                reply = {"result": result.to_payload(fmt)}
+                if tool == "execute_sql":
+                    reply["truncated"] = result.truncated
+                await self.send(reply)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self.send({"error": str(e)})
+
+    async def _handle(self, request_id: str, msg: Dict[str, Any]) -> None:
+        try:
+            tool = msg.get("id")
+            if tool not in TOOLS:
+                raise ValueError("Unknown tool id")
+            params = msg.get("parameters") or {}
+            fmt = check_format(params.get("format", "records"))
+            if tool == "execute_sql":
+                cached = self.db.cached_result(params["query"]) if params.get("use_cache", True) else None
+                if cached is None:
+                    await self._stream_rows(request_id, params["query"], fmt)
+                    return
+                await self._stream(request_id, cached, fmt)
+                return
+            result = await self._run_tool(tool, params)
+            await self._stream(request_id, result, fmt)
+        except asyncio.CancelledError:
+            await self._send_cancelled(request_id)
+            raise
+        except Exception as e:
+            await self._error(request_id, str(e))
+
+    async def _send_cancelled(self, request_id: str) -> None:
+        try:
+            await asyncio.shield(self.send({"request_id": request_id, "type": "cancelled"}))
+        except Exception:
+            pass  # Verbindung bereits geschlossen
+
+    async def _run_tool(self, tool: str, params: Dict[str, Any]) -> ColumnarResult:
+        use_cache = params.get("use_cache", True)
+        if tool == "execute_sql":
+            return await self.db.execute_query_result_async(params["query"], use_cache=use_cache)
+        return await self.db.get_table_sample_result_async(
+            params["table_name"], params.get("limit", 10), use_cache=use_cache
+        )
+
+    async def _stream(self, request_id: str, result: ColumnarResult, fmt: str) -> None:
+        await self.send({"request_id": request_id, "type": "start", "columns": result.columns})
+        for seq, start in enumerate(range(0, len(result), self.chunk_rows)):
+            chunk = result.slice(start, start + self.chunk_rows).to_payload(fmt)
+            await self.send({"request_id": request_id, "type": "rows", "seq": seq, "rows": _rows(chunk, fmt)})
+        done = {"request_id": request_id, "type": "done", "row_count": len(result), "truncated": result.truncated}
+        if result.estimated_rows is not None:
+            done["estimated_rows"] = result.estimated_rows
+        await self.send(done)
+
+    async def _stream_rows(self, request_id: str, query: str, fmt: str) -> None:
+        """
+        Frames direkt aus den Proxy-Zeilen: jeder Abschnitt wird gesendet, sobald er voll
+        ist, und erst nach dessen Abgabe wird weitergelesen (Gegendruck bis zum Proxy).
+        """
+        info: Dict[str, Any] = {}
+        count = 0
+        seq = 0
+        chunk = ColumnarResult()
+
+        async def flush() -> None:
+            nonlocal chunk, seq
+            if seq == 0:
+                await self.send({"request_id": request_id, "type": "start", "columns": chunk.columns})
+            rows = _rows(chunk.to_payload(fmt), fmt)
+            await self.send({"request_id": request_id, "type": "rows", "seq": seq, "rows": rows})
+            seq += 1
+            chunk = ColumnarResult()
+
+        async for row in self.db.stream_guarded_async(query, info):
+            chunk.append_record(row)
+            count += 1
+            if len(chunk) >= self.chunk_rows:
+                await flush()
+        if len(chunk):
+            await flush()
+        elif seq == 0:
+            await self.send({"request_id": request_id, "type": "start", "columns": []})
+        done = {"request_id": request_id, "type": "done", "row_count": count, "truncated": info["truncated"]}
+        if info.get("estimated_rows") is not None:
+            done["estimated_rows"] = info["estimated_rows"]
+        await self.send(done)
+
+
+def _rows(payload: Any, fmt: str) -> Any:
+    # Spaltennamen stehen schon im start-Frame
+    if fmt == "records":
+        return payload
+    return payload["rows"] if fmt == "columnar" else payload["data"]
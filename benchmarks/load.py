@@ -0,0 +1,278 @@
+"""
+Lastgenerator für einen laufenden `python -m app`: N gleichzeitige MCP-Clients
+über streamable-http (/mcp) sowie REST- (/api/*) und WebSocket-Clients (/ws) mit
+einstellbarem Mix aus execute_sql, get_table_sample und Schema-Lesezugriffen.
+
+    # gegen einen laufenden Server
+    python -m benchmarks.load --mcp-url http://localhost:8000/mcp --api-url http://localhost:8081 \\
+        --mcp-clients 20 --rest-clients 20 --ws-clients 5 --duration 30
+
+    # Fake-SQL-Proxy und Server selbst starten
+    python -m benchmarks.load --spawn --mcp-clients 20 --rest-clients 20 --ws-clients 5
+
+Ausgegeben werden je Transport und Operation Anzahl, Fehler, Durchsatz und
+p50/p95/p99-Latenz. Blockiert etwas die Event-Loop oder wartet auf ein Lock,
+steigen p99 und fallen die Requests pro Sekunde, obwohl der Proxy nicht
+langsamer wird.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+try:
+    import websockets  # optional: nur für --ws-clients
+except ImportError:  # pragma: no cover - abhängig von der Installation
+    websockets = None
+
+from benchmarks.suite import ROOT, _free_port, start_proxy
+
+OPERATIONS = ("execute_sql", "get_table_sample", "schema")
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unbekannte Operation '{name}', erlaubt: {', '.join(OPERATIONS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-Rank-Methode
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        self.errors: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.last_error: Dict[Tuple[str, str], str] = {}
+
+    async def measure(self, transport: str, op: str, call: Callable[[], Awaitable]) -> None:
+        start = time.perf_counter()
+        try:
+            await call()
+        except Exception as e:
+            self.errors[(transport, op)] += 1
+            self.last_error[(transport, op)] = f"{type(e).__name__}: {e}"[:200]
+            return
+        self.latencies[(transport, op)].append(time.perf_counter() - start)
+
+    def report(self, duration: float) -> dict:
+        rows = {}
+        total = 0
+        for key in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies.get(key, []))
+            total += len(values)
+            rows["/".join(key)] = {
+                "ok": len(values),
+                "errors": self.errors.get(key, 0),
+                "rps": round(len(values) / duration, 1),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+                **({"last_error": self.last_error[key]} if key in self.last_error else {}),
+            }
+        return {"duration_s": round(duration, 2), "total_ok": total, "total_rps": round(total / duration, 1),
+                "operations": rows}
+
+
+class Workload:
+    """Wählt Operationen nach Gewicht und liefert die Parameter dafür."""
+
+    def __init__(self, mix: Dict[str, int], tables: List[str], query: Optional[str], use_cache: bool, seed: int):
+        self.ops = list(mix)
+        self.weights = [mix[o] for o in self.ops]
+        self.tables = tables
+        self.query = query
+        self.use_cache = use_cache
+        self.random = random.Random(seed)
+
+    def next(self) -> Tuple[str, str]:
+        return self.random.choices(self.ops, self.weights)[0], self.random.choice(self.tables)
+
+    def sql(self, table: str) -> str:
+        return self.query or f"SELECT TOP 50 * FROM [{table}]"
+
+
+async def mcp_worker(url: str, workload: Workload, recorder: Recorder, stop: float) -> None:
+    from fastmcp import Client
+
+    async with Client(url) as client:
+        while time.perf_counter() < stop:
+            op, table = workload.next()
+            if op == "execute_sql":
+                call = lambda: client.call_tool(
+                    "execute_sql", {"query": workload.sql(table), "use_cache": workload.use_cache})
+            elif op == "get_table_sample":
+                call = lambda: client.call_tool(
+                    "get_table_sample", {"table_name": table, "limit": 10, "use_cache": workload.use_cache})
+            else:
+                call = lambda: client.read_resource(f"table://{table}")
+            await recorder.measure("mcp", op, call)
+
+
+async def rest_worker(api_url: str, workload: Workload, recorder: Recorder, stop: float) -> None:
+    async with httpx.AsyncClient(base_url=api_url, timeout=60) as client:
+        async def request(method: str, path: str, **kwargs):
+            response = await client.request(method, path, **kwargs)
+            response.raise_for_status()
+
+        while time.perf_counter() < stop:
+            op, table = workload.next()
+            if op == "get_table_sample":
+                # Die REST-API hat keinen eigenen Stichproben-Endpunkt
+                body = {"query": f"SELECT TOP 10 * FROM [{table}]", "use_cache": workload.use_cache}
+                call = lambda: request("POST", "/api/query", json=body)
+            elif op == "execute_sql":
+                body = {"query": workload.sql(table), "use_cache": workload.use_cache}
+                call = lambda: request("POST", "/api/query", json=body)
+            else:
+                call = lambda: request("GET", f"/api/schema/tables/{table}")
+            await recorder.measure("rest", op, call)
+
+
+async def ws_worker(ws_url: str, workload: Workload, recorder: Recorder, stop: float) -> None:
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        async def roundtrip(message: dict):
+            await ws.send(json.dumps(message))
+            reply = json.loads(await ws.recv())
+            if "error" in reply:
+                raise RuntimeError(reply["error"])
+
+        while time.perf_counter() < stop:
+            op, table = workload.next()
+            if op == "schema":
+                # Der WebSocket kennt nur Tools; Schema-Lesen entfällt dort
+                op = "execute_sql"
+            if op == "execute_sql":
+                message = {"id": "execute_sql", "parameters": {"query": workload.sql(table), "use_cache": workload.use_cache}}
+            else:
+                message = {"id": "get_table_sample", "parameters": {"table_name": table, "limit": 10}}
+            await recorder.measure("ws", op, lambda: roundtrip(message))
+
+
+async def run_load(args, tables: List[str]) -> dict:
+    recorder = Recorder()
+    stop = time.perf_counter() + args.duration
+    workers = []
+    for i in range(args.mcp_clients):
+        workload = Workload(args.mix, tables, args.query, not args.no_cache, seed=i)
+        workers.append(mcp_worker(args.mcp_url, workload, recorder, stop))
+    for i in range(args.rest_clients):
+        workload = Workload(args.mix, tables, args.query, not args.no_cache, seed=1000 + i)
+        workers.append(rest_worker(args.api_url, workload, recorder, stop))
+    if args.ws_clients and websockets is None:
+        raise SystemExit("Für --ws-clients wird das Paket 'websockets' benötigt")
+    ws_url = args.api_url.replace("http", "ws", 1).rstrip("/") + "/ws"
+    for i in range(args.ws_clients):
+        workload = Workload(args.mix, tables, args.query, not args.no_cache, seed=2000 + i)
+        workers.append(ws_worker(ws_url, workload, recorder, stop))
+    start = time.perf_counter()
+    results = await asyncio.gather(*workers, return_exceptions=True)
+    duration = time.perf_counter() - start
+    report = recorder.report(duration)
+    failed = [f"{type(r).__name__}: {r}" for r in results if isinstance(r, BaseException)]
+    if failed:
+        report["failed_workers"] = failed[:10]
+    return report
+
+
+def wait_until_ready(api_url: str, timeout: float = 60) -> List[str]:
+    """Wartet, bis die REST-API antwortet und das Schema Tabellen enthält."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            tables = httpx.get(f"{api_url}/api/schema/tables", timeout=2).json()
+            if tables:
+                return tables
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Server unter {api_url} nicht bereit oder Schema leer")
+
+
+def spawn_server(args, cache_dir: str) -> Tuple[subprocess.Popen, subprocess.Popen]:
+    proxy = start_proxy(args)
+    mcp_port, api_port = _free_port(), _free_port()
+    env = os.environ.copy()
+    env.update(
+        DB_SERVER_HOST="http://127.0.0.1",
+        DB_SERVER_PORT=str(proxy.port),
+        MCP_TRANSPORT="streamable-http",
+        MCP_HOST="127.0.0.1",
+        MCP_PORT=str(mcp_port),
+        API_SERVER_PORT=str(api_port),
+        SCHEMA_CACHE_PATH=cache_dir,
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app"], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    args.mcp_url = f"http://127.0.0.1:{mcp_port}/mcp"
+    args.api_url = f"http://127.0.0.1:{api_port}"
+    return proxy, server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mcp-url", default="http://localhost:8000/mcp")
+    parser.add_argument("--api-url", default="http://localhost:8081")
+    parser.add_argument("--mcp-clients", type=int, default=10)
+    parser.add_argument("--rest-clients", type=int, default=10)
+    parser.add_argument("--ws-clients", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=20.0, help="Sekunden")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("execute_sql=5,get_table_sample=3,schema=2"),
+                        help="Gewichte je Operation, z.B. execute_sql=5,get_table_sample=3,schema=2")
+    parser.add_argument("--query", help="feste SQL-Abfrage für execute_sql (Standard: TOP 50 aus einer Tabelle)")
+    parser.add_argument("--no-cache", action="store_true", help="Ergebnis-Cache umgehen (use_cache=false)")
+    parser.add_argument("--spawn", action="store_true", help="Fake-SQL-Proxy und Server selbst starten")
+    # Parameter für --spawn (wie benchmarks.suite)
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--columns", type=int, default=15000)
+    parser.add_argument("--views", type=int, default=50)
+    parser.add_argument("--width", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--output", type=Path, help="Ergebnis als JSON speichern")
+    args = parser.parse_args()
+
+    processes = []
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            if args.spawn:
+                processes = list(spawn_server(args, tmp))
+            tables = wait_until_ready(args.api_url)
+            report = asyncio.run(run_load(args, tables))
+        finally:
+            for proc in reversed(processes):
+                proc.terminate()
+                proc.wait()
+    report["config"] = {
+        "mcp_clients": args.mcp_clients, "rest_clients": args.rest_clients, "ws_clients": args.ws_clients,
+        "mix": args.mix, "use_cache": not args.no_cache,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
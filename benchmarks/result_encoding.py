@@ -0,0 +1,55 @@
+"""
+Vergleicht Nutzlastgröße und Serialisierungszeit einer Ergebnismenge als Liste
+von Dicts (bisher) mit den Formaten "columnar" und "columns" sowie optional
+msgpack (falls installiert). Breite ProAlpha-Tabellen haben 100+ Spalten, der
+Spaltenname wird dort in jeder Zeile wiederholt.
+
+    python -m benchmarks.result_encoding --rows 20000 --columns 120
+"""
+import argparse
+import json
+import time
+
+from app.result_format import ColumnarResult, RESULT_FORMATS, encode_msgpack, msgpack
+
+
+def synthetic_rows(n_rows: int, n_columns: int) -> list:
+    names = [f"feld_{c:03d}_bezeichnung" for c in range(n_columns)]
+    return [
+        {name: (i * c if c % 3 == 0 else None if c % 3 == 1 else f"wert{i}") for c, name in enumerate(names)}
+        for i in range(n_rows)
+    ]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=120)
+    args = parser.parse_args()
+
+    records = synthetic_rows(args.rows, args.columns)
+    build_s, result = timed(ColumnarResult.from_records, records)
+    report = {"rows": args.rows, "columns": args.columns, "build_columnar_s": round(build_s, 3), "formats": {}}
+    for fmt in RESULT_FORMATS:
+        payload_s, payload = timed(result.to_payload, fmt)
+        json_s, body = timed(json.dumps, payload)
+        entry = {
+            "payload_s": round(payload_s, 3),
+            "json_s": round(json_s, 3),
+            "json_bytes": len(body.encode("utf-8")),
+        }
+        if msgpack is not None:
+            msgpack_s, packed = timed(encode_msgpack, payload)
+            entry.update(msgpack_s=round(msgpack_s, 3), msgpack_bytes=len(packed))
+        report["formats"][fmt] = entry
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
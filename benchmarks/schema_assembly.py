@@ -0,0 +1,90 @@
+"""
+Vergleicht den Aufbau des Schemas aus INFORMATION_SCHEMA-Zeilen: die frühere
+quadratische Zuordnung (Listen-Comprehension pro Tabelle) gegen `assemble_schema`.
+
+    python -m benchmarks.schema_assembly --tables 5000 --columns 150000
+
+Die quadratische Variante dauert bei voller Größe sehr lange; mit `--legacy-tables`
+wird sie auf einer Teilmenge der Tabellen gemessen und linear hochgerechnet.
+"""
+import argparse
+import copy
+import json
+import time
+
+from app.schema_index import assemble_schema
+
+DATA_TYPES = ["int", "nvarchar", "decimal", "datetime", "bit", "varchar", "date"]
+
+
+def synthetic_metadata(n_tables: int, n_columns: int, n_views: int):
+    tables = [{"TABLE_NAME": f"s_tab{i:05d}", "TABLE_TYPE": "BASE TABLE"} for i in range(n_tables)]
+    views = [{"TABLE_NAME": f"v_view{i:04d}"} for i in range(n_views)]
+    owners = [t["TABLE_NAME"] for t in tables] + [v["TABLE_NAME"] for v in views]
+    columns = []
+    for i in range(n_columns):
+        columns.append({
+            "TABLE_NAME": owners[i % len(owners)],
+            "COLUMN_NAME": f"feld{i}",
+            "DATA_TYPE": DATA_TYPES[i % len(DATA_TYPES)],
+            "IS_NULLABLE": "YES" if i % 3 else "NO",
+            "CHARACTER_MAXIMUM_LENGTH": 40 if i % 7 == 1 else None,
+        })
+    # Wie aus json.loads: jeder String-Wert ist ein eigenes Objekt
+    return json.loads(json.dumps([tables, columns, views]))
+
+
+def legacy_assemble(tables, columns, views, relationships):
+    tables_dict = {}
+    views_dict = {}
+    for table in tables:
+        tname = table["TABLE_NAME"]
+        tables_dict[tname] = {
+            "type": table["TABLE_TYPE"],
+            "columns": [col for col in columns if col["TABLE_NAME"] == tname]
+        }
+    for view in views:
+        vname = view["TABLE_NAME"]
+        views_dict[vname] = {
+            "columns": [col for col in columns if col["TABLE_NAME"] == vname]
+        }
+    return {"tables": tables_dict, "views": views_dict, "relationships": relationships}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=5000)
+    parser.add_argument("--columns", type=int, default=150000)
+    parser.add_argument("--views", type=int, default=500)
+    parser.add_argument("--legacy-tables", type=int, default=200,
+                        help="Anzahl Tabellen für die quadratische Messung (0 = alle)")
+    args = parser.parse_args()
+
+    tables, columns, views = synthetic_metadata(args.tables, args.columns, args.views)
+
+    cols = copy.deepcopy(columns)
+    start = time.perf_counter()
+    assemble_schema(tables, cols, views, [])
+    linear = time.perf_counter() - start
+
+    subset = tables[:args.legacy_tables] if args.legacy_tables else tables
+    legacy_views = [] if args.legacy_tables else views
+    start = time.perf_counter()
+    legacy_assemble(subset, columns, legacy_views, [])
+    legacy = time.perf_counter() - start
+    legacy_full = legacy * (len(tables) + len(views)) / (len(subset) + len(legacy_views))
+
+    print(json.dumps({
+        "tables": args.tables,
+        "columns": args.columns,
+        "views": args.views,
+        "assemble_schema_s": round(linear, 4),
+        "legacy_measured_s": round(legacy, 4),
+        "legacy_measured_objects": len(subset) + len(legacy_views),
+        "legacy_extrapolated_s": round(legacy_full, 2),
+        "speedup": round(legacy_full / linear, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Vergleicht das bisherige JSON-Layout des Schema-Caches (schema.json + eine
+Datei pro Tabelle/View, indent=2) mit dem SQLite-Store: Schreibzeit, Zeit für
+einen erneuten Refresh ohne Änderungen, Ladezeit und Platzbedarf.
+
+    python -m benchmarks.schema_cache_format --tables 5000 --columns 150000
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from app.schema_index import JsonSchemaSource, assemble_schema
+from app.schema_store import SchemaStore
+from benchmarks.schema_assembly import synthetic_metadata
+
+
+def legacy_write(cache_dir: Path, schema: dict) -> None:
+    (cache_dir / "tables").mkdir(exist_ok=True)
+    (cache_dir / "views").mkdir(exist_ok=True)
+    with open(cache_dir / "schema.json", "w") as f:
+        json.dump(schema, f, indent=2)
+    for key in ("tables", "views"):
+        for name, data in schema[key].items():
+            with open(cache_dir / key / f"{name}.json", "w") as f:
+                json.dump(data, f, indent=2)
+    with open(cache_dir / "relationships.json", "w") as f:
+        json.dump(schema["relationships"], f, indent=2)
+
+
+def disk_usage(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=5000)
+    parser.add_argument("--columns", type=int, default=150000)
+    parser.add_argument("--views", type=int, default=500)
+    args = parser.parse_args()
+
+    tables, columns, views = synthetic_metadata(args.tables, args.columns, args.views)
+    schema = assemble_schema(tables, columns, views, [])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_dir = Path(tmp) / "json"
+        json_dir.mkdir()
+        store = SchemaStore(Path(tmp) / "schema.db")
+
+        json_write, _ = timed(legacy_write, json_dir, schema)
+        json_rewrite, _ = timed(legacy_write, json_dir, schema)
+        json_load, _ = timed(JsonSchemaSource(json_dir / "schema.json").load)
+
+        sqlite_write, _ = timed(store.write, schema)
+        sqlite_rewrite, unchanged = timed(store.write, schema)
+        sqlite_load, loaded = timed(store.load)
+        assert loaded == json.loads(json.dumps(schema))
+
+        print(json.dumps({
+            "objects": args.tables + args.views,
+            "columns": args.columns,
+            "json": {
+                "write_s": round(json_write, 3),
+                "rewrite_unchanged_s": round(json_rewrite, 3),
+                "load_s": round(json_load, 3),
+                "files": sum(1 for p in json_dir.rglob("*") if p.is_file()),
+                "disk_bytes": disk_usage(json_dir),
+            },
+            "sqlite": {
+                "write_s": round(sqlite_write, 3),
+                "rewrite_unchanged_s": round(sqlite_rewrite, 3),
+                "rows_rewritten_unchanged": len(unchanged["changed"]),
+                "load_s": round(sqlite_load, 3),
+                "files": 1,
+                "disk_bytes": disk_usage(store.path),
+            },
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
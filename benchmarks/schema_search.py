@@ -0,0 +1,42 @@
+"""
+Misst Aufbau und Antwortzeit der Schema-Suche (app.schema_search) auf einem
+synthetischen Schema, dessen Spaltennamen alle verschieden sind (ungünstigster
+Fall für die Trefferlisten).
+
+    python -m benchmarks.schema_search --tables 5000 --columns 150000
+"""
+import argparse
+import json
+import time
+
+from app.schema_index import assemble_schema
+from app.schema_search import SchemaSearch
+from benchmarks.schema_assembly import synthetic_metadata
+
+QUERIES = ["feld12345", "feld", "fled999", "tab0042", "s_tab01", "view", "nichtvorhanden"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=5000)
+    parser.add_argument("--columns", type=int, default=150000)
+    parser.add_argument("--views", type=int, default=500)
+    parser.add_argument("--number", type=int, default=500)
+    args = parser.parse_args()
+
+    tables, columns, views = synthetic_metadata(args.tables, args.columns, args.views)
+    schema = assemble_schema(tables, columns, views, [])
+    start = time.perf_counter()
+    index = SchemaSearch(schema)
+    report = {"build_s": round(time.perf_counter() - start, 3), "names": len(index.names), "queries": {}}
+    for query in QUERIES:
+        index.search(query)
+        start = time.perf_counter()
+        for _ in range(args.number):
+            index.search(query)
+        report["queries"][query] = round((time.perf_counter() - start) / args.number * 1e6, 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Misst die Read-Only-Prüfung auf generiertem SQL mehrerer Größen: die frühere
+Substring-Suche gegen den T-SQL-Tokenizer (app.sql_lexer) ohne und mit
+LRU-Cache für wiederholte Abfragen.
+
+    python -m benchmarks.sql_validation --columns 20,200,1000
+"""
+import argparse
+import json
+import time
+
+from app.sql_lexer import cached_classify, classify
+
+
+def legacy_is_read_only(query: str) -> bool:
+    query = " ".join(query.lower().split()) + " "
+    allowed_prefixes = ["select ", "with ", "declare ", "print "]
+    forbidden_keywords = [
+        "insert ", "update ", "delete ", "drop ", "create ", "alter ",
+        "truncate ", "merge ", "exec ", "execute ", "sp_", "xp_"
+    ]
+    is_allowed = any(query.startswith(prefix) for prefix in allowed_prefixes)
+    contains_forbidden = any(keyword in query for keyword in forbidden_keywords)
+    return is_allowed and not contains_forbidden
+
+
+def generated_query(columns: int) -> str:
+    """Abfrage, wie sie ein Agent für eine breite ProAlpha-Tabelle erzeugt."""
+    select = ",\n    ".join(f"a.[Feld{i:03d}] AS Feld{i:03d} -- Spalte {i}" for i in range(columns))
+    return (
+        "/* generiert: Artikelübersicht */\n"
+        f"SELECT TOP 500\n    {select}\nFROM p_artikel a WITH (NOLOCK)\n"
+        "JOIN s_kunden k ON k.Kunde = a.Kunde\n"
+        "WHERE a.Firma = N'000' AND a.Bezeichnung LIKE N'%Schraube%'\nORDER BY a.Artikel"
+    )
+
+
+def per_call(fn, query: str, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn(query)
+    return (time.perf_counter() - start) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--columns", type=lambda v: [int(x) for x in v.split(",")], default=[20, 200, 1000])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    results = []
+    for columns in args.columns:
+        query = generated_query(columns)
+        cached_classify(query)
+        results.append({
+            "query_bytes": len(query.encode("utf-8")),
+            "legacy_us": round(per_call(legacy_is_read_only, query, args.number) * 1e6, 2),
+            "lexer_us": round(per_call(classify, query, args.number) * 1e6, 2),
+            "lexer_cached_us": round(per_call(cached_classify, query, args.number * 10) * 1e6, 3),
+            "lexer_read_only": classify(query).read_only,
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Misst die Startzeit von MCP-Server und REST-API (Import beider Frontends bis zur
+ersten Schema-Abfrage) in frischen Python-Prozessen.
+
+    python -m benchmarks.startup --runs 5 --db-host http://10.255.255.1
+
+Mit einer nicht erreichbaren DB-Adresse zeigt der Benchmark, dass der Start
+nicht mehr auf Verbindungs-Timeouts des SQL-Proxys wartet.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app.server, app.http_api
+t1 = time.perf_counter()
+tables = len(app.server.db.get_database_schema().get("tables", {}))
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "first_schema": t2 - t1, "tables": tables}))
+"""
+
+
+def run_once(env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--db-host", help="DB_SERVER_HOST für den Lauf überschreiben")
+    parser.add_argument("--db-port", help="DB_SERVER_PORT für den Lauf überschreiben")
+    args = parser.parse_args()
+
+    env = os.environ.copy()
+    if args.db_host:
+        env["DB_SERVER_HOST"] = args.db_host
+    if args.db_port:
+        env["DB_SERVER_PORT"] = args.db_port
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    result = {
+        "runs": args.runs,
+        "import_median_s": statistics.median(r["import"] for r in runs),
+        "first_schema_median_s": statistics.median(r["first_schema"] for r in runs),
+        "tables": runs[-1]["tables"],
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Wiederholbare End-to-End-Benchmarks gegen einen lokalen Fake-SQL-Proxy
+(benchmarks.synthetic, eigener Prozess): Schema-Refresh, get_database_schema,
+execute_query bei mehreren Ergebnisgrößen, REST /api/query und MCP-Tool-Aufrufe.
+
+    python -m benchmarks.suite --output benchmarks/results/current.json
+    python -m benchmarks.suite --compare benchmarks/results/baseline.json
+
+Je Benchmark werden Minimum, Median, p95 und Mittelwert in Sekunden (pro
+Operation) aufgezeichnet. Mit --compare wird der Median gegen eine frühere
+Ausgabe verglichen; liegt ein Benchmark mehr als --threshold darüber, endet der
+Lauf mit Exit-Code 1.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_proxy(args) -> subprocess.Popen:
+    port = _free_port()
+    cmd = [
+        sys.executable, "-m", "benchmarks.synthetic", "--port", str(port), "--latency", str(args.latency),
+        "--tables", str(args.tables), "--columns", str(args.columns), "--views", str(args.views),
+        "--width", str(args.width),
+    ]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    proc.stdout.readline()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/q/health", timeout=1).ok:
+                proc.port = port
+                return proc
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("Fake-SQL-Proxy ist nicht gestartet")
+
+
+def summarize(samples: List[float], ops: int) -> Dict[str, float]:
+    per_op = sorted(s / ops for s in samples)
+    p95 = per_op[min(len(per_op) - 1, int(round(0.95 * (len(per_op) - 1))))]
+    return {
+        "runs": len(per_op),
+        "ops_per_run": ops,
+        "min_s": per_op[0],
+        "median_s": statistics.median(per_op),
+        "p95_s": p95,
+        "mean_s": statistics.fmean(per_op),
+    }
+
+
+class Suite:
+    def __init__(self, repeat: int, warmup: int, only: Optional[str]):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.only = only
+        self.results: Dict[str, Dict[str, float]] = {}
+
+    def wanted(self, name: str) -> bool:
+        return not self.only or self.only in name
+
+    def run(self, name: str, fn: Callable[[], None], ops: int = 1, setup: Optional[Callable[[], None]] = None):
+        if not self.wanted(name):
+            return
+        samples = []
+        for i in range(self.warmup + self.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            if i >= self.warmup:
+                samples.append(elapsed)
+        self.record(name, samples, ops)
+
+    async def measure_async(self, make_coro: Callable[[], Awaitable]) -> List[float]:
+        samples = []
+        for i in range(self.warmup + self.repeat):
+            start = time.perf_counter()
+            await make_coro()
+            elapsed = time.perf_counter() - start
+            if i >= self.warmup:
+                samples.append(elapsed)
+        return samples
+
+    def run_async(self, name: str, make_coro: Callable[[], Awaitable], ops: int = 1):
+        """Wie run, aber alle Wiederholungen in einer Event-Loop (wie im laufenden Server)."""
+        if self.wanted(name):
+            self.record(name, asyncio.run(self.measure_async(make_coro)), ops)
+
+    def record(self, name: str, samples: List[float], ops: int = 1) -> None:
+        self.results[name] = summarize(samples, ops)
+        print(f"{name:40s} median {self.results[name]['median_s'] * 1000:10.3f} ms", file=sys.stderr)
+
+
+def run_benchmarks(args, suite: Suite, cache_root: Path) -> None:
+    # Erst jetzt importieren: die Konfiguration wird beim Import aus der Umgebung gelesen
+    from fastapi.testclient import TestClient
+    from fastmcp import Client
+
+    from app.config import config
+    from app.database import DatabaseManager, get_database_manager
+    from app.http_api import app
+    from app.schema_index import SchemaIndex
+    from app.schema_store import SCHEMA_DB_FILE, SchemaStore, SchemaStoreSource
+    from app.server import mcp
+
+    fresh_dirs = iter(range(10 ** 6))
+
+    def fresh_manager() -> DatabaseManager:
+        config.SCHEMA_CACHE_PATH = str(cache_root / f"run{next(fresh_dirs)}")
+        return DatabaseManager()
+
+    state: Dict[str, DatabaseManager] = {}
+    suite.run(
+        "schema_refresh_full", lambda: state["db"].refresh_schema_cache(),
+        setup=lambda: state.update(db=fresh_manager()),
+    )
+    config.SCHEMA_CACHE_PATH = str(cache_root / "shared")
+    db = get_database_manager()
+    db.refresh_schema_cache()
+    suite.run("schema_refresh_incremental_unchanged", lambda: db.refresh_schema_cache(incremental=True))
+    suite.run_async("schema_refresh_full_async", lambda: db.refresh_schema_cache_async())
+
+    store_dir = Path(config.SCHEMA_CACHE_PATH)
+
+    def cold_load():
+        source = SchemaStoreSource(SchemaStore(store_dir / SCHEMA_DB_FILE), store_dir / "schema.json")
+        SchemaIndex(source).schema
+
+    suite.run("get_database_schema_cold", cold_load)
+    warm_ops = 1000
+
+    def warm_lookups():
+        for _ in range(warm_ops):
+            db.get_database_schema()
+
+    suite.run("get_database_schema_warm", warm_lookups, ops=warm_ops)
+
+    # Als Kontextmanager: eine Event-Loop für alle Requests wie im laufenden Server
+    with TestClient(app) as client:
+        for size in args.sizes:
+            run_query_benchmarks(suite, db, client, mcp, Client, size)
+
+
+def run_query_benchmarks(suite: Suite, db, client, mcp, mcp_client_cls, size: int) -> None:
+    query = f"SELECT TOP {size} * FROM bench_rows"
+    suite.run(f"execute_query_{size}", lambda: db.execute_query(query, use_cache=False))
+    suite.run_async(f"execute_query_async_{size}", lambda: db.execute_query_async(query, use_cache=False))
+    db.execute_query(query)
+    suite.run(f"execute_query_cached_{size}", lambda: db.execute_query(query))
+
+    def rest():
+        response = client.post("/api/query", json={"query": query, "use_cache": False})
+        response.raise_for_status()
+
+    suite.run(f"rest_query_{size}", rest)
+
+    async def mcp_calls():
+        # Eine MCP-Sitzung, gemessen wird nur der Tool-Aufruf
+        async with mcp_client_cls(mcp) as mcp_client:
+            return await suite.measure_async(
+                lambda: mcp_client.call_tool("execute_sql", {"query": query, "use_cache": False})
+            )
+
+    if suite.wanted(f"mcp_execute_sql_{size}"):
+        suite.record(f"mcp_execute_sql_{size}", asyncio.run(mcp_calls()))
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Gibt den Vergleich aus; True, wenn ein Benchmark um mehr als `threshold` langsamer ist."""
+    regressed = False
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = result["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{name:40s} {base['median_s'] * 1000:10.3f} ms -> {result['median_s'] * 1000:10.3f} ms  x{ratio:.2f}{flag}")
+    return regressed
+
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--sizes", type=lambda v: [int(x) for x in v.split(",")], default=[10, 1000, 10000],
+                        help="Ergebnisgrößen in Zeilen, kommagetrennt")
+    parser.add_argument("--width", type=int, default=20, help="Spalten je Ergebniszeile")
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--columns", type=int, default=15000)
+    parser.add_argument("--views", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.002, help="simulierte Proxy-Latenz je Abfrage")
+    parser.add_argument("--only", help="nur Benchmarks, deren Name diesen Text enthält")
+    parser.add_argument("--output", type=Path, help="Ergebnis als JSON speichern")
+    parser.add_argument("--compare", type=Path, help="mit früherem Ergebnis vergleichen")
+    parser.add_argument("--threshold", type=float, default=0.2, help="erlaubte Verschlechterung (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    proxy = start_proxy(args)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ.update(
+                DB_SERVER_HOST="http://127.0.0.1",
+                DB_SERVER_PORT=str(proxy.port),
+                SCHEMA_CACHE_PATH=str(Path(tmp) / "shared"),
+                SCHEMA_REFRESH_ON_START="false",
+            )
+            suite = Suite(args.repeat, args.warmup, args.only)
+            run_benchmarks(args, suite, Path(tmp))
+    finally:
+        proxy.terminate()
+        proxy.wait()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": suite.results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(text)
+    else:
+        print(text)
+    if args.compare:
+        if compare(report, json.loads(args.compare.read_text()), args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
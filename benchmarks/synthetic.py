@@ -0,0 +1,125 @@
+"""
+Synthetischer ProAlpha-Katalog für den Fake-SQL-Proxy: INFORMATION_SCHEMA,
+sys.objects, Fremdschlüssel und Ergebniszeilen in konfigurierbarer Größe.
+
+Als eigenständiger Proxy (z.B. um den Server im Ganzen dagegen laufen zu lassen):
+
+    python -m benchmarks.synthetic --port 18080 --tables 2000 --columns 60000 --latency 0.005
+
+Abfragen mit `TOP n` liefern n Zeilen, alle übrigen `--rows` Zeilen mit
+`--width` Spalten. Antworten werden je Abfrage einmal serialisiert und danach
+als fertige Bytes ausgeliefert, damit der Proxy selbst kaum Zeit kostet.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.schema_assembly import synthetic_metadata
+from tests.fake_proxy import FakeSqlProxy
+
+_TOP = re.compile(r"\bTOP\s*\(?\s*(\d+)", re.I)
+_IN_LIST = re.compile(r"TABLE_NAME IN \((.*)\)\s*$", re.S)
+
+
+def synthetic_row(i: int, width: int) -> Dict[str, object]:
+    row: Dict[str, object] = {}
+    for c in range(width):
+        kind = c % 4
+        name = f"feld_{c:03d}"
+        if kind == 0:
+            row[name] = i * width + c
+        elif kind == 1:
+            row[name] = f"Artikel {i}-{c}"
+        elif kind == 2:
+            row[name] = round(i * 0.25 + c, 2)
+        else:
+            row[name] = None
+    return row
+
+
+class SyntheticCatalog:
+    """Responder für FakeSqlProxy mit einem festen synthetischen Schema."""
+
+    def __init__(
+        self, tables: int = 500, columns: int = 15000, views: int = 50, foreign_keys: int = 1000,
+        rows: int = 100, width: int = 20,
+    ):
+        self.tables, self.columns, self.views = synthetic_metadata(tables, columns, views)
+        self.rows = rows
+        self.width = width
+        names = [t["TABLE_NAME"] for t in self.tables]
+        self.relationships = [
+            {
+                "FK_Name": f"fk_{i}",
+                "ParentTable": names[i % len(names)],
+                "ReferencedTable": names[(i * 7 + 1) % len(names)],
+                "ParentColumn": f"ref{i}",
+                "ReferencedColumn": "id",
+            }
+            for i in range(foreign_keys)
+        ] if names else []
+        self.objects = [
+            {"OBJECT_NAME": t["TABLE_NAME"], "OBJECT_TYPE": "U", "MODIFY_DATE": "2024-01-01T00:00:00"}
+            for t in self.tables
+        ] + [
+            {"OBJECT_NAME": v["TABLE_NAME"], "OBJECT_TYPE": "V", "MODIFY_DATE": "2024-01-01T00:00:00"}
+            for v in self.views
+        ]
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, query: str) -> bytes:
+        body = self._bodies.get(query)
+        if body is None:
+            body = json.dumps({"results": self._rows(query)}).encode("utf-8")
+            with self._lock:
+                self._bodies[query] = body
+        return body
+
+    def _rows(self, query: str) -> List[dict]:
+        names: Optional[set] = None
+        match = _IN_LIST.search(query)
+        if match:
+            names = set(re.findall(r"'([^']*)'", match.group(1)))
+        if "sys.objects" in query:
+            return self.objects
+        if "sys.foreign_keys" in query:
+            return self.relationships
+        if "INFORMATION_SCHEMA.TABLES" in query:
+            return [t for t in self.tables if names is None or t["TABLE_NAME"] in names]
+        if "INFORMATION_SCHEMA.COLUMNS" in query:
+            return [c for c in self.columns if names is None or c["TABLE_NAME"] in names]
+        if "INFORMATION_SCHEMA.VIEWS" in query:
+            return [v for v in self.views if names is None or v["TABLE_NAME"] in names]
+        top = _TOP.search(query)
+        count = int(top.group(1)) if top else self.rows
+        return [synthetic_row(i, self.width) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Sekunden je Abfrage")
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--columns", type=int, default=15000)
+    parser.add_argument("--views", type=int, default=50)
+    parser.add_argument("--foreign-keys", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--width", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(args.tables, args.columns, args.views, args.foreign_keys, args.rows, args.width)
+    with FakeSqlProxy(latency=args.latency, responder=catalog, port=args.port) as proxy:
+        print(json.dumps({"host": proxy.host, "port": proxy.port}), flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
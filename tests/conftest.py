@@ -0,0 +1,30 @@
+from contextlib import ExitStack
+
+import pytest
+
+from app.config import config
+from app.database import DatabaseManager
+from tests.fake_proxy import FakeSqlProxy
+
+
+@pytest.fixture
+def fake_db(monkeypatch, tmp_path):
+    """
+    DatabaseManager gegen einen lokalen FakeSqlProxy.
+
+    `fake_db(responder, latency=0.0, **settings)` startet den Proxy, richtet Host,
+    Port und SCHEMA_CACHE_PATH (tmp_path) darauf aus, setzt die übrigen
+    config-Werte aus `settings` und liefert `(proxy, db)`. Der Proxy läuft bis zum
+    Ende des Tests.
+    """
+    with ExitStack() as stack:
+        def make(responder=None, latency: float = 0.0, **settings):
+            proxy = stack.enter_context(FakeSqlProxy(latency=latency, responder=responder))
+            monkeypatch.setattr(config, "DB_SERVER_HOST", proxy.host)
+            monkeypatch.setattr(config, "DB_SERVER_PORT", proxy.port)
+            monkeypatch.setattr(config, "SCHEMA_CACHE_PATH", str(tmp_path))
+            for name, value in settings.items():
+                monkeypatch.setattr(config, name, value)
+            return proxy, DatabaseManager()
+
+        yield make
@@ -0,0 +1,124 @@
+"""Lokaler Stand-in für den SQL-Proxy (/sql/query, /q/health) für Tests ohne ProAlpha-API."""
+import json
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Standard-Backlog (5) würde viele parallele Verbindungen in SYN-Retries laufen lassen
+    request_queue_size = 128
+
+
+class FakeSqlProxy:
+    """
+    Minimaler SQL-Proxy mit konfigurierbarer Latenz.
+
+    `responder(query)` liefert die Ergebniszeilen einer Abfrage; ohne Responder wird
+    eine leere Ergebnisliste zurückgegeben. Liefert er einen Generator statt einer
+    Liste, wird die Antwort zeilenweise gestreamt, ohne sie im Speicher aufzubauen;
+    `bytes` werden unverändert als vollständiger Antwort-Body gesendet.
+    Alle empfangenen Abfragen landen in `queries`. Statuscodes in `failures` werden
+    der Reihe nach statt eines Ergebnisses beantwortet (z.B. `[502, 503]`).
+    """
+
+    def __init__(self, latency: float = 0.0, responder=None, port: int = 0):
+        self.latency = latency
+        self.responder = responder or (lambda query: [])
+        self.queries: list = []
+        self.failures: list = []
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", port), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def host(self) -> str:
+        return "http://127.0.0.1"
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def request_count(self) -> int:
+        return len(self.queries)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handle_query(self, query: str):
+        with self._lock:
+            self.queries.append(query)
+            status = self.failures.pop(0) if self.failures else None
+        if self.latency:
+            time.sleep(self.latency)
+        if status:
+            return status
+        rows = self.responder(query)
+        return rows if isinstance(rows, bytes) else {"results": rows}
+
+    def _make_handler(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_result(self, payload):
+                if isinstance(payload, int):
+                    self._send_json({"error": "Bad Gateway"}, status=payload)
+                    return
+                if isinstance(payload, bytes):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+                rows = payload.get("results")
+                if not isinstance(rows, types.GeneratorType):
+                    self._send_json(payload)
+                    return
+                # Ohne Content-Length: Ende der Antwort = Verbindungsende
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(b'{"results": [')
+                for i, row in enumerate(rows):
+                    self.wfile.write((b"," if i else b"") + json.dumps(row).encode("utf-8"))
+                self.wfile.write(b"]}")
+                self.close_connection = True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/q/health":
+                    self._send_json({"status": "UP"})
+                elif url.path == "/sql/query":
+                    query = parse_qs(url.query).get("query", [""])[0]
+                    self._send_result(proxy._handle_query(query))
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                self._send_result(proxy._handle_query(body.get("query", "")))
+
+        return Handler
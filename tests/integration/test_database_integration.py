@@ -49,7 +49,7 @@ def test_refresh_schema_cache(tmp_path):
         pytest.fail("API nicht erreichbar, Integrationstest fehlgeschlagen.")
     db.refresh_schema_cache()
     # Prüfe, ob die Datei existiert
-    cache_file = tmp_path / "schema.json"
+    cache_file = tmp_path / "schema.db"
     assert cache_file.exists()
     # Prüfe, ob schema_cache ein dict mit 'tables' ist
     assert isinstance(db.schema_cache, dict)
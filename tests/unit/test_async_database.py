@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+
+def test_execute_query_async_returns_results(fake_db):
+    _, db = fake_db(lambda q: [{"q": q}])
+    result = asyncio.run(db.execute_query_async("SELECT 1 AS x"))
+    assert result == [{"q": "SELECT 1 AS x"}]
+
+
+def test_concurrent_queries_overlap(fake_db):
+    latency = 0.3
+    n = 10
+    _, db = fake_db(lambda q: [{"x": 1}], latency=latency)
+
+    async def run_all():
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(db.execute_query_async(f"SELECT {i} AS x") for i in range(n))
+        )
+        elapsed = time.perf_counter() - start
+        await db.aclose()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(run_all())
+    assert len(results) == n
+    # Sequentiell wären es n * latency = 3s; parallel etwa eine Latenz
+    assert elapsed < 2 * latency
+
+
+def test_refresh_schema_cache_async(fake_db, tmp_path):
+    def responder(query):
+        if "INFORMATION_SCHEMA.TABLES" in query:
+            return [{"TABLE_NAME": "s_kunden", "TABLE_TYPE": "BASE TABLE"}]
+        if "INFORMATION_SCHEMA.COLUMNS" in query:
+            return [{"TABLE_NAME": "s_kunden", "COLUMN_NAME": "id", "DATA_TYPE": "int",
+                     "IS_NULLABLE": "NO", "CHARACTER_MAXIMUM_LENGTH": None}]
+        return []
+
+    _, db = fake_db(responder)
+    asyncio.run(db.refresh_schema_cache_async())
+    assert db.get_table_schema("s_kunden")["columns"][0]["COLUMN_NAME"] == "id"
+    assert (tmp_path / "schema.db").exists()
@@ -20,3 +20,20 @@ def test_is_read_only():
     assert db._is_read_only("SELECT * FROM test")
     assert not db._is_read_only("DROP TABLE test")
     assert not db._is_read_only("UPDATE test SET x=1")
+
+def test_database_manager_is_shared():
+    import app.server
+    import app.http_api
+    from app.database import get_database_manager
+    assert app.server.db is app.http_api.db is get_database_manager()
+
+def test_schema_refresh_runs_in_background(fake_db, tmp_path):
+    proxy, db = fake_db()
+    # Der Konstruktor fragt den Proxy nicht mehr synchron ab
+    assert proxy.request_count == 0
+    db.start_background_refresh()
+    db.start_background_refresh()
+    db._background_refresh.join(timeout=10)
+    # Tabellen, Spalten, Views, Fremdschlüssel und der sys.objects-Snapshot
+    assert proxy.request_count == 5
+    assert (tmp_path / "schema.db").exists()
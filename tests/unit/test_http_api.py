@@ -1,16 +1,28 @@
 import sys
 import os
+import json
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import pytest
 from fastapi.testclient import TestClient
+from app import http_api
 from app.http_api import app
 
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def fresh_response_caches():
+    # /api/schema* wird je schema_version() gemerkt; gepatchte db-Methoden sollen greifen
+    http_api._responses.clear()
+    http_api._lookups.clear()
+    yield
+    http_api._responses.clear()
+    http_api._lookups.clear()
+
 def test_get_schema(monkeypatch):
-    # Patch get_database_schema to return a test schema
+    # Patch get_schema_json to return a test schema
     test_schema = {"tables": {}, "views": {}, "relationships": []}
-    monkeypatch.setattr("app.http_api.db.get_database_schema", lambda: test_schema)
+    monkeypatch.setattr("app.http_api.db.get_schema_json", lambda: json.dumps(test_schema).encode())
     response = client.get("/api/schema")
     assert response.status_code == 200
     assert response.json() == test_schema
@@ -21,3 +33,31 @@ def test_get_tables(monkeypatch):
     response = client.get("/api/schema/tables")
     assert response.status_code == 200
     assert response.json() == ["foo"]
+
+def test_query_batch_requires_read_only_list():
+    assert client.post("/api/query/batch", json={"query": "SELECT 1"}).status_code == 400
+    response = client.post("/api/query/batch", json={"queries": ["SELECT 1", "DROP TABLE s_kunden"]})
+    assert response.status_code == 400
+
+def test_snapshot_endpoints(monkeypatch):
+    from app.result_format import ColumnarResult
+
+    async def fake_result(query, use_cache=True):
+        return ColumnarResult.from_records([{"id": 1}, {"id": 2}])
+    monkeypatch.setattr("app.http_api.db.execute_query_result_async", fake_result)
+    handle = client.post("/api/snapshots", json={"query": "SELECT id FROM s_kunden"}).json()["handle"]
+    assert handle in [s["handle"] for s in client.get("/api/snapshots").json()]
+    response = client.post("/api/snapshots/query", json={"query": f"SELECT SUM(id) AS s FROM {handle}"})
+    assert response.json()["rows"] == [{"s": 3}]
+    assert client.post("/api/snapshots/query", json={"query": f"DELETE FROM {handle}"}).status_code == 400
+    assert client.delete(f"/api/snapshots/{handle}").status_code == 200
+    assert client.delete(f"/api/snapshots/{handle}").status_code == 404
+
+
+def test_schema_refresh_reports_failure(monkeypatch):
+    async def failing(incremental=False):
+        raise ValueError("Antwort des Proxys unvollständig")
+    monkeypatch.setattr("app.http_api.db.refresh_schema_cache_async", failing)
+    response = client.post("/api/schema/refresh")
+    assert response.status_code == 502
+    assert "unvollständig" in response.json()["detail"]
@@ -0,0 +1,77 @@
+import asyncio
+import gzip
+
+from fastapi.testclient import TestClient
+
+from app.http_api import app
+from app.http_cache import ResponseCache, etag_matches, prepare
+from app.server import mcp
+
+client = TestClient(app)
+
+
+def test_cache_rebuilds_only_on_new_version():
+    cache = ResponseCache(compress_min_bytes=16)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return b'{"tables":["s_kunden","p_artikel","p_auftrag"]}'
+
+    first = cache.get("schema", 1, build)
+    assert cache.get("schema", 1, build) is first
+    assert len(builds) == 1
+    assert gzip.decompress(first.gzip) == first.body
+    cache.get("schema", 2, build)
+    assert len(builds) == 2
+    # Kleine Bodies bleiben unkomprimiert, der ETag hängt nur vom Inhalt ab
+    small = prepare(b"[]", 16)
+    assert small.gzip is None and small.etag == prepare(b"[]", None).etag
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches(None, '"a"')
+    assert not etag_matches('"ab"', '"a"')
+
+
+def test_prompts_return_304_for_current_etag():
+    response = client.get("/api/prompts")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.json()
+    again = client.get("/api/prompts", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+def test_large_responses_are_served_precompressed():
+    response = client.get("/api/tools", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert any(tool["name"] == "list_tools" for tool in response.json())
+    plain = client.get("/api/tools", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == response.json()
+
+
+def test_each_coding_has_its_own_etag():
+    gzipped = client.get("/api/tools", headers={"Accept-Encoding": "gzip"})
+    plain = client.get("/api/tools", headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    # Der ETag der komprimierten Fassung passt nicht zur unkomprimierten und umgekehrt
+    assert client.get("/api/tools", headers={
+        "Accept-Encoding": "identity", "If-None-Match": gzipped.headers["etag"]}).status_code == 200
+    assert client.get("/api/tools", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]}).status_code == 304
+
+
+def test_tool_description_change_invalidates_etag(monkeypatch):
+    before = client.get("/api/tools/list_tools")
+    tool = asyncio.run(mcp.get_tools())["list_tools"]
+    monkeypatch.setattr(tool, "description", "Geänderte Beschreibung")
+    after = client.get("/api/tools/list_tools", headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert after.json()["description"] == "Geänderte Beschreibung"
@@ -0,0 +1,46 @@
+from app.join_graph import JoinGraph
+from app.schema_index import SchemaIndex
+
+
+def _fk(name, parent, referenced, parent_col, referenced_col):
+    return {"FK_Name": name, "ParentTable": parent, "ReferencedTable": referenced,
+            "ParentColumn": parent_col, "ReferencedColumn": referenced_col}
+
+
+RELATIONSHIPS = [
+    _fk("fk_pos_auftrag", "p_position", "p_auftrag", "Firma", "Firma"),
+    _fk("fk_pos_auftrag", "p_position", "p_auftrag", "Auftrag", "Auftrag"),
+    _fk("fk_auftrag_kunde", "p_auftrag", "s_kunden", "Kunde", "Kunde"),
+    _fk("fk_pos_artikel", "p_position", "s_artikel", "Artikel", "Artikel"),
+    _fk("fk_lief_kunde", "p_lieferschein", "s_kunden", "Kunde", "Kunde"),
+    _fk("fk_lief_artikel", "p_lieferschein", "s_artikel", "Artikel", "Artikel"),
+    _fk("fk_lief_auftrag", "p_lieferschein", "p_auftrag", "Auftrag", "Auftrag"),
+    _fk("fk_kunde_zentrale", "s_kunden", "s_kunden", "Zentrale", "Kunde"),
+]
+
+
+def test_shortest_paths_with_join_columns():
+    graph = JoinGraph(RELATIONSHIPS)
+    [path] = graph.shortest_paths("p_position", "s_kunden")
+    assert path["tables"] == ["p_position", "p_auftrag", "s_kunden"]
+    assert path["joins"][0]["columns"] == [{"from": "Firma", "to": "Firma"}, {"from": "Auftrag", "to": "Auftrag"}]
+    assert path["sql"] == (
+        "FROM [p_position]\n"
+        "JOIN [p_auftrag] ON [p_auftrag].[Firma] = [p_position].[Firma] AND [p_auftrag].[Auftrag] = [p_position].[Auftrag]\n"
+        "JOIN [s_kunden] ON [s_kunden].[Kunde] = [p_auftrag].[Kunde]"
+    )
+    # Zwei gleich kurze Wege über unterschiedliche Zwischentabellen
+    paths = graph.shortest_paths("p_position", "p_lieferschein", max_paths=5)
+    assert sorted(p["tables"][1] for p in paths) == ["p_auftrag", "s_artikel"]
+    assert len(graph.shortest_paths("p_position", "p_lieferschein", max_paths=1)) == 1
+    assert graph.shortest_paths("p_position", "unbekannt") == []
+    assert graph.resolve("S_KUNDEN") == "s_kunden"
+
+
+def test_schema_index_rebuilds_graph_on_update(tmp_path):
+    index = SchemaIndex(tmp_path / "schema.json")
+    index.update({"tables": {}, "views": {}, "relationships": RELATIONSHIPS[:3]})
+    assert index.join_graph.shortest_paths("p_position", "s_kunden")
+    assert not index.join_graph.shortest_paths("p_position", "s_artikel")
+    index.update({"tables": {}, "views": {}, "relationships": RELATIONSHIPS})
+    assert index.join_graph.shortest_paths("p_position", "s_artikel")[0]["tables"] == ["p_position", "s_artikel"]
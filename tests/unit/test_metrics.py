@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+
+from app.config import config
+from app.http_api import app
+from app.metrics import PHASE_LATENCY, RESULT_ROWS, Counter, Histogram
+
+client = TestClient(app)
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    hist = Histogram("test_seconds", "Testdauer", ["tool"], buckets=(0.1, 1.0))
+    hist.observe(0.05, tool="a")
+    hist.observe(0.5, tool="a")
+    counter = Counter("test_total", "Testzähler", ["reason"])
+    counter.inc(reason='say "hi"')
+    text = "\n".join(hist.render() + counter.render())
+    assert '# TYPE test_seconds histogram' in text
+    assert 'test_seconds_bucket{tool="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{tool="a",le="+Inf"} 2' in text
+    assert 'test_seconds_count{tool="a"} 2' in text
+    assert 'test_total{reason="say \\"hi\\""} 1' in text
+
+
+def test_queries_record_phases_and_result_sizes(fake_db, monkeypatch):
+    _, db = fake_db(lambda q: [{"x": i} for i in range(3)])
+    fetches, results = PHASE_LATENCY.count(phase="fetch"), RESULT_ROWS.count()
+    db.execute_query("SELECT x FROM t", use_cache=False)
+    assert PHASE_LATENCY.count(phase="fetch") == fetches + 1
+    assert PHASE_LATENCY.count(phase="proxy_wait") >= 1
+    assert RESULT_ROWS.count() == results + 1
+
+    monkeypatch.setattr(config, "METRICS_ENABLED", False)
+    db.execute_query("SELECT x FROM t", use_cache=False)
+    assert PHASE_LATENCY.count(phase="fetch") == fetches + 1
+
+
+def test_metrics_endpoint(monkeypatch):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE proalpha_tool_duration_seconds histogram" in response.text
+    assert 'proalpha_query_cache_requests_total{result="hit"}' in response.text
+
+    monkeypatch.setattr(config, "METRICS_ENABLED", False)
+    assert client.get("/metrics").status_code == 404
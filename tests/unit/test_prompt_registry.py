@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+
+import pytest
+from fastmcp import Client, FastMCP
+
+from app.config import config
+from app.database import DatabaseManager
+from app.prompts import PromptRegistry, compile_prompt, register_mcp_prompts
+
+
+def _write(path, prompts, mtime):
+    path.write_text(json.dumps({"prompts": prompts}), encoding="utf-8")
+    os.utime(path, ns=(mtime, mtime))
+
+
+PROMPTS = {
+    "analyse": {"title": "Analyse", "description": "Tabelle analysieren", "template": "Analysiere {{ table_name }} für {{ope}}."},
+    "frei": {"title": "Frei", "description": "Ohne Argumente", "template": "Was gibt es Neues?"},
+}
+
+
+def test_compile_and_render():
+    prompt = compile_prompt("analyse", PROMPTS["analyse"])
+    assert prompt.arguments == ("table_name", "ope")
+    assert prompt.render({"table_name": "s_kunden", "ope": "Vertrieb"}) == "Analysiere s_kunden für Vertrieb."
+    with pytest.raises(ValueError, match="ope"):
+        prompt.render({"table_name": "s_kunden"})
+
+
+def test_registry_reloads_only_on_file_change(tmp_path, monkeypatch):
+    path = tmp_path / "prompts.json"
+    _write(path, PROMPTS, 1_000_000_000)
+    registry = PromptRegistry(str(path))
+    reloads = []
+    registry.on_reload(lambda r: reloads.append(r.version))
+    assert set(registry.raw()) == {"analyse", "frei"}
+
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *a, **k: opened.append(a[0]) or real_open(*a, **k))
+    registry.prompts()
+    registry.get("frei")
+    assert opened == []
+    monkeypatch.undo()
+
+    _write(path, {"frei": PROMPTS["frei"]}, 2_000_000_000)
+    assert set(registry.prompts()) == {"frei"}
+    assert reloads == [1, 2]
+    with pytest.raises(KeyError):
+        registry.get("analyse")
+
+    # Defekte Datei: bisheriger Stand bleibt erhalten
+    path.write_text("{kaputt", encoding="utf-8")
+    os.utime(path, ns=(3_000_000_000, 3_000_000_000))
+    assert set(registry.prompts()) == {"frei"}
+    assert registry.current_version() == 2
+
+
+def test_mcp_prompts_follow_file_and_prefill_schema(tmp_path):
+    path = tmp_path / "prompts.json"
+    _write(path, PROMPTS, 1_000_000_000)
+    registry = PromptRegistry(str(path))
+    mcp = FastMCP("test")
+    described = []
+
+    def describe(name):
+        described.append(name)
+        return f"Tabelle {name}: Kunde nvarchar" if name == "s_kunden" else None
+
+    register_mcp_prompts(mcp, registry, describe)
+
+    async def scenario():
+        async with Client(mcp) as client:
+            listed = {p.name: p for p in await client.list_prompts()}
+            assert set(listed) == {"analyse", "frei"}
+            assert [a.name for a in listed["analyse"].arguments] == ["table_name", "ope"]
+            result = await client.get_prompt("analyse", {"table_name": "s_kunden", "ope": "Vertrieb"})
+            text = result.messages[0].content.text
+            assert text == "Analysiere s_kunden für Vertrieb.\n\nSchema-Auszug:\nTabelle s_kunden: Kunde nvarchar"
+            result = await client.get_prompt("analyse", {"table_name": "unbekannt", "ope": "x"})
+            assert result.messages[0].content.text == "Analysiere unbekannt für x."
+
+            # Ohne weiteren Zugriff auf die Registry: prompts/list lädt die geänderte Datei selbst
+            _write(path, {"frei": {"template": "Neu: {{thema}}"}, "extra": {"template": "Extra"}}, 2_000_000_000)
+            listed = {p.name: p for p in await client.list_prompts()}
+            assert set(listed) == {"frei", "extra"}
+            result = await client.get_prompt("frei", {"thema": "Lager"})
+            assert result.messages[0].content.text == "Neu: Lager"
+            _write(path, {"spaet": {"template": "Später"}}, 3_000_000_000)
+            result = await client.get_prompt("spaet")
+            assert result.messages[0].content.text == "Später"
+
+    asyncio.run(scenario())
+    assert described == ["s_kunden", "unbekannt"]
+
+
+def test_describe_table_uses_schema_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "SCHEMA_CACHE_PATH", str(tmp_path))
+    db = DatabaseManager()
+    columns = [{"TABLE_NAME": "s_kunden", "COLUMN_NAME": f"c{i}", "DATA_TYPE": "int"} for i in range(5)]
+    db.schema_index.update({
+        "tables": {"s_kunden": {"columns": columns}, "p_auftrag": {"columns": []}},
+        "views": {"v_umsatz": {"columns": columns[:1]}},
+        "relationships": [{"FK_Name": "fk", "ParentTable": "p_auftrag", "ReferencedTable": "s_kunden",
+                           "ParentColumn": "Kunde", "ReferencedColumn": "c0"}],
+    })
+    assert db.describe_table("S_KUNDEN", max_columns=3) == (
+        "Tabelle s_kunden: c0 int, c1 int, c2 int, … (+2 weitere)\n"
+        "Beziehungen: p_auftrag (c0 = p_auftrag.Kunde)"
+    )
+    assert db.describe_table("v_umsatz") == "View v_umsatz: c0 int"
+    assert db.describe_table("gibt_es_nicht") is None
+
+
+def test_describe_table_with_legacy_cache_layout(monkeypatch, tmp_path):
+    # schema_cache/schema.json speichert Spalten als {name, type, nullable}
+    monkeypatch.setattr(config, "SCHEMA_CACHE_PATH", str(tmp_path))
+    db = DatabaseManager()
+    columns = [{"name": "id", "type": "int"}, {"name": "created_at", "type": "datetime"}, {"type": "int"}, {"name": "memo"}]
+    db.schema_index.update({"tables": {"sample_table": {"columns": columns}}, "views": {}, "relationships": []})
+    assert db.describe_table("sample_table", max_columns=2) == (
+        "Tabelle sample_table: id int, created_at datetime, … (+1 weitere)"
+    )
+    assert db.describe_table("sample_table") == "Tabelle sample_table: id int, created_at datetime, memo"
+
+
+def test_deleted_prompt_file_unpublishes_prompts(tmp_path, caplog):
+    path = tmp_path / "prompts.json"
+    _write(path, PROMPTS, 1_000_000_000)
+    registry = PromptRegistry(str(path))
+    mcp = FastMCP("test")
+    register_mcp_prompts(mcp, registry)
+
+    async def scenario():
+        async with Client(mcp) as client:
+            assert {p.name for p in await client.list_prompts()} == {"analyse", "frei"}
+            path.unlink()
+            assert await client.list_prompts() == []
+            assert await client.list_prompts() == []
+            # Wieder angelegt: Prompts erscheinen erneut
+            _write(path, {"frei": PROMPTS["frei"]}, 2_000_000_000)
+            assert [p.name for p in await client.list_prompts()] == ["frei"]
+
+    asyncio.run(scenario())
+    assert registry.current_version() == 3
+    assert not [r for r in caplog.records if r.levelname == "ERROR"]
+    assert len([r for r in caplog.records if "nicht mehr vorhanden" in r.getMessage()]) == 1
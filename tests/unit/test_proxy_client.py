@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+import requests
+
+from app.proxy_client import CircuitBreaker, ProxyUnavailable, RetryPolicy, acall_with_retry
+
+# Kurze Wartezeit zwischen Wiederholungen, damit die Tests schnell bleiben
+FAST_RETRY = {"PROXY_RETRY_BACKOFF": 0.01}
+
+
+def test_retries_transient_gateway_errors(fake_db):
+    proxy, db = fake_db(lambda q: [{"x": 1}], PROXY_RETRIES=2, **FAST_RETRY)
+    db.connect()
+    proxy.failures = [502, 503]
+    assert db.execute_query("SELECT 1 AS x", use_cache=False) == [{"x": 1}]
+    proxy.failures = [504, 502]
+    assert asyncio.run(db.execute_query_async("SELECT 2 AS x", use_cache=False)) == [{"x": 1}]
+    assert proxy.request_count == 6
+
+
+def test_client_errors_are_not_retried(fake_db):
+    proxy, db = fake_db(PROXY_RETRIES=3, **FAST_RETRY)
+    db.connect()
+    proxy.failures = [400]
+    with pytest.raises(requests.HTTPError):
+        db.execute_query("SELECT 1", use_cache=False)
+    assert proxy.request_count == 1
+    assert db.breaker.state == "closed"
+
+
+def test_read_timeout_bounds_hung_proxy(fake_db):
+    proxy, db = fake_db(PROXY_RETRIES=0, PROXY_READ_TIMEOUT=0.2, **FAST_RETRY)
+    db.connect()
+    proxy.latency = 2.0
+    start = time.perf_counter()
+    with pytest.raises(requests.Timeout):
+        db.execute_query("SELECT 1", use_cache=False)
+    assert time.perf_counter() - start < 1.5
+
+
+def test_circuit_breaker_fails_fast_and_recovers(fake_db):
+    proxy, db = fake_db(
+        lambda q: [{"x": 1}], PROXY_RETRIES=0, PROXY_BREAKER_THRESHOLD=2, PROXY_BREAKER_RESET=0.2, **FAST_RETRY
+    )
+    db.connect()
+    proxy.failures = [502, 502, 502]
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            db.execute_query("SELECT 1", use_cache=False)
+    requests_before = proxy.request_count
+    with pytest.raises(ProxyUnavailable):
+        asyncio.run(db.execute_query_async("SELECT 1", use_cache=False))
+    assert proxy.request_count == requests_before
+
+    # Nach der Wartezeit geht ein Probeaufruf durch; schlägt er fehl, bleibt der Breaker offen
+    time.sleep(0.25)
+    with pytest.raises(requests.HTTPError):
+        db.execute_query("SELECT 1", use_cache=False)
+    assert db.breaker.state == "open"
+    time.sleep(0.25)
+    assert db.execute_query("SELECT 1", use_cache=False) == [{"x": 1}]
+    assert db.breaker.state == "closed"
+
+
+def test_pool_timeout_is_neither_retried_nor_counted():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+    calls = []
+
+    async def exhausted():
+        calls.append(1)
+        raise httpx.PoolTimeout("pool exhausted")
+
+    with pytest.raises(httpx.PoolTimeout):
+        asyncio.run(acall_with_retry(exhausted, RetryPolicy(3, 0.0, 0.0), breaker))
+    assert calls == [1]
+    assert breaker.state == "closed"
+
+    # Probeaufruf im Zustand half_open, der am Pool scheitert, lässt den Breaker nicht hängen
+    breaker.record_failure()
+    breaker._opened_at -= 60
+    with pytest.raises(httpx.PoolTimeout):
+        asyncio.run(acall_with_retry(exhausted, RetryPolicy(0, 0.0, 0.0), breaker))
+    breaker.before_call()
+    assert breaker.state == "half_open"
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def batch_db(fake_db):
+    state = {"running": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def respond(query):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.05)
+        with lock:
+            state["running"] -= 1
+        if "kaputt" in query:
+            return b"[{\"id\": "
+        return [{"id": 1, "query": query}]
+
+    proxy, db = fake_db(respond, QUERY_BATCH_CONCURRENCY=3)
+    return proxy, db, state
+
+
+def test_batch_runs_concurrently_and_reports_errors(batch_db):
+    proxy, db, state = batch_db
+    queries = [f"SELECT {i} AS n FROM s_kunden" for i in range(8)] + ["SELECT * FROM kaputt"]
+    response = asyncio.run(db.execute_batch_async(queries, use_cache=False, fmt="columnar"))
+    assert response["succeeded"] == 8 and response["failed"] == 1
+    assert [r["index"] for r in response["results"]] == list(range(9))
+    assert response["results"][0]["rows"] == [[1, "SELECT TOP (10001) 0 AS n FROM s_kunden"]]
+    assert "error" in response["results"][8]
+    assert 1 < state["peak"] <= 3
+    assert proxy.request_count == 9
+
+
+def test_batch_rejects_writes_before_running_anything(batch_db):
+    proxy, db, _ = batch_db
+    with pytest.raises(ValueError, match="Index 1"):
+        asyncio.run(db.execute_batch_async(["SELECT 1", "DELETE FROM s_kunden"]))
+    with pytest.raises(ValueError):
+        asyncio.run(db.execute_batch_async([]))
+    assert proxy.request_count == 0
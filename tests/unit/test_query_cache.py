@@ -0,0 +1,52 @@
+import time
+
+from app.query_cache import QueryCache, normalize_query
+
+
+def test_normalize_query_keeps_literals():
+    assert normalize_query("SELECT  *\n FROM [s_kunden] ;") == "SELECT * FROM [s_kunden]"
+    assert normalize_query("SELECT 'a  b'  AS x") == "SELECT 'a  b' AS x"
+    assert normalize_query('SELECT [a  b], "c  d"  FROM t') == 'SELECT [a  b], "c  d" FROM t'
+
+
+def test_normalize_query_respects_comments():
+    # Der Zeilenkommentar endet am Zeilenumbruch; die WHERE-Klausel gehört nur im ersten Fall zur Abfrage
+    assert normalize_query("SELECT a FROM t -- c\nWHERE x=1") == "SELECT a FROM t WHERE x=1"
+    assert normalize_query("SELECT a FROM t -- c WHERE x=1") == "SELECT a FROM t"
+    assert normalize_query("SELECT a /* x /* y */ z */ FROM t; -- Ende") == "SELECT a FROM t"
+    assert normalize_query("SELECT '--' AS a,  '/*' AS b") == "SELECT '--' AS a, '/*' AS b"
+
+
+def test_query_cache_ttl_and_lru():
+    cache = QueryCache(ttl=60, max_bytes=100)
+    cache.put("a", [{"x": 1}], 40)
+    cache.put("b", [{"x": 2}], 40)
+    assert cache.get("a") == [{"x": 1}]
+    # "b" ist jetzt am längsten ungenutzt und wird verdrängt
+    cache.put("c", [{"x": 3}], 40)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+    short = QueryCache(ttl=0.01, max_bytes=100)
+    short.put("a", [], 1)
+    time.sleep(0.02)
+    assert short.get("a") is None
+
+
+def test_execute_query_uses_cache(fake_db):
+    proxy, db = fake_db(lambda q: [{"x": 1}])
+    before = proxy.request_count
+    db.execute_query("SELECT TOP 10 * FROM [s_kunden]")
+    db.execute_query("SELECT TOP 10 *  FROM [s_kunden];")
+    assert proxy.request_count == before + 1
+    db.execute_query("SELECT TOP 10 * FROM [s_kunden]", use_cache=False)
+    assert proxy.request_count == before + 2
+    # Ein geändertes Schema invalidiert den Cache
+    proxy.responder = lambda q: (
+        [{"TABLE_NAME": "neu", "TABLE_TYPE": "BASE TABLE"}] if "INFORMATION_SCHEMA.TABLES" in q else []
+    )
+    db.refresh_schema_cache()
+    assert db.query_cache.stats()["entries"] == 0
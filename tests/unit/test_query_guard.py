@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.config import config
+from app.query_guard import QueryCostExceeded, count_query, plan
+
+
+@pytest.mark.parametrize("query,expected", [
+    ("SELECT * FROM [s_kunden]", "SELECT TOP (11) * FROM [s_kunden]"),
+    ("select distinct Kunde from p_auftrag order by 1", "select distinct TOP (11) Kunde from p_auftrag order by 1"),
+    ("WITH k AS (SELECT * FROM s_kunden) SELECT * FROM k;", "WITH k AS (SELECT * FROM s_kunden) SELECT TOP (11) * FROM k;"),
+    # eigene Begrenzung, keine Tabelle, mehrere Ergebnismengen oder Batch: unverändert
+    ("SELECT TOP 5 * FROM s_kunden", None),
+    ("SELECT 1 AS x", None),
+    ("SELECT a FROM x UNION ALL SELECT a FROM y", None),
+    ("SELECT * FROM t ORDER BY a OFFSET 0 ROWS FETCH NEXT 5 ROWS ONLY", None),
+    ("DECLARE @f varchar(3) = '000'; SELECT * FROM s_kunden WHERE Firma = @f", None),
+])
+def test_plan_injects_top(query, expected):
+    guarded = plan(query, 10)
+    assert guarded.query == (expected or query)
+    assert guarded.capped == (expected is not None)
+
+
+def test_count_query_and_tables():
+    assert plan("SELECT * FROM dbo.[p_auftrag] a JOIN s_kunden k ON k.Kunde = a.Kunde", 10).tables == (
+        "p_auftrag", "s_kunden")
+    assert count_query("SELECT a, b FROM p_auftrag WHERE Firma = '000' ORDER BY a;") == (
+        "SELECT COUNT_BIG(*) AS ROW_COUNT FROM p_auftrag WHERE Firma = '000'")
+    assert count_query("SELECT Kunde, COUNT(*) FROM p_auftrag GROUP BY Kunde") is None
+
+
+@pytest.fixture
+def guarded_db(fake_db):
+    def respond(query):
+        if "sys.partitions" in query:
+            return [{"TABLE_NAME": "p_buchung", "ROW_COUNT": 2_000_000}]
+        if "COUNT_BIG" in query:
+            return [{"ROW_COUNT": 25}]
+        return ({"id": i} for i in range(25))
+
+    return fake_db(respond, QUERY_ROW_CAP=10)
+
+
+def test_unbounded_select_is_truncated(guarded_db):
+    proxy, db = guarded_db
+    result = db.execute_query_result("SELECT * FROM [p_buchung]", use_cache=False)
+    assert len(result) == 10 and result.truncated
+    assert proxy.queries[-1] == "SELECT TOP (11) * FROM [p_buchung]"
+    envelope = asyncio.run(db.execute_query_result_async("SELECT * FROM [p_buchung]", use_cache=False)).to_envelope()
+    assert envelope["row_count"] == 10 and envelope["truncated"] is True
+    db.execute_query_result("SELECT 1 AS x")
+    assert proxy.queries[-1] == "SELECT 1 AS x"
+
+
+def test_refuse_mode_and_preflight(guarded_db, monkeypatch):
+    proxy, db = guarded_db
+    monkeypatch.setattr(config, "QUERY_COST_MODE", "refuse")
+    with pytest.raises(QueryCostExceeded):
+        db.execute_query_result("SELECT * FROM [p_buchung]", use_cache=False)
+
+    monkeypatch.setattr(config, "QUERY_PREFLIGHT", "stats")
+    monkeypatch.setattr(config, "QUERY_COST_BUDGET", 1000)
+    asked = proxy.request_count
+    with pytest.raises(QueryCostExceeded, match="2000000"):
+        asyncio.run(db.execute_query_result_async("SELECT * FROM [p_buchung] WHERE id > 5", use_cache=False))
+    # nur die Statistik wurde geladen, die Abfrage selbst nicht gesendet
+    assert proxy.request_count == asked + 1
+
+    monkeypatch.setattr(config, "QUERY_COST_MODE", "truncate")
+    monkeypatch.setattr(config, "QUERY_PREFLIGHT", "count")
+    result = db.execute_query_result("SELECT * FROM [p_buchung] ORDER BY id", use_cache=False)
+    assert result.truncated and result.estimated_rows == 25
+    assert proxy.queries[-2] == "SELECT COUNT_BIG(*) AS ROW_COUNT FROM [p_buchung]"
+
+
+def test_repeated_query_is_not_tokenized_again(guarded_db, monkeypatch):
+    proxy, db = guarded_db
+    query = "SELECT * FROM [p_buchung] WHERE id < 100"
+    first = db.execute_query_result(query)
+    tokenized = []
+    monkeypatch.setattr("app.query_guard.iter_tokens", lambda q: tokenized.append(q) or iter(()))
+    assert db.execute_query_result(query) is first
+    assert asyncio.run(db.execute_query_result_async(query)) is first
+    assert tokenized == [] and proxy.request_count == 1
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from app.result_format import ColumnarResult
+
+
+def test_columnar_result_formats():
+    rows = [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}]
+    result = ColumnarResult.from_records(rows)
+    assert result.to_records() == rows
+    assert result.to_payload("columnar") == {"columns": ["id", "name"], "rows": [[1, "a"], [2, "b"]]}
+    assert result.to_payload("columns") == {"columns": ["id", "name"], "data": [[1, 2], ["a", "b"]]}
+    assert result.to_envelope("columnar", "tok")["next_cursor"] == "tok"
+    assert ColumnarResult().to_payload("columns") == {"columns": [], "data": []}
+    with pytest.raises(ValueError, match="Ergebnisformat"):
+        result.to_payload("csv")
+
+
+def test_columnar_result_handles_varying_keys():
+    result = ColumnarResult.from_records([{"a": 1}, {"a": 2, "b": 3}, {"b": 4}])
+    assert result.columns == ["a", "b"]
+    assert result.rows == [[1, None], [2, 3], [None, 4]]
+
+
+def test_execute_query_result_is_cached_columnar(fake_db):
+    proxy, db = fake_db(lambda q: [{"id": i, "name": f"n{i}"} for i in range(5)])
+
+    async def run():
+        first = await db.execute_query_result_async("SELECT * FROM t")
+        page = await db.fetch_page_async("SELECT * FROM t", page_size=2, fmt="columns")
+        records = await db.execute_query_async("SELECT * FROM t")
+        return first, page, records
+
+    first, page, records = asyncio.run(run())
+    assert first.columns == ["id", "name"]
+    assert page["data"] == [[0, 1], ["n0", "n1"]] and page["next_cursor"]
+    # Zweiter Aufruf kommt aus dem Cache
+    assert records == [{"id": i, "name": f"n{i}"} for i in range(5)]
+    assert proxy.request_count == 2
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from app.schema_catalog import SchemaCatalog
+
+
+def _col(table, name, data_type):
+    return {"TABLE_NAME": table, "COLUMN_NAME": name, "DATA_TYPE": data_type}
+
+
+SCHEMA = {
+    "tables": {
+        "s_kunden": {"type": "BASE TABLE", "columns": [_col("s_kunden", "Kunde", "nvarchar")]},
+        "P_Auftrag": {"type": "BASE TABLE", "columns": [
+            _col("P_Auftrag", "Auftrag", "nvarchar"), _col("P_Auftrag", "Kunde", "nvarchar")]},
+        "p_artikel": {"type": "BASE TABLE", "columns": []},
+        "p_position": {"type": "BASE TABLE", "columns": []},
+    },
+    "views": {"v_umsatz": {"columns": [_col("v_umsatz", "Umsatz", "decimal")]}},
+    "relationships": [
+        {"FK_Name": "fk_auf_kunde", "ParentTable": "P_Auftrag", "ParentColumn": "Kunde",
+         "ReferencedTable": "s_kunden", "ReferencedColumn": "Kunde"},
+    ],
+}
+
+
+def _page(catalog, *args, **kwargs):
+    return json.loads(catalog.page(*args, **kwargs))
+
+
+def test_pages_follow_cursor_within_prefix():
+    catalog = SchemaCatalog(SCHEMA)
+    first = _page(catalog, "tables", prefix="P_", limit=2)
+    assert first["items"] == ["p_artikel", "P_Auftrag"]
+    assert first["total"] == 3
+    second = _page(catalog, "tables", prefix="p_", cursor=first["next_cursor"], limit=2)
+    assert second == {"items": ["p_position"], "total": 3, "next_cursor": None}
+    assert _page(catalog, "tables")["items"] == ["p_artikel", "P_Auftrag", "p_position", "s_kunden"]
+    assert _page(catalog, "tables", prefix="x")["items"] == []
+
+
+def test_projections():
+    catalog = SchemaCatalog(SCHEMA)
+    summary = {item["name"]: item for item in _page(catalog, "tables", "summary")["items"]}
+    assert summary["P_Auftrag"] == {
+        "name": "P_Auftrag", "kind": "table", "column_count": 2, "references": ["s_kunden"], "referenced_by": 0,
+    }
+    assert summary["s_kunden"]["referenced_by"] == 1
+    assert _page(catalog, "views", "types")["items"] == [
+        {"name": "v_umsatz", "columns": [{"name": "Umsatz", "type": "decimal"}]}
+    ]
+    full = _page(catalog, "tables", "full", prefix="s_")["items"][0]
+    assert full == {"name": "s_kunden", **SCHEMA["tables"]["s_kunden"]}
+    assert json.loads(catalog.full) == SCHEMA
+    # Älteres Cache-Format (schema_cache/schema.json) mit {name, type}
+    legacy = SchemaCatalog({"tables": {"t": {"columns": [{"name": "id", "type": "int"}, {"type": "int"}]}}})
+    assert _page(legacy, "tables", "types")["items"] == [{"name": "t", "columns": [{"name": "id", "type": "int"}]}]
+
+
+def test_rejects_unknown_arguments():
+    catalog = SchemaCatalog(SCHEMA)
+    with pytest.raises(ValueError):
+        catalog.page("tables", "everything")
+    with pytest.raises(ValueError):
+        catalog.page("indexes")
+    with pytest.raises(ValueError):
+        catalog.page("tables", cursor="!!!")
@@ -0,0 +1,60 @@
+import json
+import os
+
+from app.schema_index import SchemaIndex, assemble_schema, get_schema_index
+
+
+def _write_schema(path, tables):
+    path.write_text(json.dumps({"tables": tables, "views": {}, "relationships": []}))
+
+
+def test_schema_index_parses_once(tmp_path):
+    cache_file = tmp_path / "schema.json"
+    _write_schema(cache_file, {"s_kunden": {"type": "BASE TABLE", "columns": []}})
+    index = SchemaIndex(cache_file)
+    first = index.schema
+    assert index.get_table("s_kunden")["type"] == "BASE TABLE"
+    assert index.get_table("fehlt") is None
+    # Unveränderte Datei -> dasselbe Objekt, keine neue Version
+    assert index.schema is first
+    assert index.version == 1
+
+
+def test_schema_index_reloads_on_file_change(tmp_path):
+    cache_file = tmp_path / "schema.json"
+    _write_schema(cache_file, {"a": {"columns": []}})
+    index = SchemaIndex(cache_file)
+    assert index.get_table("a") is not None
+    _write_schema(cache_file, {"b": {"columns": []}})
+    st = os.stat(cache_file)
+    os.utime(cache_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert index.get_table("a") is None
+    assert index.get_table("b") is not None
+    assert index.version == 2
+
+
+def test_schema_index_update_and_missing_file(tmp_path):
+    index = SchemaIndex(tmp_path / "schema.json")
+    assert index.schema == {"tables": {}, "views": {}, "relationships": []}
+    index.update({"tables": {}, "views": {"v_umsatz": {"columns": []}}, "relationships": []})
+    assert index.get_view("v_umsatz") == {"columns": []}
+    assert index.version == 1
+
+
+def test_get_schema_index_is_shared(tmp_path):
+    assert get_schema_index(tmp_path / "schema.json") is get_schema_index(tmp_path / "schema.json")
+
+
+def test_assemble_schema_groups_columns():
+    tables = [{"TABLE_NAME": "s_kunden", "TABLE_TYPE": "BASE TABLE"}, {"TABLE_NAME": "leer", "TABLE_TYPE": "BASE TABLE"}]
+    views = [{"TABLE_NAME": "v_kunden"}]
+    columns = [
+        {"TABLE_NAME": "s_kunden", "COLUMN_NAME": "id", "DATA_TYPE": "int"},
+        {"TABLE_NAME": "v_kunden", "COLUMN_NAME": "id", "DATA_TYPE": "int"},
+        {"TABLE_NAME": "s_kunden", "COLUMN_NAME": "name", "DATA_TYPE": "nvarchar"},
+    ]
+    schema = assemble_schema(tables, columns, views, [])
+    assert [c["COLUMN_NAME"] for c in schema["tables"]["s_kunden"]["columns"]] == ["id", "name"]
+    assert schema["tables"]["s_kunden"]["type"] == "BASE TABLE"
+    assert schema["tables"]["leer"]["columns"] == []
+    assert [c["COLUMN_NAME"] for c in schema["views"]["v_kunden"]["columns"]] == ["id"]
@@ -0,0 +1,75 @@
+import asyncio
+import re
+
+import pytest
+
+
+class FakeCatalog:
+    """Simuliert INFORMATION_SCHEMA und sys.objects für den Fake-Proxy."""
+
+    def __init__(self):
+        self.objects = {
+            "s_kunden": ("U", "2024-01-01T00:00:00"),
+            "p_artikel": ("U", "2024-01-01T00:00:00"),
+            "v_umsatz": ("V", "2024-01-01T00:00:00"),
+        }
+        self.columns = {"s_kunden": ["id", "name"], "p_artikel": ["id"], "v_umsatz": ["summe"]}
+
+    def __call__(self, query):
+        match = re.search(r"IN \((.*)\)\s*$", query, re.S)
+        names = re.findall(r"'([^']*)'", match.group(1)) if match and "TABLE_NAME IN" in query else None
+        wanted = [n for n in self.objects if names is None or n in names]
+        if "sys.objects" in query:
+            return [{"OBJECT_NAME": n, "OBJECT_TYPE": t, "MODIFY_DATE": d} for n, (t, d) in self.objects.items()]
+        if "INFORMATION_SCHEMA.TABLES" in query:
+            return [{"TABLE_NAME": n, "TABLE_TYPE": "BASE TABLE" if self.objects[n][0] == "U" else "VIEW"}
+                    for n in wanted]
+        if "INFORMATION_SCHEMA.COLUMNS" in query:
+            return [{"TABLE_NAME": n, "COLUMN_NAME": c, "DATA_TYPE": "int"} for n in wanted for c in self.columns[n]]
+        if "INFORMATION_SCHEMA.VIEWS" in query:
+            return [{"TABLE_NAME": n} for n in wanted if self.objects[n][0] == "V"]
+        return []
+
+
+def test_incremental_refresh_fetches_only_changed_objects(fake_db, tmp_path):
+    catalog = FakeCatalog()
+    proxy, db = fake_db(catalog, SCHEMA_CACHE_JSON_EXPORT=True)
+    assert db.refresh_schema_cache(incremental=True)["mode"] == "full"
+    assert db.schema_store.load_snapshot()["watermark"] == "2024-01-01T00:00:00"
+
+    # Nichts geändert: nur die sys.objects-Abfrage
+    before = proxy.request_count
+    assert db.refresh_schema_cache(incremental=True) == {"mode": "incremental", "changed": 0, "dropped": 0}
+    assert proxy.request_count == before + 1
+
+    catalog.objects["s_kunden"] = ("U", "2024-02-01T00:00:00")
+    catalog.columns["s_kunden"].append("ort")
+    del catalog.objects["p_artikel"]
+    untouched = tmp_path / "views" / "v_umsatz.json"
+    mtime = untouched.stat().st_mtime_ns
+    summary = db.refresh_schema_cache(incremental=True)
+    assert summary == {"mode": "incremental", "changed": 1, "dropped": 1}
+    assert [c["COLUMN_NAME"] for c in db.get_table_schema("s_kunden")["columns"]] == ["id", "name", "ort"]
+    assert db.get_table_schema("p_artikel") is None
+    assert db.get_view_schema("v_umsatz") is not None
+    assert not (tmp_path / "tables" / "p_artikel.json").exists()
+    assert untouched.stat().st_mtime_ns == mtime
+    changed_queries = [q for q in proxy.queries[before + 1:] if "TABLE_NAME IN" in q]
+    assert changed_queries and all("'s_kunden'" in q and "p_artikel" not in q for q in changed_queries)
+
+
+def test_failed_refresh_raises_and_keeps_cache(fake_db):
+    catalog = FakeCatalog()
+    state = {"broken": False}
+
+    def respond(query):
+        return b"[{\"TABLE_NAME\": " if state["broken"] else catalog(query)
+
+    _, db = fake_db(respond)
+    db.refresh_schema_cache()
+    state["broken"] = True
+    with pytest.raises(Exception):
+        db.refresh_schema_cache()
+    with pytest.raises(Exception):
+        asyncio.run(db.refresh_schema_cache_async())
+    assert db.get_table_schema("s_kunden") is not None
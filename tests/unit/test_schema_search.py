@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.schema_index import SchemaIndex
+from app.schema_search import SchemaSearch
+
+
+def _col(table, name, data_type):
+    return {"TABLE_NAME": table, "COLUMN_NAME": name, "DATA_TYPE": data_type}
+
+
+SCHEMA = {
+    "tables": {
+        "s_kunden": {"type": "BASE TABLE", "columns": [
+            _col("s_kunden", "Kunde", "nvarchar"), _col("s_kunden", "Name1", "nvarchar"),
+            _col("s_kunden", "Anlagedatum", "datetime")]},
+        "p_artikel": {"type": "BASE TABLE", "columns": [
+            _col("p_artikel", "Artikel", "nvarchar"), _col("p_artikel", "Bezeichnung1", "nvarchar"),
+            _col("p_artikel", "Kunde", "nvarchar")]},
+        "p_auftrag": {"type": "BASE TABLE", "columns": [
+            _col("p_auftrag", "Auftrag", "nvarchar"), _col("p_auftrag", "Lieferdatum", "datetime")]},
+    },
+    "views": {"v_kundenumsatz": {"columns": [_col("v_kundenumsatz", "Umsatz", "decimal")]}},
+    "relationships": [],
+}
+
+
+def test_search_ranks_prefix_and_fuzzy_matches():
+    index = SchemaSearch(SCHEMA)
+    matches = index.search("kunde")
+    # exakter Spaltenname vor Namensbestandteil (s_kunden, v_kundenumsatz)
+    assert [(m["kind"], m["table"]) for m in matches[:2]] == [("column", "p_artikel"), ("column", "s_kunden")]
+    assert {"s_kunden", "v_kundenumsatz"} <= {m["table"] for m in matches if m["kind"] != "column"}
+    # Tippfehler über Trigramme
+    assert index.search("artikle")[0]["table"] == "p_artikel"
+    assert sorted(m["column"] for m in index.search("datum", data_type="DATETIME")) == ["Anlagedatum", "Lieferdatum"]
+    assert all(m["kind"] == "view" for m in index.search("kunden", kind="view"))
+    assert index.search("   ") == []
+    with pytest.raises(ValueError):
+        index.search("x", kind="index")
+
+
+def test_schema_index_builds_search_per_version(tmp_path):
+    index = SchemaIndex(tmp_path / "schema.json")
+    index.update(SCHEMA)
+    first = index.search_index
+    assert index.search_index is first
+    index.update({"tables": {"s_lager": {"type": "BASE TABLE", "columns": []}}, "views": {}, "relationships": []})
+    assert index.search_index.search("lager")[0]["table"] == "s_lager"
+
+
+def test_search_over_bundled_legacy_cache():
+    # schema_cache/schema.json speichert Spalten als {name, type, nullable}
+    bundled = Path(__file__).resolve().parents[2] / "schema_cache" / "schema.json"
+    schema = json.loads(bundled.read_text(encoding="utf-8"))
+    schema["tables"]["sample_table"]["columns"].append({"type": "int"})
+    index = SchemaSearch(schema)
+    match = index.search("created")[0]
+    assert match["table"] == "sample_table" and match["column"] == "created_at"
+    assert [m["column"] for m in index.search("id", kind="column", data_type="int")] == ["id"]
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from app.schema_index import SchemaIndex
+from app.schema_store import SchemaStore, SchemaStoreSource, export_json_layout
+
+
+def _schema(**tables):
+    return {"tables": tables, "views": {"v_umsatz": {"columns": []}}, "relationships": []}
+
+
+def test_store_roundtrip_and_skips_unchanged(tmp_path):
+    store = SchemaStore(tmp_path / "schema.db")
+    schema = _schema(s_kunden={"type": "BASE TABLE", "columns": [{"COLUMN_NAME": "id"}]})
+    first = store.write(schema, {"watermark": "2024-01-01", "objects": ["s_kunden"]})
+    assert sorted(first["changed"]) == [("table", "s_kunden"), ("view", "v_umsatz")]
+    assert store.load() == schema
+    assert store.load_snapshot()["watermark"] == "2024-01-01"
+
+    second = store.write(schema)
+    assert second == {"changed": [], "removed": [], "relationships_changed": False}
+
+    third = store.write(_schema(p_artikel={"type": "BASE TABLE", "columns": []}))
+    assert third["changed"] == [("table", "p_artikel")]
+    assert third["removed"] == [("table", "s_kunden")]
+
+
+def test_store_write_is_atomic(tmp_path):
+    store = SchemaStore(tmp_path / "schema.db")
+    store.write(_schema(s_kunden={"columns": []}))
+    broken = _schema(a={"columns": []}, b={"columns": [object()]})
+    with pytest.raises(TypeError):
+        store.write(broken)
+    assert set(store.load()["tables"]) == {"s_kunden"}
+
+
+def test_store_source_falls_back_to_json(tmp_path):
+    (tmp_path / "schema.json").write_text(json.dumps(_schema(alt={"columns": []})))
+    store = SchemaStore(tmp_path / "schema.db")
+    index = SchemaIndex(SchemaStoreSource(store, tmp_path / "schema.json"))
+    assert index.get_table("alt") is not None
+    store.write(_schema(neu={"columns": []}))
+    assert index.get_table("neu") is not None and index.get_table("alt") is None
+
+
+def test_export_json_layout_writes_only_changed(tmp_path):
+    schema = _schema(s_kunden={"columns": []}, p_artikel={"columns": []})
+    export_json_layout(tmp_path, schema, [], [])
+    assert json.loads((tmp_path / "schema.json").read_text()) == schema
+    path = tmp_path / "tables" / "p_artikel.json"
+    mtime = path.stat().st_mtime_ns
+    export_json_layout(tmp_path, schema, [("table", "s_kunden")], [("table", "alt")])
+    assert path.stat().st_mtime_ns == mtime
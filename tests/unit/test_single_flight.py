@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.single_flight import SingleFlight
+from tests.unit.test_schema_refresh import FakeCatalog
+
+
+def test_concurrent_identical_queries_share_one_request(fake_db):
+    n = 10
+    proxy, db = fake_db(lambda q: [{"x": 1}], latency=0.3)
+
+    async def run_all():
+        # Unterschiedliche Schreibweise, gleiche normalisierte Abfrage; Cache umgangen
+        return await asyncio.gather(
+            *(db.execute_query_async("SELECT 1 AS x" + " " * i, use_cache=False) for i in range(n))
+        )
+
+    results = asyncio.run(run_all())
+    assert results == [[{"x": 1}]] * n
+    assert proxy.request_count == 1
+
+    threads = [threading.Thread(target=db.execute_query, args=("SELECT 2 AS x",)) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert proxy.request_count == 2
+
+
+def test_concurrent_refreshes_run_once(fake_db):
+    proxy, db = fake_db(FakeCatalog(), latency=0.2)
+
+    async def run_all():
+        # Hintergrund-Refresh (Thread) und mehrere Tool-Aufrufe gleichzeitig
+        background = asyncio.create_task(asyncio.to_thread(db.refresh_schema_cache))
+        await asyncio.sleep(0.05)
+        summaries = await asyncio.gather(*(db.refresh_schema_cache_async() for _ in range(5)))
+        return summaries + [await background]
+
+    summaries = asyncio.run(run_all())
+    # Ein vollständiger Refresh = 5 Metadaten-Abfragen
+    assert proxy.request_count == 5
+    assert all(s == summaries[0] for s in summaries)
+
+
+def test_errors_reach_all_waiters_and_cancellation_hands_over():
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise ValueError("kaputt")
+
+    async def run_errors():
+        return await asyncio.gather(*(flights.ado("k", failing) for _ in range(3)), return_exceptions=True)
+
+    assert [type(e) for e in asyncio.run(run_errors())] == [ValueError] * 3
+    assert flights.in_flight() == 0
+
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def run_cancel():
+        leader = asyncio.create_task(flights.ado("k", slow))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flights.ado("k", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    # Der Wartende übernimmt nach dem Abbruch des ausführenden Aufrufs selbst
+    assert asyncio.run(run_cancel()) == "ok"
+    assert len(calls) == 2
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from app.result_format import ColumnarResult
+from app.snapshot_store import SnapshotNotFound, SnapshotStore
+
+ORDERS = [
+    {"Kunde": "A", "Betrag": 10.5, "Offen": True},
+    {"Kunde": "B", "Betrag": 4.0, "Offen": False},
+    {"Kunde": "A", "Betrag": 1.5, "Offen": True},
+]
+
+
+def _result(records):
+    return ColumnarResult.from_records(records)
+
+
+def test_create_and_query_locally():
+    store = SnapshotStore(ttl=60, max_bytes=1 << 20)
+    info = store.create("SELECT * FROM p_auftrag", _result(ORDERS))
+    assert info["row_count"] == 3 and info["columns"] == ["Kunde", "Betrag", "Offen"]
+    handle = info["handle"]
+
+    result = store.query(
+        f"SELECT Kunde, SUM(Betrag) AS Summe FROM {handle} WHERE Offen GROUP BY Kunde ORDER BY Kunde", 100
+    )
+    assert result.columns == ["Kunde", "Summe"]
+    assert result.rows == [["A", 12.0]]
+
+    result = store.query(f"SELECT * FROM {handle.upper()}", 2)
+    assert len(result) == 2 and result.truncated
+
+
+def test_rejects_writes_and_multiple_statements():
+    store = SnapshotStore(ttl=60, max_bytes=1 << 20)
+    handle = store.create("SELECT 1", _result(ORDERS))["handle"]
+    for sql in (f"DELETE FROM {handle}", f"DROP TABLE {handle}", "ATTACH DATABASE 'x.db' AS x",
+                f"SELECT 1; DELETE FROM {handle}", "PRAGMA writable_schema = 1"):
+        with pytest.raises(ValueError):
+            store.query(sql, 10)
+    assert len(store.query(f"SELECT * FROM {handle}", 10)) == 3
+
+
+def test_query_timeout():
+    store = SnapshotStore(ttl=60, max_bytes=1 << 20, query_timeout=0.05)
+    with pytest.raises(TimeoutError):
+        store.query("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT COUNT(*) FROM n", 10)
+    # Verbindung danach wieder nutzbar
+    assert store.query("SELECT 1 AS x", 10).rows == [[1]]
+
+
+def test_ttl_and_budget_eviction():
+    store = SnapshotStore(ttl=0.05, max_bytes=1 << 20)
+    handle = store.create("SELECT 1", _result(ORDERS))["handle"]
+    time.sleep(0.1)
+    assert store.entries() == []
+    with pytest.raises(ValueError, match="no such table"):
+        store.query(f"SELECT * FROM {handle}", 10)
+
+    rows = [{"id": i, "text": "x" * 100} for i in range(10)]
+    store = SnapshotStore(ttl=60, max_bytes=2500)
+    first = store.create("q1", _result(rows))["handle"]
+    second = store.create("q2", _result(rows))["handle"]
+    # Zugriff auf den ersten Snapshot: der zweite ist nun am längsten ungenutzt
+    store.query(f"SELECT COUNT(*) FROM {first}", 10)
+    third = store.create("q3", _result(rows))["handle"]
+    assert [e["handle"] for e in store.entries()] == [first, third]
+    assert store.evictions == 1 and store.bytes <= 2500
+    with pytest.raises(ValueError, match="zu groß"):
+        store.create("q4", _result(rows * 3))
+
+    store.drop(first)
+    with pytest.raises(SnapshotNotFound):
+        store.drop(second)
+
+
+def test_database_manager_snapshot_roundtrip(fake_db):
+    proxy, db = fake_db(lambda query: ORDERS)
+
+    async def scenario():
+        info = await db.create_snapshot_async("SELECT Kunde, Betrag, Offen FROM p_auftrag", use_cache=False)
+        handle = info["handle"]
+        counts = await asyncio.gather(*(
+            db.query_snapshot_async(f"SELECT COUNT(*) AS n FROM {handle} WHERE Kunde = '{k}'", fmt="columnar")
+            for k in ("A", "B")
+        ))
+        return counts
+
+    counts = asyncio.run(scenario())
+    assert [c["rows"] for c in counts] == [[[2]], [[1]]]
+    assert proxy.request_count == 1
+    with pytest.raises(ValueError):
+        asyncio.run(db.create_snapshot_async("DELETE FROM p_auftrag"))
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.sse_stream import QueryStream, StreamRegistry, parse_event_id
+
+
+def _parse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def sse_client(fake_db, monkeypatch):
+    _, db = fake_db(lambda query: ({"id": i} for i in range(7)), SCHEMA_REFRESH_ON_START=False)
+    import app.http_api as http_api
+    monkeypatch.setattr(http_api, "db", db)
+    with TestClient(http_api.app) as client:
+        yield client
+
+
+def test_query_streams_chunks_and_resumes_after_last_event_id(sse_client):
+    response = sse_client.post("/sse", json={"query": "SELECT id FROM s_kunden", "chunk_rows": 3})
+    assert response.status_code == 200
+    events = _parse(response.text)
+    assert [name for _, name, _ in events] == ["start", "rows", "rows", "rows", "done"]
+    assert [row["id"] for _, name, data in events if name == "rows" for row in data["rows"]] == list(range(7))
+    assert events[-1][2]["row_count"] == 7 and events[-1][2]["truncated"] is False
+
+    stream_id, _ = parse_event_id(events[1][0])
+    resumed = _parse(sse_client.get("/sse", headers={"Last-Event-ID": events[2][0]}).text)
+    assert [e[0] for e in resumed] == [e[0] for e in events[3:]]
+    # alles ausgeliefert: 204, damit EventSource nicht erneut verbindet
+    assert sse_client.get("/sse", headers={"Last-Event-ID": events[-1][0]}).status_code == 204
+    assert sse_client.get("/sse", params={"stream_id": "unbekannt"}).status_code == 404
+    assert sse_client.get("/sse", params={"query": "DELETE FROM s_kunden"}).status_code == 400
+
+
+class _SlowDb:
+    def __init__(self, rows, delay):
+        self.rows = rows
+        self.delay = delay
+
+    async def stream_guarded_async(self, query, info, long_lived=False):
+        info["truncated"] = False
+        for i in range(self.rows):
+            await asyncio.sleep(self.delay)
+            yield {"id": i}
+
+
+def test_producer_waits_for_slow_client_and_heartbeats_fill_gaps():
+    async def scenario():
+        stream = QueryStream("s", "SELECT 1", "columnar", 1, 4, 60.0, 5.0)
+        producer = asyncio.ensure_future(stream.produce(_SlowDb(10, 0.0)))
+        await asyncio.sleep(0.05)
+        # Puffer (4 Ereignisse) voll, nichts abgeholt: die Abfrage wartet
+        assert not producer.done() and len(stream.events) == 4
+        received = [text async for text in stream.listen(0, 5.0)]
+        await producer
+        assert received[-1].startswith("id: s:12\nevent: done")
+
+        slow = QueryStream("t", "SELECT 1", "records", 10, 16, 60.0, 5.0)
+        producer = asyncio.ensure_future(slow.produce(_SlowDb(1, 0.2)))
+        texts = [text async for text in slow.listen(0, 0.05)]
+        await producer
+        assert ": heartbeat\n\n" in texts
+
+    asyncio.run(scenario())
+
+
+def test_parked_streams_do_not_starve_queries(fake_db):
+    rows = lambda query: ({"id": i, "text": "abc" * 10} for i in range(2000))
+    _, db = fake_db(rows, PROXY_POOL_SIZE=1, PROXY_READ_TIMEOUT=2.0)
+
+    async def scenario():
+        registry = StreamRegistry(max_streams=2, retention=5.0)
+        # Kein Client holt ab: beide Abfragen warten mit offener Proxy-Verbindung
+        streams = [registry.start(db, "SELECT * FROM [p_buchung]", chunk_rows=1, buffer_events=2) for _ in range(2)]
+        await asyncio.sleep(0.2)
+        assert not any(s.finished for s in streams)
+        started = time.monotonic()
+        for _ in range(2):
+            assert len(await db.execute_query_async("SELECT 1 AS ok", use_cache=False)) == 2000
+        assert time.monotonic() - started < 1.0
+        with pytest.raises(ValueError, match="Read-Only"):
+            registry.start(db, "DELETE FROM s_kunden")
+        registry.cancel_all()
+        await asyncio.gather(*(s.task for s in streams), return_exceptions=True)
+
+    asyncio.run(scenario())
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+import tracemalloc
+
+import pytest
+
+from app.config import config
+from app.streaming import ResultLimitExceeded, ResultStreamParser
+
+
+def _parse_in_chunks(body: bytes, size: int, max_item_bytes: int = 1 << 20):
+    parser = ResultStreamParser(max_item_bytes)
+    rows = []
+    for i in range(0, len(body), size):
+        rows += parser.feed(body[i:i + size])
+    return rows + parser.close()
+
+
+def test_parser_handles_any_chunking():
+    rows = [{"id": i, "name": 'Müller "%d" \\ ]},' % i, "betrag": 1.5 * i, "x": None} for i in range(20)]
+    body = json.dumps({"results": rows}).encode("utf-8")
+    for size in (1, 3, 7, 64, len(body)):
+        assert _parse_in_chunks(body, size) == rows
+    assert _parse_in_chunks(json.dumps([1, 22, 333]).encode(), 1) == [1, 22, 333]
+
+
+def test_parser_falls_back_for_other_shapes():
+    with pytest.raises(ValueError, match="API-Fehler"):
+        _parse_in_chunks(json.dumps({"error": "Syntaxfehler"}).encode(), 5)
+    body = json.dumps({"meta": {"x": 1}, "results": [{"a": 1}]}).encode()
+    assert _parse_in_chunks(body, 5) == [{"a": 1}]
+
+
+def test_parser_limits_row_size():
+    body = json.dumps({"results": [{"blob": "x" * 1000}]}).encode()
+    with pytest.raises(ResultLimitExceeded):
+        _parse_in_chunks(body, 100, max_item_bytes=500)
+
+
+@pytest.fixture
+def proxy_db(fake_db):
+    return fake_db(lambda q: ({"id": i, "text": "abc" * 10} for i in range(25)))
+
+
+def test_fetch_page_async_paginates(proxy_db):
+    proxy, db = proxy_db
+
+    async def run():
+        pages = [await db.fetch_page_async("SELECT * FROM [p_buchung]", page_size=10)]
+        while pages[-1]["next_cursor"]:
+            pages.append(await db.fetch_page_async(cursor=pages[-1]["next_cursor"], page_size=10))
+        return pages
+
+    pages = asyncio.run(run())
+    assert [p["row_count"] for p in pages] == [10, 10, 5]
+    assert [r["id"] for p in pages for r in p["rows"]] == list(range(25))
+    assert db.cursors.open_count() == 0
+    assert proxy.request_count == 1
+
+
+def test_execute_query_enforces_row_ceiling(proxy_db, monkeypatch):
+    _, db = proxy_db
+    monkeypatch.setattr(config, "MAX_RESULT_ROWS", 5)
+    with pytest.raises(ResultLimitExceeded):
+        db.execute_query("SELECT * FROM [p_buchung]")
+    with pytest.raises(ResultLimitExceeded):
+        asyncio.run(db.execute_query_async("SELECT * FROM [p_buchung]", use_cache=False))
+
+
+def test_streaming_memory_stays_flat(fake_db):
+    n = 30_000
+    row = {"id": 0, "konto": "4711", "text": "Buchung " * 8, "betrag": 12.5}
+    _, db = fake_db(lambda q: (dict(row, id=i) for i in range(n)))
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in db.stream_query("SELECT * FROM [p_buchung]"))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert count == n
+    # Die Antwort ist ~3,5 MB groß; gestreamt bleibt der Spitzenbedarf weit darunter
+    assert peak < 1024 * 1024
+
+
+# Kleiner Pool für normale Abfragen und lange Antworten, die einen Cursor offen halten
+SMALL_POOL = {"PROXY_POOL_SIZE": 3, "PROXY_CONNECT_TIMEOUT": 1.0, "PROXY_READ_TIMEOUT": 2.0, "CURSOR_MAX_OPEN": 3}
+
+
+def _long_rows(query):
+    return ({"id": i, "text": "abc" * 10} for i in range(2000))
+
+
+def test_parked_cursors_do_not_starve_queries(fake_db):
+    _, db = fake_db(_long_rows, **SMALL_POOL)
+
+    async def run():
+        # Mehr abgebrochene Cursor als Verbindungen im Pool der normalen Abfragen
+        for _ in range(4):
+            page = await db.fetch_page_async("SELECT * FROM [p_buchung]", page_size=10)
+            assert page["next_cursor"]
+        assert db.cursors.open_count() == 3
+        started = time.monotonic()
+        for _ in range(3):
+            assert len(await db.execute_query_async("SELECT 1 AS ok", use_cache=False)) == 2000
+        assert time.monotonic() - started < 1.0
+
+    asyncio.run(run())
+
+
+def test_expired_cursors_are_swept(fake_db):
+    _, db = fake_db(_long_rows, CURSOR_TTL=0.2, **SMALL_POOL)
+
+    async def run():
+        await db.fetch_page_async("SELECT * FROM [p_buchung]", page_size=10)
+        assert db.cursors.open_count() == 1
+        # Ohne weitere Anfrage schließt der Timer den verfallenen Cursor
+        await asyncio.sleep(0.4)
+        assert db.cursors.open_count() == 0
+
+    asyncio.run(run())
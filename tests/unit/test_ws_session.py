@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _partial(release):
+    # Die ersten zwei Zeilen sofort, der Rest erst nach release
+    yield from ({"id": i} for i in range(2))
+    release.wait(5)
+    yield from ({"id": i} for i in range(2, 5))
+
+
+@pytest.fixture
+def ws_client(fake_db, monkeypatch):
+    release = threading.Event()
+
+    def respond(query):
+        if "langsam" in query:
+            release.wait(5)
+        if "teilweise" in query:
+            return _partial(release)
+        return ({"id": i, "name": f"n{i}"} for i in range(5))
+
+    _, db = fake_db(respond, WS_CHUNK_ROWS=2, WS_MAX_IN_FLIGHT=2)
+    import app.http_api as http_api
+    monkeypatch.setattr(http_api, "db", db)
+    yield TestClient(http_api.app), release
+    release.set()
+
+
+def _frames(ws, request_id, until):
+    frames = []
+    while True:
+        frame = ws.receive_json()
+        if frame.get("request_id") == request_id:
+            frames.append(frame)
+            if frame["type"] in until:
+                return frames
+
+
+def test_slow_request_does_not_block_others_and_can_be_cancelled(ws_client):
+    client, release = ws_client
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"id": "execute_sql", "request_id": "slow", "parameters": {"query": "SELECT * FROM langsam"}})
+        ws.send_json({"id": "execute_sql", "request_id": "fast",
+                      "parameters": {"query": "SELECT id, name FROM s_kunden", "format": "columnar"}})
+        frames = _frames(ws, "fast", ("done", "error"))
+        assert [f["type"] for f in frames] == ["start", "rows", "rows", "rows", "done"]
+        assert frames[0]["columns"] == ["id", "name"]
+        assert frames[1]["rows"] == [[0, "n0"], [1, "n1"]]
+        assert frames[-1]["row_count"] == 5 and frames[-1]["truncated"] is False
+
+        # "slow" belegt einen der zwei Plätze; ein dritter Auftrag passt noch, ein vierter nicht
+        ws.send_json({"id": "execute_sql", "request_id": "slow2", "parameters": {"query": "SELECT 1 FROM langsam"}})
+        ws.send_json({"id": "execute_sql", "request_id": "extra", "parameters": {"query": "SELECT 2"}})
+        assert _frames(ws, "extra", ("done", "error"))[-1]["type"] == "error"
+
+        ws.send_json({"id": "cancel", "request_id": "slow"})
+        assert _frames(ws, "slow", ("done", "error", "cancelled"))[-1]["type"] == "cancelled"
+        release.set()
+        assert _frames(ws, "slow2", ("done", "error", "cancelled"))[-1]["type"] == "done"
+
+
+def test_messages_without_request_id_keep_the_old_format(ws_client):
+    client, _ = ws_client
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"id": "execute_sql", "parameters": {"query": "SELECT id, name FROM s_kunden"}})
+        ws.send_json({"id": "unknown"})
+        reply = ws.receive_json()
+        assert reply["result"][0] == {"id": 0, "name": "n0"} and reply["truncated"] is False
+        assert ws.receive_json() == {"error": "Unknown tool id"}
+
+
+def test_uncached_rows_are_forwarded_before_the_proxy_finishes(ws_client):
+    client, release = ws_client
+    with client.websocket_connect("/ws") as ws:
+        ws.send_json({"id": "execute_sql", "request_id": "s", "parameters": {"query": "SELECT id FROM teilweise"}})
+        assert ws.receive_json() == {"request_id": "s", "type": "start", "columns": ["id"]}
+        assert ws.receive_json()["rows"] == [{"id": 0}, {"id": 1}]
+        release.set()
+        frames = _frames(ws, "s", ("done", "error"))
+        assert [f["type"] for f in frames] == ["rows", "rows", "done"]
+        assert frames[-1]["row_count"] == 5 and frames[-1]["truncated"] is False
+
+        # Zweiter Aufruf: Ergebnis liegt nicht im Cache, wird also erneut gestreamt
+        ws.send_json({"id": "execute_sql", "request_id": "t",
+                      "parameters": {"query": "SELECT id FROM teilweise", "format": "columns"}})
+        frames = _frames(ws, "t", ("done", "error"))
+        assert frames[1]["rows"] == [[0, 1]] and frames[-1]["row_count"] == 5